@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException, Body
-from typing import Dict, Any, List, Optional
+from fastapi import APIRouter, HTTPException, Body, Request
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, AsyncIterator, List, Optional
 from pydantic import BaseModel
+from contextlib import aclosing
+import json
 import os
 import sys
 
@@ -68,7 +71,7 @@ async def health_check():
 async def chat(request: ChatRequest):
     """处理聊天请求"""
     try:
-        result = chat_service.process_input(
+        result = await chat_service.aprocess_input(
             user_id=request.user_id,
             message=request.message,
             session_id=request.session_id
@@ -90,6 +93,38 @@ async def chat(request: ChatRequest):
         app_logger.error(f"处理聊天请求时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"处理聊天请求时出错: {str(e)}")
 
+def _format_sse(event: Dict[str, Any]) -> str:
+    """将事件格式化为Server-Sent Events消息"""
+    data = json.dumps(event["data"], ensure_ascii=False, default=str)
+    return f"event: {event['event']}\ndata: {data}\n\n"
+
+# 流式聊天接口
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request) -> StreamingResponse:
+    """以Server-Sent Events流式返回聊天响应"""
+    async def event_generator() -> AsyncIterator[str]:
+        events = chat_service.astream_input(
+            user_id=request.user_id,
+            message=request.message,
+            session_id=request.session_id
+        )
+        # 事件按客户端读取速度逐个拉取；客户端断开时关闭事件流以取消后续模型调用
+        async with aclosing(events):
+            async for event in events:
+                if await http_request.is_disconnected():
+                    app_logger.info(f"客户端已断开，停止流式响应: 用户 {request.user_id}")
+                    break
+                yield _format_sse(event)
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
+
 # 获取会话历史
 @router.post("/session/history")
 async def get_session_history(request: SessionHistoryRequest):
@@ -16,6 +16,51 @@ class Config:
     OPENAI_API_BASE: str = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
     OPENAI_MODEL: str = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
     
+    # 工具执行配置（单步内工具调用的最大并发数）
+    TOOL_MAX_WORKERS: int = int(os.getenv("TOOL_MAX_WORKERS", "8"))
+    
+    # 批量对话配置（chat_batch / infer_time_batch 同时进行的模型调用数）
+    BATCH_MAX_CONCURRENCY: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    
+    # 会话存储配置
+    SESSION_BACKEND: str = os.getenv("SESSION_BACKEND", "sqlite")  # sqlite 或 memory
+    SESSION_DB_PATH: str = os.getenv("SESSION_DB_PATH", "data/sessions.db")
+    SESSION_CACHE_SIZE: int = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+    
+    # 订单存储配置（memory 使用内置演示数据，sqlite 用于真实订单数据）
+    ORDER_BACKEND: str = os.getenv("ORDER_BACKEND", "memory")
+    ORDER_DB_PATH: str = os.getenv("ORDER_DB_PATH", "data/orders.db")
+    ORDER_DB_POOL_SIZE: int = int(os.getenv("ORDER_DB_POOL_SIZE", "4"))
+    # 订单读穿缓存配置（有效期按订单状态区分，不存在的订单号也会缓存）
+    ORDER_CACHE_ENABLED: bool = os.getenv("ORDER_CACHE_ENABLED", "true").lower() == "true"
+    ORDER_CACHE_SIZE: int = int(os.getenv("ORDER_CACHE_SIZE", "10000"))
+    ORDER_CACHE_NEGATIVE_TTL: int = int(os.getenv("ORDER_CACHE_NEGATIVE_TTL", "30"))  # 秒
+    
+    # 退款存储配置（sqlite 持久化退款申请，memory 仅用于演示和测试）
+    REFUND_BACKEND: str = os.getenv("REFUND_BACKEND", "sqlite")
+    REFUND_DB_PATH: str = os.getenv("REFUND_DB_PATH", "data/refunds.db")
+    REFUND_DB_POOL_SIZE: int = int(os.getenv("REFUND_DB_POOL_SIZE", "4"))
+    # 退款重复提交去重窗口（同一订单、原因和对话轮次的提交在窗口期内只创建一次退款申请）
+    REFUND_DEDUP_WINDOW: int = int(os.getenv("REFUND_DEDUP_WINDOW", "600"))  # 秒
+    REFUND_DEDUP_SIZE: int = int(os.getenv("REFUND_DEDUP_SIZE", "10000"))
+    
+    # 上下文窗口配置（每轮发送给模型的历史消息token上限，超出部分折叠为摘要）
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+    
+    # 响应缓存配置（完全相同的请求直接返回缓存的模型回答）
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    RESPONSE_CACHE_SIZE: int = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+    RESPONSE_CACHE_TTL: int = int(os.getenv("RESPONSE_CACHE_TTL", "3600"))  # 秒
+    RESPONSE_CACHE_DB_PATH: str = os.getenv("RESPONSE_CACHE_DB_PATH", "")  # 为空时不启用磁盘层
+    
+    # 近似问题缓存配置（字符n-gram + MinHash/LSH，仅用于不依赖工具结果的首轮回答）
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+    SEMANTIC_CACHE_SIZE: int = int(os.getenv("SEMANTIC_CACHE_SIZE", "100000"))
+    
+    # 快速意图路由配置（单号查询直接调用工具，不经过模型）
+    FAST_PATH_ENABLED: bool = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+    
     # DashScope配置（已弃用）
     # DASHSCOPE_API_KEY: str = os.getenv("DASHSCOPE_API_KEY", "")
     
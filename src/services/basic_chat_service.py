@@ -1,10 +1,11 @@
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple, cast
 from datetime import datetime, timedelta
 from langchain_core.prompts import PromptTemplate, ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough, RunnableParallel
+from langchain_core.runnables import RunnableConfig, RunnablePassthrough, RunnableParallel, RunnableLambda
 from langchain_openai import ChatOpenAI
 from src.core.config import config
+from src.services.date_resolver import VAGUE_TIME_EXPRESSION, find_date_expression, resolve_date
 
 class BasicChatService:
     """基础对话服务类，实现LangChain基础链"""
@@ -23,6 +24,12 @@ class BasicChatService:
         
         # 初始化基础对话链
         self.basic_chat_chain = self._create_basic_chat_chain()
+        
+        # 对话与时间推断并行执行，耗时取两者中较长的一个
+        self.chat_with_time_chain = RunnableParallel({
+            "chat": self.basic_chat_chain,
+            "time_inference": RunnableLambda(self._infer_time_from_input, afunc=self._ainfer_time_from_input)
+        })
     
     def _create_time_inference_chain(self) -> RunnableParallel:
         """创建时间推断链"""
@@ -76,28 +83,72 @@ class BasicChatService:
             "response": chat_chain
         })
     
+    def _resolve_time_locally(self, time_expression: str) -> Optional[Dict[str, Any]]:
+        """通过日历运算解析时间表达式，无法解析时返回None"""
+        today = datetime.now().date()
+        resolved = resolve_date(time_expression, today)
+        if resolved is None:
+            return None
+        return {
+            "success": True,
+            "time_expression": time_expression,
+            "inferred_date": resolved.strftime("%Y-%m-%d"),
+            "current_date": today.strftime("%Y-%m-%d"),
+            "source": "rule"
+        }
+    
+    @staticmethod
+    def _format_llm_time_result(time_expression: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "time_expression": time_expression,
+            "inferred_date": result["inferred_date"],
+            "current_date": result["current_date"],
+            "source": "llm"
+        }
+    
     def infer_time(self, time_expression: str) -> Dict[str, Any]:
         """
         推断时间表达式的具体日期
         
+        常见表达（"昨天"、"上周三"、"3天前"、"11月5号"等）直接通过日历运算得出，
+        本地无法解析的表达才调用模型推断。
+        
         Args:
             time_expression: 时间表达式，如"昨天"、"上周三"等
             
         Returns:
-            包含推断结果的字典
+            包含推断结果的字典，source为"rule"（本地解析）或"llm"（模型推断）
         """
         try:
-            current_date = datetime.now().strftime("%Y-%m-%d")
+            local_result = self._resolve_time_locally(time_expression)
+            if local_result is not None:
+                return local_result
+            
             result = self.time_inference_chain.invoke({
                 "time_expression": time_expression,
-                "current_date": current_date
+                "current_date": datetime.now().strftime("%Y-%m-%d")
             })
+            return self._format_llm_time_result(time_expression, result)
+        except Exception as e:
             return {
-                "success": True,
-                "time_expression": time_expression,
-                "inferred_date": result["inferred_date"],
-                "current_date": result["current_date"]
+                "success": False,
+                "error": str(e),
+                "time_expression": time_expression
             }
+    
+    async def ainfer_time(self, time_expression: str) -> Dict[str, Any]:
+        """异步推断时间表达式的具体日期，参数和返回值同 infer_time"""
+        try:
+            local_result = self._resolve_time_locally(time_expression)
+            if local_result is not None:
+                return local_result
+            
+            result = await self.time_inference_chain.ainvoke({
+                "time_expression": time_expression,
+                "current_date": datetime.now().strftime("%Y-%m-%d")
+            })
+            return self._format_llm_time_result(time_expression, result)
         except Exception as e:
             return {
                 "success": False,
@@ -105,10 +156,47 @@ class BasicChatService:
                 "time_expression": time_expression
             }
     
+    @staticmethod
+    def _extract_time_expression(user_input: str) -> Optional[str]:
+        """提取完整的时间表达式（如"上周三"而不只是"上周"），没有时返回None"""
+        found = find_date_expression(user_input)
+        if found is not None:
+            return found[0]
+        vague = VAGUE_TIME_EXPRESSION.search(user_input)
+        return vague.group(0) if vague else None
+    
+    def _infer_time_from_input(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        time_expression = self._extract_time_expression(inputs["user_input"])
+        return self.infer_time(time_expression) if time_expression else {}
+    
+    async def _ainfer_time_from_input(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        time_expression = self._extract_time_expression(inputs["user_input"])
+        return await self.ainfer_time(time_expression) if time_expression else {}
+    
+    @staticmethod
+    def _merge_time_inference(result: Dict[str, Any]) -> Dict[str, Any]:
+        """把并行链的对话结果和时间推断结果合并为最终响应"""
+        chat_result = result["chat"]
+        time_info = result["time_inference"]
+        response = chat_result["response"]
+        
+        # 如果有时间推断信息，添加到响应中
+        if time_info and time_info["success"]:
+            response = f"{response}\n\n(时间推断: 您提到的'{time_info['time_expression']}'是指{time_info['inferred_date']})"
+        
+        return {
+            "success": True,
+            "response": response,
+            "current_date": chat_result["current_date"],
+            "time_inference": time_info if time_info else None
+        }
+    
     def chat(self, user_input: str, conversation_history: Optional[list] = None) -> Dict[str, Any]:
         """
         基础对话功能
         
+        时间推断与对话链并行执行，延迟取两者中较长的一个而不是两者之和。
+        
         Args:
             user_input: 用户输入
             conversation_history: 对话历史（可选）
@@ -117,47 +205,122 @@ class BasicChatService:
             包含AI响应的字典
         """
         try:
-            # 检查是否包含时间表达式
-            time_expressions = ["昨天", "前天", "今天", "明天", "后天", "上周", "下周", "上个月", "下个月"]
-            contains_time_expr = any(expr in user_input for expr in time_expressions)
-            
-            # 如果包含时间表达式，先进行时间推断
-            time_info = {}
-            if contains_time_expr:
-                # 简单的时间表达式提取（实际应用中可以使用更复杂的NLP技术）
-                for expr in time_expressions:
-                    if expr in user_input:
-                        time_result = self.infer_time(expr)
-                        if time_result["success"]:
-                            time_info = time_result
-                            break
-            
-            # 运行基础对话链
-            current_date = datetime.now().strftime("%Y-%m-%d")
-            result = self.basic_chat_chain.invoke({
+            result = self.chat_with_time_chain.invoke({
                 "user_input": user_input,
-                "current_date": current_date
+                "current_date": datetime.now().strftime("%Y-%m-%d")
             })
+            return self._merge_time_inference(result)
+        except Exception as e:
+            return self._chat_error(e)
+    
+    async def achat(self, user_input: str, conversation_history: Optional[list] = None) -> Dict[str, Any]:
+        """异步基础对话功能，参数和返回值同 chat"""
+        try:
+            result = await self.chat_with_time_chain.ainvoke({
+                "user_input": user_input,
+                "current_date": datetime.now().strftime("%Y-%m-%d")
+            })
+            return self._merge_time_inference(result)
+        except Exception as e:
+            return self._chat_error(e)
+
+    @staticmethod
+    def _batch_config(max_concurrency: Optional[int]) -> RunnableConfig:
+        return {"max_concurrency": max_concurrency or config.BATCH_MAX_CONCURRENCY}
+    
+    @staticmethod
+    def _chat_error(error: Exception) -> Dict[str, Any]:
+        return {
+            "success": False,
+            "error": str(error),
+            "response": "抱歉，处理您的请求时出现了错误。"
+        }
+    
+    def _chat_batch_results(self, results: List[Any]) -> List[Dict[str, Any]]:
+        return [
+            self._chat_error(result) if isinstance(result, Exception) else self._merge_time_inference(result)
+            for result in results
+        ]
+    
+    def _chat_batch_inputs(self, user_inputs: List[str]) -> List[Dict[str, Any]]:
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        return [{"user_input": user_input, "current_date": current_date} for user_input in user_inputs]
+    
+    def chat_batch(self, user_inputs: List[str], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        批量对话
+        
+        Args:
+            user_inputs: 用户输入列表
+            max_concurrency: 同时处理的输入数量，默认为 BATCH_MAX_CONCURRENCY
             
-            # 构建响应
-            response = result["response"]
-            
-            # 如果有时间推断信息，添加到响应中
-            if time_info and time_info["success"]:
-                response = f"{response}\n\n(时间推断: 您提到的'{time_info['time_expression']}'是指{time_info['inferred_date']})"
+        Returns:
+            与输入顺序一致的响应列表，单条失败时对应位置为错误信息，不影响其他输入
+        """
+        results = self.chat_with_time_chain.batch(
+            self._chat_batch_inputs(user_inputs),
+            config=self._batch_config(max_concurrency),
+            return_exceptions=True
+        )
+        return self._chat_batch_results(results)
+    
+    async def achat_batch(self, user_inputs: List[str], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """异步批量对话，参数和返回值同 chat_batch"""
+        results = await self.chat_with_time_chain.abatch(
+            self._chat_batch_inputs(user_inputs),
+            config=self._batch_config(max_concurrency),
+            return_exceptions=True
+        )
+        return self._chat_batch_results(results)
+    
+    def _split_time_batch(
+        self, time_expressions: List[str]
+    ) -> Tuple[List[Optional[Dict[str, Any]]], List[int], List[Dict[str, str]]]:
+        """本地解析能确定的表达，返回结果列表（待推断位置为None）和需要模型推断的下标"""
+        results = [self._resolve_time_locally(expression) for expression in time_expressions]
+        pending = [index for index, result in enumerate(results) if result is None]
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        inputs = [
+            {"time_expression": time_expressions[index], "current_date": current_date}
+            for index in pending
+        ]
+        return results, pending, inputs
+    
+    def _fill_time_batch(self, results: List[Optional[Dict[str, Any]]], pending: List[int],
+                         time_expressions: List[str], llm_results: List[Any]) -> List[Dict[str, Any]]:
+        for index, llm_result in zip(pending, llm_results):
+            expression = time_expressions[index]
+            if isinstance(llm_result, Exception):
+                results[index] = {"success": False, "error": str(llm_result), "time_expression": expression}
+            else:
+                results[index] = self._format_llm_time_result(expression, llm_result)
+        # 待推断的位置均已填入结果
+        return cast(List[Dict[str, Any]], results)
+    
+    def infer_time_batch(self, time_expressions: List[str], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        批量推断时间表达式，本地可解析的表达不调用模型
+        
+        Args:
+            time_expressions: 时间表达式列表
+            max_concurrency: 同时进行的模型调用数，默认为 BATCH_MAX_CONCURRENCY
             
-            return {
-                "success": True,
-                "response": response,
-                "current_date": result["current_date"],
-                "time_inference": time_info if time_info else None
-            }
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "response": "抱歉，处理您的请求时出现了错误。"
-            }
+        Returns:
+            与输入顺序一致的推断结果列表，单条失败时对应位置为错误信息
+        """
+        results, pending, inputs = self._split_time_batch(time_expressions)
+        llm_results = self.time_inference_chain.batch(
+            inputs, config=self._batch_config(max_concurrency), return_exceptions=True
+        ) if inputs else []
+        return self._fill_time_batch(results, pending, time_expressions, llm_results)
+    
+    async def ainfer_time_batch(self, time_expressions: List[str], max_concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """异步批量推断时间表达式，参数和返回值同 infer_time_batch"""
+        results, pending, inputs = self._split_time_batch(time_expressions)
+        llm_results = await self.time_inference_chain.abatch(
+            inputs, config=self._batch_config(max_concurrency), return_exceptions=True
+        ) if inputs else []
+        return self._fill_time_batch(results, pending, time_expressions, llm_results)
 
 # 创建全局基础聊天服务实例
 basic_chat_service = BasicChatService()
\ No newline at end of file
@@ -1,20 +1,52 @@
 import os
 import json
-from typing import Dict, Any, List, Optional
+import asyncio
+import contextvars
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, AsyncGenerator, Sequence, Tuple, cast
 from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langchain_core.tools import tool
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
-from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 from typing_extensions import Annotated, TypedDict
 import uuid
+from contextlib import aclosing
 from datetime import datetime
 
 from src.core.config import Config
 from src.utils.logger import app_logger
 from src.services.model_manager import model_manager
 from src.services.plugin_manager import plugin_manager
+from src.services.session_store import SessionStore, create_checkpointer, create_session_store
+from src.services.history_window import HistoryWindow
+from src.services.response_cache import ResponseCache, make_cache_key
+from src.services.semantic_cache import SemanticCache
+from src.services.intent_router import FastPathMatch, FastPathRouter
+from src.services.entity_extractor import extract_entities, prefill_tool_args
+from src.services.idempotency import conversation_turn, make_idempotency_key
+
+
+# 流式响应中工具执行时展示给用户的进度提示
+TOOL_PROGRESS_MESSAGES = {
+    "query_order": "正在查询订单…",
+    "query_orders": "正在批量查询订单…",
+    "submit_refund_request": "正在提交退款申请…",
+    "query_refund_status": "正在查询退款状态…",
+    "query_refunds_by_order": "正在查询订单的退款记录…",
+    "list_refunds": "正在查询退款列表…",
+    "create_invoice": "正在开具发票…",
+    "create_invoices_bulk": "正在批量开具发票…",
+    "query_invoice_status": "正在查询发票状态…",
+    "get_invoice_details": "正在获取发票详情…",
+    "update_invoice_status": "正在更新发票状态…",
+    "list_invoices": "正在查询发票列表…",
+    "invoice_summary": "正在汇总发票…",
+}
 
 
 class State(TypedDict):
@@ -23,26 +55,73 @@ class State(TypedDict):
     current_user: str
     session_id: str
     tools_available: bool
+    # 本轮用户消息中抽取到的单号、日期等实体
+    entities: Dict[str, Any]
 
 
 class ChatService:
     """聊天服务类，集成LangChain和LangGraph"""
     
-    def __init__(self):
-        """初始化聊天服务"""
+    def __init__(
+        self, 
+        session_store: Optional[SessionStore] = None, 
+        checkpointer: Optional[BaseCheckpointSaver] = None
+    ):
+        """
+        初始化聊天服务
+        
+        Args:
+            session_store: 会话元数据存储，默认按配置创建
+            checkpointer: 状态图检查点存储，默认按配置创建
+        """
         self.config = Config()
+        # 只创建调用方未提供的部分（空的会话存储长度为0，不能用真值判断）
+        backend_options: Dict[str, Any] = {
+            "backend": self.config.SESSION_BACKEND,
+            "db_path": self.config.SESSION_DB_PATH,
+            "cache_size": self.config.SESSION_CACHE_SIZE
+        }
+        if session_store is None:
+            session_store = create_session_store(**backend_options)
+        if checkpointer is None:
+            checkpointer = create_checkpointer(**backend_options)
+        # 存储会话元数据（用户、创建时间、消息数等）
+        self.sessions = session_store
+        # 存储每个会话的状态图检查点（完整消息历史），重启后可恢复
+        self.checkpointer = checkpointer
+        # 缓存的工具绑定模型：((模型配置, 插件注册表版本), 绑定后的模型)
+        self._bound_model_cache: Optional[Tuple[Tuple[Any, int], Any]] = None
+        # 按token预算组装每轮发送给模型的历史，较早的轮次在后台折叠为摘要
+        self.history_window = HistoryWindow(
+            max_tokens=self.config.CONTEXT_MAX_TOKENS,
+            summarizer=self._summarize_history,
+            capacity=self.config.SESSION_CACHE_SIZE
+        )
+        # 完全相同的请求直接复用之前的模型回答
+        self.response_cache = ResponseCache(
+            capacity=self.config.RESPONSE_CACHE_SIZE,
+            ttl=self.config.RESPONSE_CACHE_TTL,
+            db_path=self.config.RESPONSE_CACHE_DB_PATH or None
+        ) if self.config.RESPONSE_CACHE_ENABLED else None
+        # 相似的首轮问题（不依赖工具结果）复用之前的回答
+        self.semantic_cache = SemanticCache(
+            threshold=self.config.SEMANTIC_CACHE_THRESHOLD,
+            capacity=self.config.SEMANTIC_CACHE_SIZE,
+            ttl=self.config.RESPONSE_CACHE_TTL
+        ) if self.config.SEMANTIC_CACHE_ENABLED else None
+        # 意图明确的单号查询直接调用工具，不经过模型
+        self.fast_path_router = FastPathRouter() if self.config.FAST_PATH_ENABLED else None
         self.app = self._build_state_graph()
-        self.sessions = {}  # 存储会话状态
         app_logger.info("聊天服务初始化完成")
     
-    def _build_state_graph(self) -> StateGraph:
+    def _build_state_graph(self) -> CompiledStateGraph:
         """构建状态图工作流"""
         # 创建状态图
         workflow = StateGraph(State)
         
-        # 添加节点
-        workflow.add_node("agent", self._call_model)
-        workflow.add_node("tools", self._call_tools)
+        # 添加节点（同时提供同步与异步实现，invoke/ainvoke 均可驱动）
+        workflow.add_node("agent", RunnableLambda(self._call_model, afunc=self._acall_model))
+        workflow.add_node("tools", RunnableLambda(self._call_tools, afunc=self._acall_tools))
         
         # 设置入口点
         workflow.set_entry_point("agent")
@@ -60,116 +139,331 @@ class ChatService:
         # 添加从工具节点回到代理节点的边
         workflow.add_edge("tools", "agent")
         
-        # 编译图
-        app = workflow.compile()
+        # 编译图，使用检查点按会话保存状态，热更新重建状态图后会话历史不受影响
+        app = workflow.compile(checkpointer=self.checkpointer)
         
         app_logger.info("状态图工作流构建完成")
         return app
     
+    def _get_tool_calls(self, message: Any) -> List[Dict[str, Any]]:
+        """
+        提取消息中的工具调用
+        
+        兼容 LangChain 标准的 message.tool_calls 和 OpenAI 原始的
+        additional_kwargs["tool_calls"] 两种格式，统一为 {id, name, args} 结构。
+        """
+        if message is None:
+            return []
+        
+        if getattr(message, "tool_calls", None):
+            return [
+                {
+                    "id": tool_call.get("id"),
+                    "name": tool_call.get("name"),
+                    "args": tool_call.get("args") or {}
+                }
+                for tool_call in message.tool_calls
+            ]
+        
+        raw_tool_calls = getattr(message, "additional_kwargs", {}).get("tool_calls") or []
+        return [
+            {
+                "id": tool_call.get("id"),
+                "name": tool_call.get("function", {}).get("name"),
+                "args": json.loads(tool_call.get("function", {}).get("arguments") or "{}")
+            }
+            for tool_call in raw_tool_calls
+        ]
+    
     def _should_continue(self, state: State) -> str:
         """决定是否继续调用工具"""
         last_message = state["messages"][-1] if state["messages"] else None
         
         # 如果最后一条消息是AI消息且包含工具调用，则继续
-        if (last_message and 
-            hasattr(last_message, 'additional_kwargs') and 
-            last_message.additional_kwargs.get('tool_calls')):
+        if isinstance(last_message, AIMessage) and self._get_tool_calls(last_message):
             return "continue"
         
         # 否则结束
         return "end"
     
+    def _get_model_with_tools(self) -> Any:
+        """
+        获取绑定了插件工具的当前模型
+        
+        绑定结果按（模型配置，插件注册表版本）缓存，只有模型更新或插件重载后
+        才会重新绑定工具，避免每个agent步骤都重新生成工具Schema。
+        """
+        cache_key = (model_manager.get_model_config_key(), plugin_manager.registry_version)
+        cached = self._bound_model_cache
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+        
+        # 获取当前模型
+        llm = model_manager.get_current_model()
+        
+        # 使用预先序列化的工具Schema绑定模型
+        tool_schemas = plugin_manager.get_tool_schemas()
+        llm_with_tools = llm.bind_tools(tool_schemas) if tool_schemas else llm
+        
+        self._bound_model_cache = (cache_key, llm_with_tools)
+        app_logger.info(f"已绑定 {len(tool_schemas)} 个工具到模型，注册表版本: {plugin_manager.registry_version}")
+        return llm_with_tools
+    
+    def _invalidate_tool_binding(self) -> None:
+        """清除已缓存的工具绑定模型"""
+        self._bound_model_cache = None
+    
+    def _model_error_response(self, error: Exception) -> Dict[str, Any]:
+        """构建模型调用失败时的响应"""
+        app_logger.error(f"调用模型时出错: {str(error)}")
+        error_message = AIMessage(content=f"抱歉，处理您的请求时出现错误: {str(error)}")
+        return {"messages": [error_message]}
+    
+    def _summarize_history(self, summary: str, messages: Sequence[BaseMessage]) -> str:
+        """将被裁剪出上下文窗口的消息合并进会话摘要"""
+        lines = []
+        for message in messages:
+            if isinstance(message, HumanMessage):
+                lines.append(f"用户: {message.content}")
+            elif isinstance(message, ToolMessage):
+                lines.append(f"工具 {message.name} 返回: {message.content}")
+            elif isinstance(message, AIMessage) and message.content:
+                lines.append(f"助手: {message.content}")
+        
+        prompt = [
+            SystemMessage(content=(
+                "你负责维护客服对话的摘要。请将已有摘要与新增对话合并为一段简洁的中文摘要，"
+                "保留订单号、发票号、退款单号、金额、用户诉求和处理结果等关键信息，只输出摘要内容。"
+            )),
+            HumanMessage(content=f"已有摘要：\n{summary or '无'}\n\n新增对话：\n" + "\n".join(lines))
+        ]
+        return str(model_manager.get_current_model().invoke(prompt).content)
+    
+    def _build_model_input(self, state: State) -> List[Any]:
+        """在token预算内组装本轮发送给模型的消息"""
+        return self.history_window.build_prompt(state["session_id"], state["messages"])
+    
+    def _cache_scope(self) -> str:
+        """缓存作用域：模型或工具集合变化后，之前的回答不再复用"""
+        return f"{model_manager.current_model_name}@{model_manager.current_api_base}#{plugin_manager.tool_schema_hash}"
+    
+    def _response_cache_key(self, prompt: List[Any]) -> Optional[str]:
+        """
+        计算响应缓存键，不可缓存时返回None
+        
+        包含工具调用或工具结果的对话依赖实时数据（如订单状态），不参与缓存。
+        """
+        if self.response_cache is None:
+            return None
+        if any(isinstance(message, ToolMessage) or self._get_tool_calls(message) for message in prompt):
+            return None
+        model_name = f"{model_manager.current_model_name}@{model_manager.current_api_base}"
+        return make_cache_key(model_name, plugin_manager.tool_schema_hash, prompt)
+    
+    def _semantic_cache_question(self, prompt: List[Any]) -> Optional[str]:
+        """只有不带历史的单条用户问题参与近似匹配，其回答不依赖上下文"""
+        if self.semantic_cache is None or len(prompt) != 1 or not isinstance(prompt[0], HumanMessage):
+            return None
+        return prompt[0].content if isinstance(prompt[0].content, str) else None
+    
+    def _lookup_cached_response(self, cache_key: Optional[str], prompt: List[Any]) -> Optional[AIMessage]:
+        """依次查找精确匹配和近似匹配的缓存回答"""
+        if cache_key is not None and self.response_cache is not None:
+            content = self.response_cache.get(cache_key)
+            if content is not None:
+                return AIMessage(content=content, response_metadata={"cached": True})
+        
+        question = self._semantic_cache_question(prompt)
+        if question is not None and self.semantic_cache is not None:
+            cached = self.semantic_cache.get(question, scope=self._cache_scope())
+            if cached is not None:
+                content, similarity = cached
+                return AIMessage(content=content, response_metadata={"cached": True, "similarity": similarity})
+        return None
+    
+    def _store_cached_response(self, cache_key: Optional[str], prompt: List[Any], response: Any) -> None:
+        """缓存不包含工具调用的模型回答"""
+        if self._get_tool_calls(response) or not isinstance(response.content, str):
+            return
+        if cache_key is not None and self.response_cache is not None:
+            self.response_cache.put(cache_key, response.content)
+        question = self._semantic_cache_question(prompt)
+        if question is not None and self.semantic_cache is not None:
+            self.semantic_cache.put(question, response.content, scope=self._cache_scope())
+    
     def _call_model(self, state: State) -> Dict[str, Any]:
         """调用模型生成响应"""
         try:
-            # 获取当前模型
-            llm = model_manager.get_current_model()
-            
-            # 获取所有插件工具
-            plugins = plugin_manager.get_all_plugins()
-            tools = []
-            for plugin_name, plugin_tools in plugins.items():
-                tools.extend(plugin_tools)
-            
-            # 如果有工具，将工具绑定到模型
-            if tools:
-                tool_functions = [tool["function"] for tool in tools]
-                llm_with_tools = llm.bind_tools(tool_functions)
-            else:
-                llm_with_tools = llm
-            
-            # 准备消息
-            messages = state["messages"]
+            prompt = self._build_model_input(state)
+            cache_key = self._response_cache_key(prompt)
+            response = self._lookup_cached_response(cache_key, prompt)
+            if response is None:
+                response = self._get_model_with_tools().invoke(prompt)
+                self._store_cached_response(cache_key, prompt, response)
+            return {"messages": [response]}
+        except Exception as e:
+            return self._model_error_response(e)
+    
+    async def _acall_model(self, state: State) -> Dict[str, Any]:
+        """异步调用模型生成响应，等待模型期间不阻塞事件循环"""
+        try:
+            prompt = self._build_model_input(state)
+            cache_key = self._response_cache_key(prompt)
+            # 缓存可能包含磁盘层，查询和写入放到线程中执行
+            response = await asyncio.to_thread(self._lookup_cached_response, cache_key, prompt)
+            if response is None:
+                response = await self._get_model_with_tools().ainvoke(prompt)
+                await asyncio.to_thread(self._store_cached_response, cache_key, prompt, response)
+            return {"messages": [response]}
+        except Exception as e:
+            return self._model_error_response(e)
+    
+    def _clear_response_cache(self) -> None:
+        """清空响应缓存"""
+        if self.response_cache is not None:
+            self.response_cache.clear()
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+    
+    def _tool_output_message(self, tool_call: Dict[str, Any], output: str) -> ToolMessage:
+        """将工具输出包装为工具消息"""
+        return ToolMessage(content=output, tool_call_id=tool_call["id"], name=tool_call["name"])
+    
+    def _tool_failure_message(self, tool_call: Dict[str, Any], error: Exception) -> ToolMessage:
+        """构建工具执行出错时的工具消息"""
+        function_name = tool_call["name"]
+        app_logger.error(f"执行工具 {function_name} 时出错: {str(error)}")
+        return self._tool_output_message(tool_call, f"执行工具 {function_name} 时出错: {str(error)}")
+    
+    @staticmethod
+    def _run_coroutine(coroutine: Any) -> Any:
+        """在同步代码中运行协程"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # 当前线程已有运行中的事件循环（在异步上下文中调用了同步接口），改在新线程中运行，
+        # 并沿用当前的上下文变量（如对话轮次）
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+    
+    def _execute_tool_call(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        """执行单个工具调用，并将结果包装为工具消息"""
+        function_name = tool_call["name"]
+        
+        try:
+            # 获取工具函数
+            tool_function = plugin_manager.get_tool_function(function_name)
             
-            # 调用模型
-            response = llm_with_tools.invoke(messages)
+            if not tool_function:
+                # 工具不存在
+                app_logger.warning(f"工具 {function_name} 不存在")
+                return self._tool_output_message(tool_call, f"错误: 工具 {function_name} 不存在")
             
-            return {"messages": [response]}
+            # 执行工具函数（同步链路中的异步工具在独立的事件循环中运行）
+            if inspect.iscoroutinefunction(tool_function):
+                result = self._run_coroutine(tool_function(**tool_call["args"]))
+            else:
+                result = tool_function(**tool_call["args"])
+            app_logger.info(f"执行工具 {function_name} 成功")
+            return self._tool_output_message(tool_call, str(result))
+        except Exception as e:
+            # 工具执行出错
+            return self._tool_failure_message(tool_call, e)
+    
+    async def _aexecute_tool_call(self, tool_call: Dict[str, Any]) -> ToolMessage:
+        """
+        异步执行单个工具调用
+        
+        异步工具直接在事件循环中等待，同步工具交给事件循环的默认线程池执行，
+        避免阻塞事件循环。
+        """
+        function_name = tool_call["name"]
+        tool_function = plugin_manager.get_tool_function(function_name)
+        
+        if not inspect.iscoroutinefunction(tool_function):
+            return await asyncio.to_thread(self._execute_tool_call, tool_call)
+        
+        try:
+            result = await tool_function(**tool_call["args"])
+            app_logger.info(f"执行工具 {function_name} 成功")
+            return self._tool_output_message(tool_call, str(result))
         except Exception as e:
-            app_logger.error(f"调用模型时出错: {str(e)}")
-            error_message = AIMessage(content=f"抱歉，处理您的请求时出现错误: {str(e)}")
-            return {"messages": [error_message]}
+            return self._tool_failure_message(tool_call, e)
+    
+    def _prefill_tool_calls(self, tool_calls: List[Dict[str, Any]], entities: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """用户消息中已有单号时，补全模型漏填或填错的工具参数，避免模型再向用户追问"""
+        if not entities:
+            return tool_calls
+        
+        prefilled = []
+        for tool_call in tool_calls:
+            tool_function = plugin_manager.get_tool_function(tool_call["name"])
+            args = prefill_tool_args(tool_function, tool_call["args"], entities) if tool_function else tool_call["args"]
+            if args is not tool_call["args"]:
+                app_logger.info(f"根据用户消息补全工具 {tool_call['name']} 的参数: {args}")
+                tool_call = {**tool_call, "args": args}
+            prefilled.append(tool_call)
+        return prefilled
+    
+    @staticmethod
+    def _turn_id(state: State) -> str:
+        """
+        当前对话轮次的标识
+        
+        由会话ID和最近一条用户消息生成：模型在本轮中重复调用同一工具，或客户端重试同一条消息时保持不变，
+        有副作用的工具据此识别重复提交。
+        """
+        message = next((message for message in reversed(state["messages"]) if isinstance(message, HumanMessage)), None)
+        return make_idempotency_key(state.get("session_id"), message.content if message is not None else "")
+    
+    def _tools_error_response(self, error: Exception) -> Dict[str, Any]:
+        """构建工具调用失败时的响应"""
+        app_logger.error(f"调用工具时出错: {str(error)}")
+        error_message = AIMessage(content=f"执行工具时出现错误: {str(error)}")
+        return {"messages": [error_message]}
     
     def _call_tools(self, state: State) -> Dict[str, Any]:
         """执行工具调用"""
         try:
-            # 获取最后一条消息
-            last_message = state["messages"][-1]
+            tool_calls = self._prefill_tool_calls(self._get_tool_calls(state["messages"][-1]), state.get("entities"))
+            
+            with conversation_turn(self._turn_id(state)):
+                # 同一步中的多个工具调用相互独立，并发执行；结果顺序与工具调用顺序一致
+                if len(tool_calls) > 1:
+                    max_workers = min(len(tool_calls), self.config.TOOL_MAX_WORKERS)
+                    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool") as executor:
+                        # 工作线程不继承上下文变量，每个调用在当前上下文的副本中执行
+                        futures = [
+                            executor.submit(contextvars.copy_context().run, self._execute_tool_call, tool_call)
+                            for tool_call in tool_calls
+                        ]
+                        tool_messages = [future.result() for future in futures]
+                else:
+                    tool_messages = [self._execute_tool_call(tool_call) for tool_call in tool_calls]
+            return {"messages": tool_messages}
+        except Exception as e:
+            return self._tools_error_response(e)
+    
+    async def _acall_tools(self, state: State) -> Dict[str, Any]:
+        """异步执行工具调用"""
+        try:
+            tool_calls = self._prefill_tool_calls(self._get_tool_calls(state["messages"][-1]), state.get("entities"))
             
-            # 检查是否有工具调用
-            if not (hasattr(last_message, 'additional_kwargs') and 
-                    last_message.additional_kwargs.get('tool_calls')):
-                return {"messages": []}
+            # 并发执行所有工具调用，gather保证结果顺序与工具调用顺序一致；
+            # 单步内的并发数受 TOOL_MAX_WORKERS 限制，不同会话之间互不占用名额
+            semaphore = asyncio.Semaphore(self.config.TOOL_MAX_WORKERS)
             
-            tool_calls = last_message.additional_kwargs.get('tool_calls', [])
-            tool_results = []
+            async def run(tool_call: Dict[str, Any]) -> ToolMessage:
+                async with semaphore:
+                    return await self._aexecute_tool_call(tool_call)
             
-            # 执行每个工具调用
-            for tool_call in tool_calls:
-                function_name = tool_call.get('function', {}).get('name')
-                function_args = json.loads(tool_call.get('function', {}).get('arguments', '{}'))
-                
-                try:
-                    # 获取工具函数
-                    tool_function = plugin_manager.get_plugin_function(function_name)
-                    
-                    if tool_function:
-                        # 执行工具函数
-                        result = tool_function(**function_args)
-                        tool_results.append({
-                            "tool_call_id": tool_call.get('id'),
-                            "output": str(result)
-                        })
-                        app_logger.info(f"执行工具 {function_name} 成功")
-                    else:
-                        # 工具不存在
-                        tool_results.append({
-                            "tool_call_id": tool_call.get('id'),
-                            "output": f"错误: 工具 {function_name} 不存在"
-                        })
-                        app_logger.warning(f"工具 {function_name} 不存在")
-                except Exception as e:
-                    # 工具执行出错
-                    tool_results.append({
-                        "tool_call_id": tool_call.get('id'),
-                        "output": f"执行工具 {function_name} 时出错: {str(e)}"
-                    })
-                    app_logger.error(f"执行工具 {function_name} 时出错: {str(e)}")
-            
-            # 创建工具响应消息
-            if tool_results:
-                tool_message = AIMessage(
-                    content="",
-                    additional_kwargs={"tool_calls": tool_calls},
-                    tool_calls=tool_results
-                )
-                return {"messages": [tool_message]}
-            
-            return {"messages": []}
+            # gather创建的任务和 asyncio.to_thread 都会继承当前对话轮次
+            with conversation_turn(self._turn_id(state)):
+                tool_messages = await asyncio.gather(*[run(tool_call) for tool_call in tool_calls])
+            return {"messages": list(tool_messages)}
         except Exception as e:
-            app_logger.error(f"调用工具时出错: {str(e)}")
-            error_message = AIMessage(content=f"执行工具时出现错误: {str(e)}")
-            return {"messages": [error_message]}
+            return self._tools_error_response(e)
     
     def _get_or_create_session(self, user_id: str, session_id: Optional[str] = None) -> str:
         """获取或创建会话"""
@@ -178,79 +472,251 @@ class ChatService:
         
         # 创建新会话
         new_session_id = str(uuid.uuid4())
-        self.sessions[new_session_id] = {
+        self.sessions.save(new_session_id, {
             "user_id": user_id,
             "created_at": datetime.now().isoformat(),
-            "messages": []
-        }
+            "message_count": 0
+        })
         
         return new_session_id
     
+    def _prepare_input(self, user_id: str, message: str, session_id: str) -> Dict[str, Any]:
+        """准备状态图的输入状态"""
+        return {
+            "messages": [HumanMessage(content=message)],
+            "current_user": user_id,
+            "session_id": session_id,
+            "tools_available": True,
+            "entities": extract_entities(message)
+        }
+    
+    def _finalize_response(self, session_id: str, state: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """从状态图结果中提取AI响应并更新会话"""
+        # 获取AI响应
+        ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
+        
+        if not ai_messages:
+            return {
+                "response": "抱歉，我无法生成响应。",
+                "session_id": session_id,
+                "status": "error"
+            }
+        
+        # 获取最后一条AI消息
+        last_ai_message = ai_messages[-1]
+        response_content = last_ai_message.content if hasattr(last_ai_message, 'content') else str(last_ai_message)
+        
+        # 更新会话信息（消息本身由检查点保存）
+        self.sessions.record_turn(session_id, 2, datetime.now().isoformat())
+        
+        return {
+            "response": response_content,
+            "session_id": session_id,
+            "status": "success",
+            "tool_calls": last_ai_message.additional_kwargs.get('tool_calls') if hasattr(last_ai_message, 'additional_kwargs') else None
+        }
+    
+    def _error_response(self, error: Exception, session_id: Optional[str]) -> Dict[str, Any]:
+        """构建处理用户输入失败时的响应"""
+        app_logger.error(f"处理用户输入时出错: {str(error)}")
+        return {
+            "response": f"处理您的请求时出现错误: {str(error)}",
+            "session_id": session_id,
+            "status": "error"
+        }
+    
+    def _match_fast_path(self, message: str) -> Optional[FastPathMatch]:
+        """识别可以绕过状态图直接处理的查询"""
+        if self.fast_path_router is None:
+            return None
+        return self.fast_path_router.match(message)
+    
+    def _fast_path_update(self, state: Dict[str, Any], match: FastPathMatch, reply: str) -> Dict[str, Any]:
+        """构建快速路由的状态更新，用户消息和回复一起写入会话历史"""
+        ai_message = AIMessage(content=reply, response_metadata={"fast_path": match.intent})
+        return {"messages": state["messages"] + [ai_message]}
+    
+    def _run_fast_path(self, state: Dict[str, Any], config: RunnableConfig) -> Optional[Dict[str, Any]]:
+        """尝试通过快速路由处理本轮输入，无法处理时返回None"""
+        match = self._match_fast_path(state["messages"][-1].content)
+        if match is None or self.fast_path_router is None:
+            return None
+        reply = self.fast_path_router.execute(match)
+        if reply is None:
+            return None
+        update = self._fast_path_update(state, match, reply)
+        self.app.update_state(config, update, as_node="agent")
+        return update
+    
+    async def _arun_fast_path(self, state: Dict[str, Any], config: RunnableConfig) -> Optional[Dict[str, Any]]:
+        """异步尝试通过快速路由处理本轮输入，无法处理时返回None"""
+        match = self._match_fast_path(state["messages"][-1].content)
+        if match is None or self.fast_path_router is None:
+            return None
+        reply = await self.fast_path_router.aexecute(match)
+        if reply is None:
+            return None
+        update = self._fast_path_update(state, match, reply)
+        await self.app.aupdate_state(config, update, as_node="agent")
+        return update
+    
     def process_input(self, user_id: str, message: str, session_id: Optional[str] = None) -> Dict[str, Any]:
         """处理用户输入并生成响应"""
         try:
             # 获取或创建会话
             session_id = self._get_or_create_session(user_id, session_id)
             
-            # 添加用户消息到会话
-            user_message = HumanMessage(content=message)
-            
             # 准备状态
-            state = {
-                "messages": [user_message],
-                "current_user": user_id,
-                "session_id": session_id,
-                "tools_available": True
-            }
+            state = self._prepare_input(user_id, message, session_id)
             
-            # 调用状态图
+            # 意图明确的查询直接调用工具，否则调用状态图
             config = RunnableConfig(configurable={"thread_id": session_id})
-            result = self.app.invoke(state, config=config)
+            result = self._run_fast_path(state, config) or self.app.invoke(state, config=config)
             
-            # 获取AI响应
-            ai_messages = [msg for msg in result["messages"] if isinstance(msg, AIMessage)]
+            return self._finalize_response(session_id, state, result)
+        except Exception as e:
+            return self._error_response(e, session_id)
+    
+    async def aprocess_input(self, user_id: str, message: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        异步处理用户输入并生成响应
+        
+        与 process_input 行为一致，但模型与工具调用均以异步方式执行，
+        等待LLM响应期间事件循环可以继续处理其他会话。
+        """
+        try:
+            # 获取或创建会话（会话存储可能访问磁盘，不在事件循环中执行）
+            session_id = await asyncio.to_thread(self._get_or_create_session, user_id, session_id)
             
-            if not ai_messages:
-                return {
-                    "response": "抱歉，我无法生成响应。",
-                    "session_id": session_id,
-                    "status": "error"
-                }
+            # 准备状态
+            state = self._prepare_input(user_id, message, session_id)
             
-            # 获取最后一条AI消息
-            last_ai_message = ai_messages[-1]
-            response_content = last_ai_message.content if hasattr(last_ai_message, 'content') else str(last_ai_message)
+            # 意图明确的查询直接调用工具，否则异步调用状态图
+            config = RunnableConfig(configurable={"thread_id": session_id})
+            result = await self._arun_fast_path(state, config)
+            if result is None:
+                result = await self.app.ainvoke(state, config=config)
             
-            # 更新会话消息
-            session = self.sessions[session_id]
-            session["messages"].extend([user_message, last_ai_message])
-            session["last_activity"] = datetime.now().isoformat()
+            return await asyncio.to_thread(self._finalize_response, session_id, state, result)
+        except Exception as e:
+            return self._error_response(e, session_id)
+    
+    def _describe_tool_progress(self, tool_name: str) -> str:
+        """获取工具执行时向用户展示的进度提示"""
+        return TOOL_PROGRESS_MESSAGES.get(tool_name, f"正在调用工具 {tool_name}…")
+    
+    async def astream_input(
+        self, 
+        user_id: str, 
+        message: str, 
+        session_id: Optional[str] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        以事件流的形式处理用户输入
+        
+        逐个产出模型生成的token以及工具执行进度，调用方按需拉取事件，
+        停止迭代（例如客户端断开连接）时状态图的执行会随之取消。
+        
+        Args:
+            user_id: 用户ID
+            message: 用户消息
+            session_id: 会话ID（可选）
+            
+        Yields:
+            事件字典，包含 event（session/token/tool_start/tool_end/done/error）和 data
+        """
+        try:
+            # 获取或创建会话（会话存储可能访问磁盘，不在事件循环中执行）
+            session_id = await asyncio.to_thread(self._get_or_create_session, user_id, session_id)
+            yield {"event": "session", "data": {"session_id": session_id}}
             
-            return {
-                "response": response_content,
-                "session_id": session_id,
-                "status": "success",
-                "tool_calls": last_ai_message.additional_kwargs.get('tool_calls') if hasattr(last_ai_message, 'additional_kwargs') else None
-            }
+            # 准备状态
+            state = self._prepare_input(user_id, message, session_id)
+            config = RunnableConfig(configurable={"thread_id": session_id})
+            
+            # 意图明确的查询直接调用工具
+            match = self._match_fast_path(message)
+            if match is not None and self.fast_path_router is not None:
+                tool_event = {"name": match.tool_name, "tool_call_id": f"fast_path_{match.intent}"}
+                yield {
+                    "event": "tool_start",
+                    "data": {**tool_event, "message": self._describe_tool_progress(match.tool_name)}
+                }
+                reply = await self.fast_path_router.aexecute(match)
+                yield {"event": "tool_end", "data": tool_event}
+                
+                if reply is not None:
+                    update = self._fast_path_update(state, match, reply)
+                    await self.app.aupdate_state(config, update, as_node="agent")
+                    yield {"event": "token", "data": {"content": reply}}
+                    response = await asyncio.to_thread(self._finalize_response, session_id, state, update)
+                    yield {"event": "done", "data": response}
+                    return
+            
+            # 同时订阅模型token（messages）和节点输出（updates），事件为 (模式, 数据)
+            node_messages = []
+            stream = cast(AsyncGenerator[Tuple[str, Any], None], self.app.astream(
+                state, 
+                config=config, 
+                stream_mode=["messages", "updates"]
+            ))
+            async with aclosing(stream):
+                async for mode, chunk in stream:
+                    if mode == "messages":
+                        message_chunk, metadata = chunk
+                        if (metadata.get("langgraph_node") == "agent" and 
+                            isinstance(message_chunk, AIMessage) and 
+                            message_chunk.content):
+                            yield {"event": "token", "data": {"content": message_chunk.content}}
+                        continue
+                
+                    for node_name, update in chunk.items():
+                        messages = (update or {}).get("messages", [])
+                        node_messages.extend(messages)
+                    
+                        if node_name == "agent":
+                            # 模型决定调用工具，提示用户正在处理
+                            for tool_call in self._get_tool_calls(messages[-1] if messages else None):
+                                yield {
+                                    "event": "tool_start",
+                                    "data": {
+                                        "name": tool_call["name"],
+                                        "tool_call_id": tool_call["id"],
+                                        "message": self._describe_tool_progress(tool_call["name"])
+                                    }
+                                }
+                        elif node_name == "tools":
+                            for tool_message in messages:
+                                if isinstance(tool_message, ToolMessage):
+                                    yield {
+                                        "event": "tool_end",
+                                        "data": {
+                                            "name": tool_message.name,
+                                            "tool_call_id": tool_message.tool_call_id
+                                        }
+                                    }
+            
+            response = await asyncio.to_thread(
+                self._finalize_response, session_id, state, {"messages": node_messages}
+            )
+            yield {"event": "done", "data": response}
+        except asyncio.CancelledError:
+            app_logger.info(f"流式响应已取消: 会话 {session_id}")
+            raise
         except Exception as e:
-            app_logger.error(f"处理用户输入时出错: {str(e)}")
-            return {
-                "response": f"处理您的请求时出现错误: {str(e)}",
-                "session_id": session_id if 'session_id' in locals() else None,
-                "status": "error"
-            }
+            yield {"event": "error", "data": self._error_response(e, session_id)}
     
     def get_session_history(self, user_id: str, session_id: str) -> Dict[str, Any]:
         """获取会话历史"""
         try:
-            if session_id not in self.sessions:
+            # 用 get 一次读取：会话可能已被其他进程删除，本地缓存的存在性判断不可靠
+            session = self.sessions.get(session_id)
+            if session is None:
                 return {
                     "error": "会话不存在",
                     "status": "error"
                 }
             
-            session = self.sessions[session_id]
-            
             # 验证用户权限
             if session["user_id"] != user_id:
                 return {
@@ -258,9 +724,15 @@ class ChatService:
                     "status": "error"
                 }
             
-            # 格式化消息历史
+            # 从检查点读取会话消息
+            config = RunnableConfig(configurable={"thread_id": session_id})
+            messages = self.app.get_state(config).values.get("messages", [])
+            
+            # 格式化消息历史（跳过工具调用的中间步骤）
             formatted_messages = []
-            for message in session["messages"]:
+            for message in messages:
+                if isinstance(message, AIMessage) and self._get_tool_calls(message):
+                    continue
                 if isinstance(message, HumanMessage):
                     formatted_messages.append({
                         "role": "user",
@@ -293,14 +765,14 @@ class ChatService:
     def delete_session(self, user_id: str, session_id: str) -> Dict[str, Any]:
         """删除会话"""
         try:
-            if session_id not in self.sessions:
+            # 用 get 一次读取：会话可能已被其他进程删除，本地缓存的存在性判断不可靠
+            session = self.sessions.get(session_id)
+            if session is None:
                 return {
                     "error": "会话不存在",
                     "status": "error"
                 }
             
-            session = self.sessions[session_id]
-            
             # 验证用户权限
             if session["user_id"] != user_id:
                 return {
@@ -308,8 +780,10 @@ class ChatService:
                     "status": "error"
                 }
             
-            # 删除会话
-            del self.sessions[session_id]
+            # 删除会话及其检查点
+            self.sessions.delete(session_id)
+            self.checkpointer.delete_thread(session_id)
+            self.history_window.forget(session_id)
             
             return {
                 "message": "会话已删除",
@@ -325,15 +799,15 @@ class ChatService:
     def get_user_sessions(self, user_id: str) -> Dict[str, Any]:
         """获取用户的所有会话"""
         try:
+            # 通过用户索引获取会话，无需遍历全部会话
             user_sessions = []
-            for session_id, session in self.sessions.items():
-                if session["user_id"] == user_id:
-                    user_sessions.append({
-                        "session_id": session_id,
-                        "created_at": session["created_at"],
-                        "last_activity": session.get("last_activity"),
-                        "message_count": len(session["messages"])
-                    })
+            for session_id, session in self.sessions.list_by_user(user_id):
+                user_sessions.append({
+                    "session_id": session_id,
+                    "created_at": session["created_at"],
+                    "last_activity": session.get("last_activity"),
+                    "message_count": session.get("message_count", 0)
+                })
             
             return {
                 "user_id": user_id,
@@ -351,10 +825,12 @@ class ChatService:
         """更新模型配置"""
         try:
             # 使用模型管理器更新模型
-            result = model_manager.update_model(model_config)
+            result = model_manager.update_model(**model_config)
             
             if result["success"]:
                 # 重新构建状态图以使用新模型
+                self._invalidate_tool_binding()
+                self._clear_response_cache()
                 self.app = self._build_state_graph()
                 app_logger.info("模型已更新，状态图已重新构建")
             
@@ -374,6 +850,8 @@ class ChatService:
             
             if result["success"]:
                 # 重新构建状态图以使用新模型
+                self._invalidate_tool_binding()
+                self._clear_response_cache()
                 self.app = self._build_state_graph()
                 app_logger.info("从环境变量重新加载模型成功，状态图已重新构建")
             
@@ -393,6 +871,8 @@ class ChatService:
             
             if result["success"]:
                 # 重新构建状态图以使用新插件
+                self._invalidate_tool_binding()
+                self._clear_response_cache()
                 self.app = self._build_state_graph()
                 app_logger.info("插件已重新加载，状态图已重新构建")
             
@@ -413,23 +893,18 @@ class ChatService:
             # 获取插件状态
             plugin_status = plugin_manager.get_plugin_status()
             
-            # 获取会话统计
-            session_count = len(self.sessions)
-            user_sessions = {}
-            for session_id, session in self.sessions.items():
-                user_id = session["user_id"]
-                if user_id not in user_sessions:
-                    user_sessions[user_id] = 0
-                user_sessions[user_id] += 1
+            # 获取增量维护的会话统计
+            session_stats = self.sessions.get_stats()
             
             return {
                 "model": model_status,
                 "plugins": plugin_status,
                 "sessions": {
-                    "total_sessions": session_count,
-                    "unique_users": len(user_sessions),
-                    "sessions_per_user": user_sessions
+                    "total_sessions": session_stats["total_sessions"],
+                    "unique_users": session_stats["unique_users"]
                 },
+                "response_cache": self.response_cache.get_stats() if self.response_cache else {"enabled": False},
+                "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else {"enabled": False},
                 "status": "healthy"
             }
         except Exception as e:
@@ -0,0 +1,171 @@
+"""
+中文相对日期解析
+
+通过日历运算把"昨天"、"上周三"、"3天前"、"11月5号"等时间表达转换为具体日期，
+无需调用模型。无法识别的表达返回None，由调用方决定是否交给模型推断。
+"""
+
+import calendar
+import re
+from datetime import date, timedelta
+from typing import Optional, Tuple
+
+
+_DIGITS = {"零": 0, "〇": 0, "一": 1, "二": 2, "两": 2, "三": 3, "四": 4, "五": 5, "六": 6, "七": 7, "八": 8, "九": 9}
+_WEEKDAYS = {"一": 0, "二": 1, "三": 2, "四": 3, "五": 4, "六": 5, "日": 6, "天": 6, "末": 5,
+             "1": 0, "2": 1, "3": 2, "4": 3, "5": 4, "6": 5, "7": 6}
+_DAY_OFFSETS = {
+    "大前天": -3, "前天": -2, "昨天": -1, "昨日": -1, "今天": 0, "今日": 0,
+    "明天": 1, "明日": 1, "后天": 2, "大后天": 3,
+}
+_WEEK_OFFSETS = {"上上": -2, "上": -1, "本": 0, "这": 0, "这个": 0, "下": 1, "下下": 2}
+_MONTH_OFFSETS = {"上上个": -2, "上个": -1, "上": -1, "本": 0, "这个": 0, "下个": 1, "下": 1, "下下个": 2}
+_YEAR_OFFSETS = {"前年": -2, "去年": -1, "今年": 0, "明年": 1}
+
+_NUMBER = r"[0-9]{1,3}|[零〇一二两三四五六七八九十]{1,3}"
+# 单独的"N号"前面不能紧跟字母数字（如"ORD202311001号订单"），后面不能是楼、线等表示编号的字
+_DAY_ONLY_BEFORE = r"(?<![0-9A-Za-z])"
+_DAY_ONLY_AFTER = r"(?![楼线房院栋室座门床厅馆窗口柜台车])"
+
+# 无法通过日历运算确定的模糊表达，需要结合上下文交给模型推断
+VAGUE_TIME_EXPRESSION = re.compile(r"前几天|这几天|过几天|最近几天|月初|月中|月底|月末|年初|年底|年末")
+
+# 所有支持的表达合并为一个正则，按从具体到宽泛的顺序匹配；实体抽取器会把它嵌入更大的正则中
+DATE_PATTERN = (
+    r"(?P<iso>(?P<iso_year>\d{4})[-/.](?P<iso_month>\d{1,2})[-/.](?P<iso_day>\d{1,2}))"
+    r"|(?P<cn>(?:(?P<cn_year>\d{4})年|(?P<cn_rel_year>前年|去年|今年|明年))?"
+    rf"(?P<cn_month>{_NUMBER})月(?P<cn_day>{_NUMBER})[日号])"
+    r"|(?P<month_day>(?P<md_offset>上上个|上个|上|本|这个|下下个|下个|下)月"
+    rf"(?P<md_day>{_NUMBER})[日号])"
+    r"|(?P<week>(?P<week_offset>上上|上|本|这个|这|下下|下)?(?:周|星期|礼拜)(?P<weekday>[一二三四五六日天末1-7]))"
+    r"|(?P<relative>(?P<rel_count>" + _NUMBER + r"|半)"
+    r"(?P<rel_unit>天|日|周|个星期|星期|个礼拜|礼拜|个月|年)(?P<rel_dir>前|之前|以前|后|之后|以后))"
+    r"|(?P<day>大前天|前天|昨天|昨日|今天|今日|明天|明日|后天|大后天)"
+    r"|(?P<bare_week>(?P<bare_week_offset>上上|上|本|这|下下|下)周)"
+    r"|(?P<bare_month>(?P<bare_month_offset>上上个|上个|上|本|这个|下下个|下个|下)月)"
+    rf"|{_DAY_ONLY_BEFORE}(?P<day_only>(?P<day_only_day>{_NUMBER})[号]){_DAY_ONLY_AFTER}"
+)
+_DATE_EXPRESSION = re.compile(DATE_PATTERN)
+
+
+def parse_chinese_number(text: str) -> int:
+    """解析阿拉伯数字或一百以内的中文数字，如"3"、"十五"、"二十一"、"两" """
+    if text.isdigit():
+        return int(text)
+    if "十" in text:
+        tens, _, ones = text.partition("十")
+        return (_DIGITS[tens] if tens else 1) * 10 + (_DIGITS[ones] if ones else 0)
+    value = 0
+    for char in text:
+        value = value * 10 + _DIGITS[char]
+    return value
+
+
+def _add_months(base: date, months: int) -> date:
+    """按月偏移日期，目标月份没有对应日期时取该月最后一天"""
+    month_index = base.year * 12 + base.month - 1 + months
+    year, month = divmod(month_index, 12)
+    month += 1
+    return date(year, month, min(base.day, calendar.monthrange(year, month)[1]))
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def resolve_date_match(match: re.Match, today: date) -> Optional[date]:
+    """将包含 DATE_PATTERN 分组的匹配结果解析为日期"""
+    groups = match.groupdict()
+
+    if groups["iso"]:
+        return _safe_date(int(groups["iso_year"]), int(groups["iso_month"]), int(groups["iso_day"]))
+
+    if groups["cn"]:
+        year = today.year
+        if groups["cn_year"]:
+            year = int(groups["cn_year"])
+        elif groups["cn_rel_year"]:
+            year += _YEAR_OFFSETS[groups["cn_rel_year"]]
+        return _safe_date(year, parse_chinese_number(groups["cn_month"]), parse_chinese_number(groups["cn_day"]))
+
+    if groups["month_day"]:
+        month_start = _add_months(today.replace(day=1), _MONTH_OFFSETS[groups["md_offset"]])
+        return _safe_date(month_start.year, month_start.month, parse_chinese_number(groups["md_day"]))
+
+    if groups["week"]:
+        week_offset = _WEEK_OFFSETS[groups["week_offset"]] if groups["week_offset"] else 0
+        monday = today - timedelta(days=today.weekday())
+        return monday + timedelta(weeks=week_offset, days=_WEEKDAYS[groups["weekday"]])
+
+    if groups["relative"]:
+        count_text = groups["rel_count"]
+        unit = groups["rel_unit"]
+        sign = -1 if groups["rel_dir"] in ("前", "之前", "以前") else 1
+        if count_text == "半":
+            # 半个月、半年按天数近似
+            if unit == "个月":
+                return today + timedelta(days=sign * 15)
+            if unit == "年":
+                return _add_months(today, sign * 6)
+            return None
+        count = parse_chinese_number(count_text)
+        if unit in ("天", "日"):
+            return today + timedelta(days=sign * count)
+        if unit == "个月":
+            return _add_months(today, sign * count)
+        if unit == "年":
+            return _add_months(today, sign * count * 12)
+        return today + timedelta(weeks=sign * count)
+
+    if groups["day"]:
+        return today + timedelta(days=_DAY_OFFSETS[groups["day"]])
+
+    if groups["bare_week"]:
+        return today + timedelta(weeks=_WEEK_OFFSETS[groups["bare_week_offset"]])
+
+    if groups["bare_month"]:
+        return _add_months(today, _MONTH_OFFSETS[groups["bare_month_offset"]])
+
+    if groups["day_only"]:
+        return _safe_date(today.year, today.month, parse_chinese_number(groups["day_only_day"]))
+
+    return None
+
+
+def find_date_expression(text: str, today: Optional[date] = None) -> Optional[Tuple[str, date]]:
+    """
+    在文本中查找第一个可解析的时间表达
+
+    Args:
+        text: 用户输入
+        today: 参照日期，默认为当天
+
+    Returns:
+        (时间表达, 日期)，没有找到时返回None
+    """
+    today = today or date.today()
+    for match in _DATE_EXPRESSION.finditer(text):
+        resolved = resolve_date_match(match, today)
+        if resolved is not None:
+            return match.group(0), resolved
+    return None
+
+
+def resolve_date(expression: str, today: Optional[date] = None) -> Optional[date]:
+    """
+    将完整的时间表达解析为具体日期
+
+    Args:
+        expression: 时间表达，如"昨天"、"上周三"、"3天前"、"2023-11-05"
+        today: 参照日期，默认为当天
+
+    Returns:
+        解析出的日期，无法解析时返回None
+    """
+    match = _DATE_EXPRESSION.fullmatch(expression.strip())
+    if match is None:
+        return None
+    return resolve_date_match(match, today or date.today())
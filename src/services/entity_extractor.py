@@ -0,0 +1,132 @@
+"""
+用户消息实体抽取
+
+用一个合并的正则单遍扫描用户消息，抽取订单号、退款单号、发票号、快递单号和中文日期，
+结果写入状态图的 entities 字段。模型调用工具时若漏填或填错单号，
+可直接用抽取到的实体补全参数，省去模型向用户追问再重新调用工具的一轮往返。
+"""
+
+import inspect
+import re
+from datetime import date
+from typing import Any, Callable, Dict, List, Optional
+
+from src.services.date_resolver import DATE_PATTERN, resolve_date_match
+
+
+# 各类单号的格式
+ORDER_ID_PATTERN = r"ORD\d{9}"
+REFUND_ID_PATTERN = r"REF\d{8}[0-9A-F]{8}"
+INVOICE_ID_PATTERN = r"INV\d{12,}"
+TRACKING_NUMBER_PATTERN = r"(?:SF|YT|ZTO|STO|YD|JD|JT|EMS|DBL)\d{10,15}"
+
+# 单号前后不能紧跟字母数字（中文字符可以），避免截取更长串的一部分
+ID_BOUNDARY_BEFORE = r"(?<![0-9A-Za-z])"
+ID_BOUNDARY_AFTER = r"(?![0-9A-Za-z])"
+# 前缀正确但格式不对的单号，如少了一位数字的订单号
+MALFORMED_ID_PATTERN = r"(?P<malformed_prefix>ORD|REF|INV)[0-9A-Z]*\d[0-9A-Z]*"
+
+_ENTITY_PATTERN = re.compile(
+    ID_BOUNDARY_BEFORE
+    + r"(?:"
+    + rf"(?P<order_id>{ORDER_ID_PATTERN})"
+    + rf"|(?P<refund_id>{REFUND_ID_PATTERN})"
+    + rf"|(?P<invoice_id>{INVOICE_ID_PATTERN})"
+    + rf"|(?P<tracking_number>{TRACKING_NUMBER_PATTERN})"
+    + rf"|(?P<malformed_id>{MALFORMED_ID_PATTERN})"
+    + r")"
+    + ID_BOUNDARY_AFTER
+    + rf"|(?P<date>{DATE_PATTERN})",
+    re.IGNORECASE
+)
+
+# 单号类型 -> 实体列表字段
+_ID_FIELDS = {
+    "order_id": "order_ids",
+    "refund_id": "refund_ids",
+    "invoice_id": "invoice_ids",
+    "tracking_number": "tracking_numbers",
+}
+_MALFORMED_TYPES = {"ORD": "order_id", "REF": "refund_id", "INV": "invoice_id"}
+
+# 工具参数名 -> (实体列表字段, 合法格式)，用于补全模型漏填或填错的参数
+ARGUMENT_ENTITIES = {
+    "order_id": ("order_ids", re.compile(ORDER_ID_PATTERN)),
+    "refund_id": ("refund_ids", re.compile(REFUND_ID_PATTERN)),
+    "invoice_id": ("invoice_ids", re.compile(INVOICE_ID_PATTERN)),
+    "tracking_number": ("tracking_numbers", re.compile(TRACKING_NUMBER_PATTERN)),
+}
+
+
+def extract_entities(text: str, today: Optional[date] = None) -> Dict[str, List[Any]]:
+    """
+    抽取消息中的实体
+
+    Args:
+        text: 用户消息
+        today: 解析相对日期的参照日期，默认为当天
+
+    Returns:
+        实体字典，包含 order_ids、refund_ids、invoice_ids、tracking_numbers（去重后按出现顺序），
+        dates（[{"text", "date"}]）和 malformed_ids（[{"type", "text"}]）
+    """
+    today = today or date.today()
+    entities: Dict[str, List[Any]] = {field: [] for field in _ID_FIELDS.values()}
+    entities["dates"] = []
+    entities["malformed_ids"] = []
+
+    for match in _ENTITY_PATTERN.finditer(text):
+        if match.group("date"):
+            resolved = resolve_date_match(match, today)
+            if resolved is not None:
+                entities["dates"].append({"text": match.group(0), "date": resolved.isoformat()})
+            continue
+
+        value = match.group(0).upper()
+        kind = next((kind for kind in _ID_FIELDS if match.group(kind)), None)
+        if kind is None:
+            entities["malformed_ids"].append({
+                "type": _MALFORMED_TYPES[match.group("malformed_prefix").upper()],
+                "text": value
+            })
+        elif value not in entities[_ID_FIELDS[kind]]:
+            entities[_ID_FIELDS[kind]].append(value)
+
+    return entities
+
+
+def prefill_tool_args(tool_function: Callable, args: Dict[str, Any], entities: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    用抽取到的实体补全工具参数
+
+    工具需要单号参数但模型没有填写或填写的格式不正确，而用户消息中恰好只有一个该类单号时，
+    使用该单号；接收单号列表的参数（如 order_ids）缺失时填入全部单号。模型填写的合法单号保持不变。
+
+    Returns:
+        补全后的参数（新字典），无需补全时原样返回
+    """
+    if not entities:
+        return args
+    try:
+        parameters = inspect.signature(tool_function).parameters
+    except (TypeError, ValueError):
+        return args
+
+    filled = None
+    for name, (field, pattern) in ARGUMENT_ENTITIES.items():
+        candidates = entities.get(field) or []
+        if not candidates:
+            continue
+
+        if name in parameters:
+            value = args.get(name)
+            if isinstance(value, str) and pattern.fullmatch(value.strip().upper()):
+                continue
+            if len(candidates) == 1:
+                filled = filled or dict(args)
+                filled[name] = candidates[0]
+        elif field in parameters and not args.get(field):
+            filled = filled or dict(args)
+            filled[field] = list(candidates)
+
+    return filled if filled is not None else args
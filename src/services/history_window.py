@@ -0,0 +1,191 @@
+"""
+对话历史窗口
+
+按token预算组装每一轮发送给模型的消息：最近的对话轮次原样保留，超出预算的较早轮次
+折叠为摘要。摘要在后台线程中增量刷新，不占用当前请求的响应时间。
+"""
+
+import json
+import math
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from src.utils.logger import app_logger
+
+
+# 摘要函数：(已有摘要, 需要折叠的消息) -> 新摘要
+Summarizer = Callable[[str, Sequence[BaseMessage]], str]
+
+
+def _is_cjk(char: str) -> bool:
+    code = ord(char)
+    return (
+        0x4E00 <= code <= 0x9FFF or   # 中日韩统一表意文字
+        0x3400 <= code <= 0x4DBF or   # 扩展A
+        0x3000 <= code <= 0x303F or   # 中文标点
+        0xFF00 <= code <= 0xFFEF      # 全角字符
+    )
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    估算文本的token数
+
+    不依赖分词器：中文字符按每字1个token计算，其余字符按每4个字符1个token计算，
+    与OpenAI分词器在中英文混合文本上的结果接近，且偏保守。
+    """
+    if not text:
+        return 0
+    cjk = sum(1 for char in text if _is_cjk(char))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def estimate_message_tokens(message: BaseMessage) -> int:
+    """估算单条消息的token数（包含工具调用参数和每条消息的固定开销）"""
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+    tokens = 4 + estimate_tokens(content)
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        tokens += estimate_tokens(json.dumps(tool_calls, ensure_ascii=False))
+    return tokens
+
+
+class HistoryWindow:
+    """
+    按token预算裁剪会话历史
+
+    历史按对话轮次（以用户消息开头，包含随后的AI消息和工具消息）切分，
+    裁剪只发生在轮次边界，工具调用与工具结果不会被拆开。
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 3000,
+        summarizer: Optional[Summarizer] = None,
+        capacity: int = 1024
+    ):
+        """
+        初始化历史窗口
+
+        Args:
+            max_tokens: 每轮发送给模型的历史消息token上限（包含摘要）
+            summarizer: 摘要函数，未提供时超出预算的历史直接丢弃
+            capacity: 内存中保留摘要的会话数量
+        """
+        self.max_tokens = max_tokens
+        self.summarizer = summarizer
+        self.capacity = capacity
+        # 会话ID -> (摘要, 摘要覆盖到的消息下标)
+        self._summaries: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        # 会话ID -> 正在执行的摘要任务
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summary")
+
+    def _split_turns(self, messages: Sequence[BaseMessage]) -> List[int]:
+        """返回每个对话轮次的起始下标"""
+        starts = [index for index, message in enumerate(messages) if isinstance(message, HumanMessage)]
+        if not starts or starts[0] != 0:
+            starts.insert(0, 0)
+        return starts
+
+    def _get_summary(self, session_id: str) -> Tuple[str, int]:
+        with self._lock:
+            summary = self._summaries.get(session_id)
+            if summary is None:
+                return "", 0
+            self._summaries.move_to_end(session_id)
+            return summary
+
+    def _set_summary(self, session_id: str, summary: str, upto: int) -> None:
+        with self._lock:
+            self._summaries[session_id] = (summary, upto)
+            self._summaries.move_to_end(session_id)
+            while len(self._summaries) > self.capacity:
+                self._summaries.popitem(last=False)
+
+    def build_prompt(self, session_id: str, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """
+        组装发送给模型的消息
+
+        Args:
+            session_id: 会话ID
+            messages: 会话的完整消息历史
+
+        Returns:
+            预算内的消息列表；有较早历史被折叠时，开头为包含摘要的系统消息
+        """
+        summary, summarized_upto = self._get_summary(session_id)
+        summary_message = SystemMessage(content=f"以下是之前对话的摘要：\n{summary}") if summary else None
+        budget = self.max_tokens - (estimate_message_tokens(summary_message) if summary_message else 0)
+
+        # 从最新一轮开始向前保留完整轮次，当前轮次无论多长都保留
+        turn_starts = self._split_turns(messages)
+        cut = turn_starts[-1]
+        used = sum(estimate_message_tokens(message) for message in messages[cut:])
+        for start, end in zip(reversed(turn_starts[:-1]), reversed(turn_starts[1:])):
+            turn_tokens = sum(estimate_message_tokens(message) for message in messages[start:end])
+            if used + turn_tokens > budget:
+                break
+            used += turn_tokens
+            cut = start
+
+        if cut > summarized_upto:
+            self._schedule_refresh(session_id, summary, messages[summarized_upto:cut], cut)
+
+        prompt = list(messages[cut:])
+        if summary_message is not None and cut > 0:
+            prompt.insert(0, summary_message)
+        return prompt
+
+    def _schedule_refresh(
+        self,
+        session_id: str,
+        summary: str,
+        messages: Sequence[BaseMessage],
+        upto: int
+    ) -> None:
+        """在后台把被裁剪的消息合并进摘要，同一会话同时只有一个摘要任务"""
+        if self.summarizer is None:
+            return
+
+        with self._lock:
+            if session_id in self._pending:
+                return
+            self._pending[session_id] = self._executor.submit(
+                self._refresh_summary, self.summarizer, session_id, summary, list(messages), upto
+            )
+
+    def _refresh_summary(
+        self,
+        summarizer: Summarizer,
+        session_id: str,
+        summary: str,
+        messages: List[BaseMessage],
+        upto: int
+    ) -> None:
+        try:
+            new_summary = summarizer(summary, messages)
+            self._set_summary(session_id, new_summary, upto)
+            app_logger.info(f"会话 {session_id} 的历史摘要已更新，覆盖前 {upto} 条消息")
+        except Exception as e:
+            # 摘要失败时保留旧摘要，下一轮对话会再次尝试
+            app_logger.error(f"生成会话 {session_id} 的历史摘要时出错: {str(e)}")
+        finally:
+            with self._lock:
+                self._pending.pop(session_id, None)
+
+    def forget(self, session_id: str) -> None:
+        """删除会话的摘要"""
+        with self._lock:
+            self._summaries.pop(session_id, None)
+
+    def wait_for_pending(self, timeout: Optional[float] = None) -> None:
+        """等待正在执行的摘要任务完成"""
+        with self._lock:
+            pending = list(self._pending.values())
+        wait(pending, timeout=timeout)
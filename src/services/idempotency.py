@@ -0,0 +1,121 @@
+"""
+幂等提交
+
+模型在同一步中重复发出相同的工具调用，或客户端因超时重试 /chat 时，有副作用的工具
+（如提交退款申请）会被执行多次。本模块提供：
+- 对话轮次上下文：聊天服务执行工具前设置当前轮次的标识（会话ID + 用户消息），
+  工具据此生成幂等键，无需把幂等键暴露为模型可见的参数
+- 有界的去重窗口：窗口期内相同幂等键的提交直接返回第一次提交的结果；
+  第一次提交尚未完成时，重复的提交等待并共享其结果
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, Optional, Tuple
+
+
+_current_turn: ContextVar[Optional[str]] = ContextVar("conversation_turn", default=None)
+
+
+@contextmanager
+def conversation_turn(turn_id: Optional[str]) -> Iterator[None]:
+    """在上下文中设置当前对话轮次，异步任务和 asyncio.to_thread 会继承该值"""
+    token = _current_turn.set(turn_id)
+    try:
+        yield
+    finally:
+        _current_turn.reset(token)
+
+
+def current_turn() -> Optional[str]:
+    """获取当前对话轮次，不在对话中调用时返回None"""
+    return _current_turn.get()
+
+
+def make_idempotency_key(*parts: Any) -> str:
+    """由业务字段生成幂等键"""
+    return hashlib.sha256("\x1f".join("" if part is None else str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class IdempotencyWindow:
+    """按幂等键去重的有界时间窗口"""
+
+    def __init__(self, window_seconds: float = 600, capacity: int = 10000):
+        """
+        初始化去重窗口
+
+        Args:
+            window_seconds: 幂等键的有效期（秒），超过后相同的提交视为新的提交
+            capacity: 最多记录的幂等键数量，超出时淘汰最早的记录
+        """
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        # 幂等键 -> (提交结果, 过期时间)，结果可能仍在进行中
+        self._entries: "OrderedDict[str, Tuple[Future, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _claim(self, key: str) -> Tuple[Future, bool]:
+        """登记幂等键，返回 (提交结果, 是否由调用方执行提交)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                return entry[0], False
+            future: Future = Future()
+            self._entries[key] = (future, now + self.window_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+            return future, True
+
+    def _fail(self, key: str, future: Future, error: BaseException) -> None:
+        """提交失败时移除幂等键，允许重试"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is future:
+                del self._entries[key]
+        future.set_exception(error)
+
+    def run(self, key: str, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        以幂等方式执行提交
+
+        Args:
+            key: 幂等键
+            func: 执行提交的函数
+
+        Returns:
+            (提交结果, 是否为重复提交)；重复提交时返回第一次提交的结果，不再调用 func
+        """
+        future, owner = self._claim(key)
+        if not owner:
+            return future.result(), True
+        try:
+            result = func()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        future.set_result(result)
+        return result, False
+
+    async def arun(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """以幂等方式执行异步提交，等待重复提交的结果时不阻塞事件循环，参数和返回值同 run"""
+        future, owner = self._claim(key)
+        if not owner:
+            return await asyncio.wrap_future(future), True
+        try:
+            result = await func()
+        except BaseException as e:
+            self._fail(key, future, e)
+            raise
+        future.set_result(result)
+        return result, False
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,204 @@
+"""
+快速意图路由
+
+在进入状态图之前识别意图明确的简单查询（如"查询订单ORD202311003"），直接调用对应工具
+并用工具自带的格式化方法生成回复，省去"模型决定调用工具 + 模型组织回答"两次LLM往返。
+无法确定意图时返回None，由状态图按原流程处理。
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from src.services.entity_extractor import (
+    ID_BOUNDARY_AFTER,
+    ID_BOUNDARY_BEFORE,
+    INVOICE_ID_PATTERN,
+    MALFORMED_ID_PATTERN,
+    ORDER_ID_PATTERN,
+    REFUND_ID_PATTERN,
+)
+from src.services.plugin_manager import plugin_manager
+from src.utils.logger import app_logger
+
+
+# 单号前后不能紧跟字母数字，否则"ORD2023110031"会被截成另一个客户的订单号；
+# 前缀正确但格式不对的单号也参与匹配，出现时交给模型处理
+_ID_PATTERN = re.compile(
+    ID_BOUNDARY_BEFORE
+    + f"(?:(?P<order>{ORDER_ID_PATTERN})|(?P<refund>{REFUND_ID_PATTERN})|(?P<invoice>{INVOICE_ID_PATTERN})"
+    + f"|(?P<malformed>{MALFORMED_ID_PATTERN}))"
+    + ID_BOUNDARY_AFTER,
+    re.IGNORECASE
+)
+# 表示查询意图的关键词
+_QUERY_KEYWORDS = re.compile(r"查|状态|进度|到哪|物流|快递|情况|怎么样|如何了|多久")
+# 可以忽略的标点和空白，去除单号后只剩这些字符时视为单纯的查询
+_FILLER = re.compile(r"[\s,，.。?？!！:：、~～]+")
+
+
+@dataclass(frozen=True)
+class FastPathRoute:
+    """一条快速路由规则"""
+    intent: str
+    # 对应的工具名称（用于流式进度提示）
+    tool_name: str
+    # 出现这些关键词说明用户想做的不只是查询，交给模型处理
+    blocked_keywords: re.Pattern
+    # 执行查询并生成回复
+    handler: Callable[[str], Optional[str]]
+    # 异步版本，等待后端期间不占用线程；为空时在线程中执行同步版本
+    async_handler: Optional[Callable[[str], Awaitable[Optional[str]]]] = None
+
+
+@dataclass(frozen=True)
+class FastPathMatch:
+    """快速路由的匹配结果"""
+    route: FastPathRoute
+    entity_id: str
+
+    @property
+    def intent(self) -> str:
+        return self.route.intent
+
+    @property
+    def tool_name(self) -> str:
+        return self.route.tool_name
+
+
+def _get_plugin_attribute(plugin_name: str, attribute: str) -> Any:
+    """从当前加载的插件模块中获取对象，支持插件热更新和卸载"""
+    module = plugin_manager.plugin_modules.get(plugin_name)
+    return getattr(module, attribute, None) if module is not None else None
+
+
+def _reply_order_status(order_id: str) -> Optional[str]:
+    order_query_tool = _get_plugin_attribute("order_query", "order_query_tool")
+    if order_query_tool is None:
+        return None
+    result = order_query_tool.query_order(order_id)
+    if not result["success"]:
+        return str(result["error"])
+    return str(order_query_tool.get_order_status_description(result["order_info"]))
+
+
+async def _areply_order_status(order_id: str) -> Optional[str]:
+    query_order = _get_plugin_attribute("order_query", "query_order")
+    if query_order is None:
+        return None
+    return str(await query_order(order_id))
+
+
+def _reply_refund_status(refund_id: str) -> Optional[str]:
+    refund_request_tool = _get_plugin_attribute("refund_request", "refund_request_tool")
+    if refund_request_tool is None:
+        return None
+    result = refund_request_tool.query_refund_status(refund_id)
+    if not result["success"]:
+        return str(result["error"])
+    return str(refund_request_tool.get_refund_status_description(result["refund_info"]))
+
+
+async def _areply_refund_status(refund_id: str) -> Optional[str]:
+    query_refund_status = _get_plugin_attribute("refund_request", "query_refund_status")
+    if query_refund_status is None:
+        return None
+    return str(await query_refund_status(refund_id))
+
+
+def _reply_invoice_status(invoice_id: str) -> Optional[str]:
+    query_invoice_status = _get_plugin_attribute("invoice_tool", "query_invoice_status")
+    if query_invoice_status is None:
+        return None
+    return str(query_invoice_status(invoice_id))
+
+
+ROUTES: Dict[str, FastPathRoute] = {
+    "order": FastPathRoute(
+        intent="order_status",
+        tool_name="query_order",
+        blocked_keywords=re.compile(r"退|取消|发票|开票|修改|改地址|投诉|换货|催|赔"),
+        handler=_reply_order_status,
+        async_handler=_areply_order_status
+    ),
+    "refund": FastPathRoute(
+        intent="refund_status",
+        tool_name="query_refund_status",
+        blocked_keywords=re.compile(r"取消|撤销|撤回|修改|投诉|重新|加急|催"),
+        handler=_reply_refund_status,
+        async_handler=_areply_refund_status
+    ),
+    "invoice": FastPathRoute(
+        intent="invoice_status",
+        tool_name="query_invoice_status",
+        blocked_keywords=re.compile(r"开|更新|修改|改为|作废|取消|红冲|详情|明细|寄|发送"),
+        handler=_reply_invoice_status
+    ),
+}
+
+
+class FastPathRouter:
+    """基于规则的快速意图路由"""
+
+    def __init__(self, max_message_length: int = 40):
+        """
+        初始化路由
+
+        Args:
+            max_message_length: 超过该长度的消息通常包含多个诉求，不走快速路由
+        """
+        self.max_message_length = max_message_length
+
+    def match(self, message: str) -> Optional[FastPathMatch]:
+        """
+        识别意图明确的查询
+
+        只有消息中恰好包含一个单号、没有出现其他诉求的关键词，且消息表达了查询意图
+        （或只包含单号本身）时才匹配，其余情况返回None。
+        """
+        if not message or len(message) > self.max_message_length:
+            return None
+
+        matches = list(_ID_PATTERN.finditer(message))
+        if len(matches) != 1:
+            return None
+
+        id_match = matches[0]
+        route = ROUTES.get(id_match.lastgroup or "")
+        if route is None:
+            return None
+        remainder = message[:id_match.start()] + message[id_match.end():]
+        if route.blocked_keywords.search(remainder):
+            return None
+        if not _QUERY_KEYWORDS.search(remainder) and _FILLER.sub("", remainder) not in ("", "订单", "退款", "发票"):
+            return None
+
+        return FastPathMatch(route=route, entity_id=id_match.group(0).upper())
+
+    def execute(self, match: FastPathMatch) -> Optional[str]:
+        """执行查询并生成回复，工具不可用或出错时返回None"""
+        try:
+            reply = match.route.handler(match.entity_id)
+        except Exception as e:
+            app_logger.error(f"快速路由执行 {match.intent} 时出错: {str(e)}")
+            return None
+        return self._log_reply(match, reply)
+
+    async def aexecute(self, match: FastPathMatch) -> Optional[str]:
+        """异步执行查询并生成回复，工具不可用或出错时返回None"""
+        try:
+            if match.route.async_handler is not None:
+                reply = await match.route.async_handler(match.entity_id)
+            else:
+                reply = await asyncio.to_thread(match.route.handler, match.entity_id)
+        except Exception as e:
+            app_logger.error(f"快速路由执行 {match.intent} 时出错: {str(e)}")
+            return None
+        return self._log_reply(match, reply)
+
+    @staticmethod
+    def _log_reply(match: FastPathMatch, reply: Optional[str]) -> Optional[str]:
+        if reply is not None:
+            app_logger.info(f"快速路由命中: {match.intent}, 单号: {match.entity_id}")
+        return reply
@@ -0,0 +1,411 @@
+"""
+发票存储
+
+发票在内存中以紧凑的记录保存，只在工具边界（返回给调用方时）转换为字典：
+- 记录使用 __slots__ 且不可变，更新时替换为新记录，读取方在锁外使用记录是安全的
+- 金额使用整数分，避免浮点误差和热路径上的 round
+- 开票日期保存为日序数，创建/更新时间保存为Unix时间戳；到期日由开票日期推算，不单独保存
+- 状态保存为整数编码，客户名称、税号和商品名称经过 intern，相同的字符串只保存一份
+
+发票按发票ID分散到多个分片中，每个分片有独立的锁和索引（状态、客户名称n-gram、开票日期），
+并随写入增量维护按客户、状态、开票月份的汇总（张数和金额），汇总查询无需遍历发票。
+
+批量开票时全部商品的金额在一次向量化计算中完成（需要 numpy，未安装时退回逐条计算，结果相同）。
+"""
+
+import bisect
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+np: Optional[ModuleType]
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖：uv sync --extra bulk
+    np = None
+
+
+# 发票状态，记录中保存其下标
+STATUSES = ("issued", "sent", "paid", "overdue", "cancelled")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+STATUS_DESCRIPTIONS = {
+    "issued": "已开具",
+    "sent": "已发送",
+    "paid": "已支付",
+    "overdue": "已逾期",
+    "cancelled": "已取消"
+}
+
+# 税率（基点），13%
+TAX_RATE_BASIS_POINTS = 1300
+# 付款期限（天）
+PAYMENT_TERM_DAYS = 30
+
+# 索引键：(开票日序数, 发票ID)，按键排序即按开票日期排序
+InvoiceKey = Tuple[int, str]
+
+
+def to_cents(amount: float) -> int:
+    """元转换为分"""
+    return int(round(amount * 100))
+
+
+def to_yuan(cents: int) -> float:
+    """分转换为元"""
+    return cents / 100
+
+
+def tax_cents(subtotal_cents: int) -> int:
+    """按税率计算税额（分），四舍五入"""
+    return (subtotal_cents * TAX_RATE_BASIS_POINTS + 5000) // 10000
+
+
+def first_invalid_item(quantities: Sequence[float], unit_prices: Sequence[float]) -> int:
+    """
+    返回第一项数量或单价不大于0的商品的下标，全部有效时返回-1
+
+    Raises:
+        TypeError, ValueError: 数量或单价不是数字
+    """
+    if np is not None:
+        valid = (np.asarray(quantities, dtype=np.float64) > 0) & (np.asarray(unit_prices, dtype=np.float64) > 0)
+        invalid = np.flatnonzero(~valid)
+        return int(invalid[0]) if invalid.size else -1
+    for position, (quantity, unit_price) in enumerate(zip(quantities, unit_prices)):
+        if not (quantity > 0 and unit_price > 0):
+            return position
+    return -1
+
+
+def price_items(
+    quantities: Sequence[float],
+    unit_prices: Sequence[float],
+    item_counts: Sequence[int]
+) -> Tuple[List[int], List[int], List[int], List[int]]:
+    """
+    批量计算金额，舍入方式与逐张开票相同
+
+    Args:
+        quantities: 全部发票的商品数量，按发票顺序依次排列
+        unit_prices: 对应的单价（元）
+        item_counts: 每张发票的商品数量（均大于0）
+
+    Returns:
+        (每项商品的单价, 每项商品的金额, 每张发票的小计, 每张发票的税额)，单位均为分
+    """
+    if np is None:
+        unit_price_cents = [to_cents(unit_price) for unit_price in unit_prices]
+        item_cents = [int(round(quantity * cents)) for quantity, cents in zip(quantities, unit_price_cents)]
+        subtotals = []
+        start = 0
+        for count in item_counts:
+            subtotals.append(sum(item_cents[start:start + count]))
+            start += count
+        return unit_price_cents, item_cents, subtotals, [tax_cents(subtotal) for subtotal in subtotals]
+
+    # np.rint 与 round 同为四舍六入五成双，与 to_cents 的结果一致
+    unit_price_array = np.rint(np.asarray(unit_prices, dtype=np.float64) * 100)
+    item_array = np.rint(np.asarray(quantities, dtype=np.float64) * unit_price_array).astype(np.int64)
+    offsets = np.zeros(len(item_counts), dtype=np.int64)
+    np.cumsum(item_counts[:-1], out=offsets[1:])
+    subtotal_array = np.add.reduceat(item_array, offsets)
+    tax_array = (subtotal_array * TAX_RATE_BASIS_POINTS + 5000) // 10000
+    return (
+        unit_price_array.astype(np.int64).tolist(),
+        item_array.tolist(),
+        subtotal_array.tolist(),
+        tax_array.tolist()
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceItem:
+    """发票中的一项商品"""
+    name: str
+    quantity: float
+    unit_price_cents: int
+    total_cents: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "quantity": self.quantity,
+            "unit_price": to_yuan(self.unit_price_cents),
+            "total": to_yuan(self.total_cents)
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class InvoiceRecord:
+    """发票记录"""
+    invoice_id: str
+    customer_name: str
+    customer_tax_id: str
+    items: Tuple[InvoiceItem, ...]
+    issue_day: int
+    subtotal_cents: int
+    tax_cents: int
+    status_code: int
+    # 版本号，每次更新加1，用于乐观并发控制
+    version: int
+    created_at: float
+    updated_at: float
+
+    @classmethod
+    def create(
+        cls,
+        invoice_id: str,
+        customer_name: str,
+        customer_tax_id: str,
+        items: List[Dict[str, Any]],
+        issue_date: date,
+        now: float
+    ) -> "InvoiceRecord":
+        """由已校验的商品列表（单价以元为单位）创建发票记录"""
+        invoice_items = []
+        for item in items:
+            unit_price_cents = to_cents(item["unit_price"])
+            invoice_items.append(InvoiceItem(
+                name=sys.intern(str(item["name"])),
+                quantity=item["quantity"],
+                unit_price_cents=unit_price_cents,
+                total_cents=int(round(item["quantity"] * unit_price_cents))
+            ))
+        subtotal_cents = sum(item.total_cents for item in invoice_items)
+        return cls(
+            invoice_id=invoice_id,
+            customer_name=sys.intern(customer_name),
+            customer_tax_id=sys.intern(customer_tax_id),
+            items=tuple(invoice_items),
+            issue_day=issue_date.toordinal(),
+            subtotal_cents=subtotal_cents,
+            tax_cents=tax_cents(subtotal_cents),
+            status_code=STATUS_CODES["issued"],
+            version=1,
+            created_at=now,
+            updated_at=now
+        )
+
+    @classmethod
+    def create_many(
+        cls,
+        invoice_ids: Sequence[str],
+        requests: Sequence[Dict[str, Any]],
+        issue_dates: Sequence[date],
+        now: float
+    ) -> List["InvoiceRecord"]:
+        """由已校验的开票请求批量创建发票记录，全部商品的金额一次算出"""
+        item_counts = [len(request["items"]) for request in requests]
+        all_items = [item for request in requests for item in request["items"]]
+        quantities = [item["quantity"] for item in all_items]
+        unit_price_cents, item_cents, subtotals, taxes = price_items(
+            quantities, [item["unit_price"] for item in all_items], item_counts
+        )
+        invoice_items = [
+            InvoiceItem(
+                name=sys.intern(str(item["name"])),
+                quantity=quantity,
+                unit_price_cents=unit_price,
+                total_cents=total
+            )
+            for item, quantity, unit_price, total in zip(all_items, quantities, unit_price_cents, item_cents)
+        ]
+
+        records = []
+        start = 0
+        for invoice_id, request, issue_date, count, subtotal, tax in zip(
+            invoice_ids, requests, issue_dates, item_counts, subtotals, taxes
+        ):
+            records.append(cls(
+                invoice_id=invoice_id,
+                customer_name=sys.intern(request["customer_name"]),
+                customer_tax_id=sys.intern(request["customer_tax_id"]),
+                items=tuple(invoice_items[start:start + count]),
+                issue_day=issue_date.toordinal(),
+                subtotal_cents=subtotal,
+                tax_cents=tax,
+                status_code=STATUS_CODES["issued"],
+                version=1,
+                created_at=now,
+                updated_at=now
+            ))
+            start += count
+        return records
+
+    @property
+    def key(self) -> InvoiceKey:
+        return self.issue_day, self.invoice_id
+
+    @property
+    def status(self) -> str:
+        return STATUSES[self.status_code]
+
+    @property
+    def issue_date(self) -> str:
+        return date.fromordinal(self.issue_day).isoformat()
+
+    @property
+    def due_date(self) -> str:
+        return (date.fromordinal(self.issue_day) + timedelta(days=PAYMENT_TERM_DAYS)).isoformat()
+
+    @property
+    def issue_month(self) -> str:
+        return self.issue_date[:7]
+
+    @property
+    def total_cents(self) -> int:
+        return self.subtotal_cents + self.tax_cents
+
+    def summary(self) -> Dict[str, Any]:
+        """列表中展示的发票摘要"""
+        return {
+            "invoice_id": self.invoice_id,
+            "customer_name": self.customer_name,
+            "issue_date": self.issue_date,
+            "due_date": self.due_date,
+            "total_with_tax": to_yuan(self.total_cents),
+            "status": self.status
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为完整的发票字典"""
+        return {
+            "invoice_id": self.invoice_id,
+            "customer_name": self.customer_name,
+            "customer_tax_id": self.customer_tax_id,
+            "items": [item.to_dict() for item in self.items],
+            "issue_date": self.issue_date,
+            "due_date": self.due_date,
+            "subtotal": to_yuan(self.subtotal_cents),
+            "tax_rate": TAX_RATE_BASIS_POINTS / 10000,
+            "tax_amount": to_yuan(self.tax_cents),
+            "total_with_tax": to_yuan(self.total_cents),
+            "status": self.status,
+            "version": self.version,
+            "created_at": datetime.fromtimestamp(self.created_at).isoformat(),
+            "updated_at": datetime.fromtimestamp(self.updated_at).isoformat()
+        }
+
+
+@dataclass(slots=True)
+class InvoiceTotals:
+    """发票汇总：张数和金额（分）"""
+    count: int = 0
+    subtotal_cents: int = 0
+    tax_cents: int = 0
+
+    def add(self, record: InvoiceRecord, sign: int = 1) -> None:
+        """计入（sign为-1时移出）一张发票"""
+        self.count += sign
+        self.subtotal_cents += sign * record.subtotal_cents
+        self.tax_cents += sign * record.tax_cents
+
+    def merge(self, other: Optional["InvoiceTotals"]) -> None:
+        if other is not None:
+            self.count += other.count
+            self.subtotal_cents += other.subtotal_cents
+            self.tax_cents += other.tax_cents
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "subtotal": to_yuan(self.subtotal_cents),
+            "tax_amount": to_yuan(self.tax_cents),
+            "total_with_tax": to_yuan(self.subtotal_cents + self.tax_cents)
+        }
+
+
+def name_grams(name: str) -> Set[str]:
+    """客户名称（casefold后）的单字和相邻双字，用于按名称子串查找"""
+    folded = name.casefold()
+    return set(folded) | {folded[i:i + 2] for i in range(len(folded) - 1)}
+
+
+def encode_cursor(key: InvoiceKey) -> str:
+    """分页游标：开票日期|发票ID"""
+    return f"{date.fromordinal(key[0]).isoformat()}|{key[1]}"
+
+
+def decode_cursor(cursor: str) -> InvoiceKey:
+    issue_date, separator, invoice_id = cursor.partition("|")
+    try:
+        if not separator or not invoice_id:
+            raise ValueError
+        return date.fromisoformat(issue_date).toordinal(), invoice_id
+    except ValueError:
+        raise ValueError(f"分页游标无效: {cursor}") from None
+
+
+class InvoiceShard:
+    """发票分片：分片内的发票及其索引，均由分片锁保护"""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.invoices: Dict[str, InvoiceRecord] = {}
+        # 以下索引都是按 (开票日序数, 发票ID) 排序的键列表，新发票的开票日期通常最晚，插入时多为追加
+        self.date_index: List[InvoiceKey] = []
+        # 状态编码 -> 该状态的发票
+        self.status_index: Dict[int, List[InvoiceKey]] = {}
+        # 客户名称的单字/双字 -> 名称包含该n-gram的发票
+        self.name_index: Dict[str, List[InvoiceKey]] = {}
+        # 汇总维度 -> 汇总键 -> 汇总；客户名称键为 casefold 后的全名，状态键为状态编码，月份键为 YYYY-MM
+        self.totals: Dict[str, Dict[Any, InvoiceTotals]] = {"customer": {}, "status": {}, "month": {}}
+
+    def add(self, record: InvoiceRecord) -> None:
+        """在持有锁时保存新发票、加入索引并计入汇总"""
+        key = record.key
+        self.invoices[record.invoice_id] = record
+        bisect.insort(self.date_index, key)
+        bisect.insort(self.status_index.setdefault(record.status_code, []), key)
+        for gram in name_grams(record.customer_name):
+            bisect.insort(self.name_index.setdefault(gram, []), key)
+        self.totals["customer"].setdefault(record.customer_name.casefold(), InvoiceTotals()).add(record)
+        self.totals["status"].setdefault(record.status_code, InvoiceTotals()).add(record)
+        self.totals["month"].setdefault(record.issue_month, InvoiceTotals()).add(record)
+
+    def replace(self, record: InvoiceRecord, old_status_code: int) -> None:
+        """在持有锁时用新记录替换发票，状态变化时移到新状态的索引和汇总中（金额不变）"""
+        self.invoices[record.invoice_id] = record
+        if record.status_code == old_status_code:
+            return
+        self.totals["status"][old_status_code].add(record, -1)
+        self.totals["status"].setdefault(record.status_code, InvoiceTotals()).add(record)
+        key = record.key
+        keys = self.status_index[old_status_code]
+        position = bisect.bisect_left(keys, key)
+        if position < len(keys) and keys[position] == key:
+            del keys[position]
+        bisect.insort(self.status_index.setdefault(record.status_code, []), key)
+
+    def page(
+        self,
+        status_code: Optional[int],
+        query: str,
+        before: Optional[InvoiceKey],
+        limit: int
+    ) -> List[Tuple[InvoiceKey, InvoiceRecord]]:
+        """按开票日期倒序取出分片内最多 limit 张符合条件的发票（limit不大于0时不限）"""
+        with self.lock:
+            # 从最短的候选索引开始遍历，其余条件逐条校验
+            candidates = [self.status_index.get(status_code, [])] if status_code is not None else []
+            if query:
+                grams = [query[i:i + 2] for i in range(len(query) - 1)] or [query]
+                candidates.extend(self.name_index.get(gram, []) for gram in grams)
+            keys = min(candidates, key=len) if candidates else self.date_index
+
+            high = bisect.bisect_left(keys, before) if before is not None else len(keys)
+            matched = []
+            for position in range(high - 1, -1, -1):
+                key = keys[position]
+                record = self.invoices[key[1]]
+                if status_code is not None and record.status_code != status_code:
+                    continue
+                if query and query not in record.customer_name.casefold():
+                    continue
+                matched.append((key, record))
+                if len(matched) == limit:
+                    break
+            return matched
@@ -33,6 +33,10 @@ class ModelManager:
         """获取当前模型"""
         return self.current_model
     
+    def get_model_config_key(self) -> tuple:
+        """获取标识当前模型配置的键，模型重新初始化后键随之变化"""
+        return (self.current_model_name, self.current_api_base, id(self.current_model))
+    
     def get_current_model_info(self) -> Dict[str, str]:
         """获取当前模型信息"""
         return {
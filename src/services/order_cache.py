@@ -0,0 +1,259 @@
+"""
+订单读穿缓存
+
+订单查询先查缓存，未命中时才访问订单仓储并写入缓存：
+- 按订单状态设置有效期，运输中的订单状态变化快，有效期短；已签收的订单基本不再变化，有效期长
+- 不存在的订单号同样缓存（负缓存），避免反复查询后端
+- 同一订单的并发查询合并为一次后端访问（singleflight），其余请求等待并共享结果
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+
+# 状态 -> 有效期（秒），依次按物流状态、订单状态匹配
+DEFAULT_STATUS_TTLS = {
+    "运输中": 60,
+    "已发货": 60,
+    "仓库处理中": 120,
+    "处理中": 120,
+    "已签收": 24 * 3600,
+}
+
+_MISSING = object()
+
+
+class _Flight:
+    """一次进行中的后端查询"""
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class OrderCache:
+    """带按状态TTL、负缓存和请求合并的订单LRU缓存"""
+
+    def __init__(
+        self,
+        capacity: int = 10000,
+        status_ttls: Optional[Dict[str, float]] = None,
+        default_ttl: float = 300,
+        negative_ttl: float = 30
+    ):
+        """
+        初始化订单缓存
+
+        Args:
+            capacity: 最多缓存的订单数量（包括不存在的订单号）
+            status_ttls: 状态到有效期（秒）的映射，默认为 DEFAULT_STATUS_TTLS
+            default_ttl: 状态不在映射中时的有效期（秒）
+            negative_ttl: 不存在的订单号的缓存有效期（秒）
+        """
+        self.capacity = capacity
+        self.status_ttls = DEFAULT_STATUS_TTLS if status_ttls is None else status_ttls
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        # 订单号 -> (订单信息或None, 过期时间)
+        self._entries: "OrderedDict[str, Tuple[Optional[Dict[str, Any]], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 订单号 -> 进行中的同步查询
+        self._flights: Dict[str, _Flight] = {}
+        # (事件循环ID, 订单号) -> 进行中的异步查询，等待方只能与查询方在同一事件循环中
+        self._async_flights: Dict[Any, asyncio.Future] = {}
+        # 进行中的异步后端查询任务，保持引用直到完成
+        self._async_tasks: Set[asyncio.Task] = set()
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "coalesced": 0}
+
+    def ttl_for(self, order: Optional[Dict[str, Any]]) -> float:
+        """计算订单的缓存有效期"""
+        if order is None:
+            return self.negative_ttl
+        for field in ("logistics_status", "status"):
+            ttl = self.status_ttls.get(order.get(field) or "")
+            if ttl is not None:
+                return ttl
+        return self.default_ttl
+
+    def _lookup(self, order_id: str) -> Any:
+        """在持有锁时查找未过期的缓存，未命中返回 _MISSING"""
+        entry = self._entries.get(order_id)
+        if entry is None:
+            return _MISSING
+        if entry[1] <= time.monotonic():
+            del self._entries[order_id]
+            return _MISSING
+        self._entries.move_to_end(order_id)
+        self._stats["hits" if entry[0] is not None else "negative_hits"] += 1
+        return entry[0]
+
+    def put(self, order_id: str, order: Optional[Dict[str, Any]]) -> None:
+        """写入订单（None表示订单不存在）"""
+        expires_at = time.monotonic() + self.ttl_for(order)
+        with self._lock:
+            self._entries[order_id] = (order, expires_at)
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, order_id: str) -> None:
+        """订单发生变化时移除缓存"""
+        with self._lock:
+            self._entries.pop(order_id, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_or_load(self, order_id: str, loader: Callable[[str], Optional[Dict[str, Any]]]) -> Optional[Dict[str, Any]]:
+        """
+        读穿查询：缓存未命中时调用 loader 查询后端
+
+        多个线程同时查询同一个未缓存的订单时，只有第一个线程调用 loader，其余线程等待其结果。
+        """
+        return self.get_many_or_load([order_id], lambda order_ids: {order_id: loader(order_id)})[order_id]
+
+    def get_many_or_load(
+        self,
+        order_ids: Sequence[str],
+        loader: Callable[[List[str]], Mapping[str, Optional[Dict[str, Any]]]]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        批量读穿查询：未缓存的订单号通过一次 loader 调用查询
+
+        Args:
+            order_ids: 订单号列表
+            loader: 批量查询函数，返回 订单号 -> 订单，不存在的订单号不在结果中
+
+        Returns:
+            订单号 -> 订单（不存在时为None），包含所有传入的订单号
+        """
+        results = {}
+        # 其他线程正在查询的订单号，等待其结果
+        waiting: Dict[str, _Flight] = {}
+        # 由当前线程查询的订单号
+        leading: Dict[str, _Flight] = {}
+        with self._lock:
+            for order_id in dict.fromkeys(order_ids):
+                cached = self._lookup(order_id)
+                if cached is not _MISSING:
+                    results[order_id] = cached
+                elif order_id in self._flights:
+                    waiting[order_id] = self._flights[order_id]
+                    self._stats["coalesced"] += 1
+                else:
+                    leading[order_id] = self._flights[order_id] = _Flight()
+                    self._stats["misses"] += 1
+
+        if leading:
+            try:
+                loaded = loader(list(leading))
+                for order_id, flight in leading.items():
+                    flight.value = results[order_id] = loaded.get(order_id)
+                    self.put(order_id, flight.value)
+            except BaseException as e:
+                for flight in leading.values():
+                    flight.error = e
+                raise
+            finally:
+                with self._lock:
+                    for order_id in leading:
+                        del self._flights[order_id]
+                for flight in leading.values():
+                    flight.done.set()
+
+        for order_id, flight in waiting.items():
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            results[order_id] = flight.value
+        return results
+
+    async def aget_or_load(
+        self,
+        order_id: str,
+        loader: Callable[[str], Awaitable[Optional[Dict[str, Any]]]]
+    ) -> Optional[Dict[str, Any]]:
+        """异步读穿查询，同一事件循环中对同一订单的并发查询只调用一次 loader"""
+        async def load_one(order_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+            return {order_id: await loader(order_id)}
+
+        return (await self.aget_many_or_load([order_id], load_one))[order_id]
+
+    async def aget_many_or_load(
+        self,
+        order_ids: Sequence[str],
+        loader: Callable[[List[str]], Awaitable[Mapping[str, Optional[Dict[str, Any]]]]]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """异步批量读穿查询，参数和返回值同 get_many_or_load"""
+        loop = asyncio.get_running_loop()
+        loop_id = id(loop)
+        results = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        leading: Dict[str, asyncio.Future] = {}
+        with self._lock:
+            for order_id in dict.fromkeys(order_ids):
+                cached = self._lookup(order_id)
+                if cached is not _MISSING:
+                    results[order_id] = cached
+                elif (loop_id, order_id) in self._async_flights:
+                    waiting[order_id] = self._async_flights[(loop_id, order_id)]
+                    self._stats["coalesced"] += 1
+                else:
+                    leading[order_id] = self._async_flights[(loop_id, order_id)] = loop.create_future()
+                    self._stats["misses"] += 1
+
+        if leading:
+            # 后端查询在独立的任务中执行：发起查询的协程被取消（如客户端断开）时，
+            # 查询继续进行，合并到该查询上的其他等待方仍能拿到结果
+            task = loop.create_task(self._aload(loop_id, leading, loader))
+            self._async_tasks.add(task)
+            task.add_done_callback(self._async_tasks.discard)
+            waiting.update(leading)
+
+        for order_id, future in waiting.items():
+            # shield：单个等待方被取消时不影响其他等待方
+            results[order_id] = await asyncio.shield(future)
+        return results
+
+    async def _aload(
+        self,
+        loop_id: int,
+        leading: Dict[str, asyncio.Future],
+        loader: Callable[[List[str]], Awaitable[Mapping[str, Optional[Dict[str, Any]]]]]
+    ) -> None:
+        """执行一次异步后端查询，并把结果或异常交给等待该查询的全部协程"""
+        try:
+            loaded = await loader(list(leading))
+            for order_id, future in leading.items():
+                order = loaded.get(order_id)
+                self.put(order_id, order)
+                future.set_result(order)
+        except asyncio.CancelledError:
+            # 只有查询任务本身被取消（如事件循环关闭）时才会到这里
+            for future in leading.values():
+                future.cancel()
+            raise
+        except BaseException as e:
+            for future in leading.values():
+                future.set_exception(e)
+                # 等待方都已取消时避免"异常未被获取"的警告
+                future.exception()
+        finally:
+            with self._lock:
+                for order_id in leading:
+                    self._async_flights.pop((loop_id, order_id), None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"] + stats["coalesced"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        return stats
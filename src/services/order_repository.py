@@ -0,0 +1,310 @@
+"""
+订单仓储
+
+为订单查询工具提供可插拔的数据访问层：内存实现用于演示和测试，SQLite实现用于千万级订单。
+SQLite实现使用线程安全的连接池（每个连接同一时间只被一个线程使用）和参数化的固定SQL
+（sqlite3 会按连接缓存预编译语句），并在 order_id（主键）、tracking_number、order_date 上建立索引。
+"""
+
+import bisect
+import json
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from src.utils.logger import app_logger
+
+
+# 订单字段，SQLite实现中每个字段对应一列
+ORDER_FIELDS = (
+    "order_id",
+    "status",
+    "product_name",
+    "order_date",
+    "estimated_delivery",
+    "delivery_date",
+    "tracking_number",
+    "logistics_company",
+    "logistics_status",
+    "current_location",
+)
+
+# 演示用的订单数据
+SAMPLE_ORDERS: List[Dict[str, Any]] = [
+    {
+        "order_id": "ORD202311001",
+        "status": "已发货",
+        "product_name": "智能手表",
+        "order_date": "2023-11-05",
+        "estimated_delivery": "2023-11-08",
+        "tracking_number": "SF1234567890",
+        "logistics_company": "顺丰快递",
+        "logistics_status": "运输中",
+        "current_location": "上海转运中心"
+    },
+    {
+        "order_id": "ORD202311002",
+        "status": "已签收",
+        "product_name": "无线耳机",
+        "order_date": "2023-11-03",
+        "delivery_date": "2023-11-06",
+        "tracking_number": "YT9876543210",
+        "logistics_company": "圆通快递",
+        "logistics_status": "已签收",
+        "current_location": "已送达"
+    },
+    {
+        "order_id": "ORD202311003",
+        "status": "处理中",
+        "product_name": "智能音箱",
+        "order_date": "2023-11-07",
+        "estimated_delivery": "2023-11-12",
+        "tracking_number": None,
+        "logistics_company": None,
+        "logistics_status": "仓库处理中",
+        "current_location": "北京仓库"
+    },
+]
+
+
+class OrderRepository:
+    """订单仓储接口"""
+
+    # 查询是否会阻塞（如磁盘或网络I/O），异步调用方据此决定是否放到线程中执行
+    blocking = False
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """按订单号获取订单，不存在时返回None"""
+        raise NotImplementedError
+
+    def get_many(self, order_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        """一次查询多个订单，返回 订单号 -> 订单（不存在的订单号不在结果中）"""
+        orders = {}
+        for order_id in order_ids:
+            order = self.get(order_id)
+            if order is not None:
+                orders[order_id] = order
+        return orders
+
+    def find_by_tracking_number(self, tracking_number: str) -> Optional[Dict[str, Any]]:
+        """按快递单号获取订单，不存在时返回None"""
+        raise NotImplementedError
+
+    def list_by_date(self, start_date: str, end_date: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """按下单日期（YYYY-MM-DD，闭区间）升序列出订单"""
+        raise NotImplementedError
+
+    def save_many(self, orders: Iterable[Dict[str, Any]]) -> int:
+        """批量新增或更新订单，返回写入的数量"""
+        raise NotImplementedError
+
+    def save(self, order: Dict[str, Any]) -> None:
+        """新增或更新订单"""
+        self.save_many([order])
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryOrderRepository(OrderRepository):
+    """基于字典的内存订单仓储"""
+
+    def __init__(self, orders: Iterable[Dict[str, Any]] = ()):
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        # 快递单号 -> 订单号
+        self._tracking_index: Dict[str, str] = {}
+        # 按 (下单日期, 订单号) 排序的列表，支持按日期范围二分查找
+        self._date_index: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self.save_many(orders)
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        return self._orders.get(order_id)
+
+    def find_by_tracking_number(self, tracking_number: str) -> Optional[Dict[str, Any]]:
+        order_id = self._tracking_index.get(tracking_number)
+        return self._orders.get(order_id) if order_id is not None else None
+
+    def list_by_date(self, start_date: str, end_date: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self._lock:
+            start = bisect.bisect_left(self._date_index, (start_date, ""))
+            orders: List[Dict[str, Any]] = []
+            for order_date, order_id in self._date_index[start:]:
+                if order_date > end_date or len(orders) >= limit:
+                    break
+                orders.append(self._orders[order_id])
+        return orders
+
+    def save_many(self, orders: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with self._lock:
+            for order in orders:
+                order_id = order["order_id"]
+                previous = self._orders.get(order_id)
+                if previous is not None:
+                    if previous.get("tracking_number"):
+                        self._tracking_index.pop(previous["tracking_number"], None)
+                    if previous.get("order_date"):
+                        self._date_index.remove((previous["order_date"], order_id))
+
+                self._orders[order_id] = dict(order)
+                if order.get("tracking_number"):
+                    self._tracking_index[order["tracking_number"]] = order_id
+                if order.get("order_date"):
+                    bisect.insort(self._date_index, (order["order_date"], order_id))
+                count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+
+class SqliteConnectionPool:
+    """
+    线程安全的SQLite连接池
+
+    连接在创建时开启WAL模式，读操作之间以及读写之间互不阻塞；每个连接同一时间
+    只借给一个线程，用完后归还。
+    """
+
+    def __init__(self, db_path: str, size: int = 4, cached_statements: int = 64):
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        else:
+            # 每个内存数据库连接都是独立的数据库，只能使用一个连接
+            size = 1
+        self.db_path = db_path
+        self.size = size
+        self._connections: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        for _ in range(size):
+            self._connections.put(self._connect(cached_statements))
+
+    def _connect(self, cached_statements: int) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            cached_statements=cached_statements,
+            # 写事务遇到锁时等待而不是立即报错
+            timeout=30
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出一个连接，连接池耗尽时等待其他线程归还"""
+        conn = self._connections.get()
+        try:
+            yield conn
+        finally:
+            self._connections.put(conn)
+
+    def close(self) -> None:
+        """关闭所有连接"""
+        for _ in range(self.size):
+            self._connections.get().close()
+
+
+class SqliteOrderRepository(OrderRepository):
+    """基于SQLite的订单仓储，适用于千万级订单"""
+
+    blocking = True
+
+    _SELECT_COLUMNS = ", ".join(ORDER_FIELDS)
+    _GET_SQL = f"SELECT {_SELECT_COLUMNS} FROM orders WHERE order_id = ?"
+    # 订单号列表以JSON数组传入，语句文本固定，不同数量的订单号共用同一条预编译语句
+    _GET_MANY_SQL = f"SELECT {_SELECT_COLUMNS} FROM orders WHERE order_id IN (SELECT value FROM json_each(?))"
+    _TRACKING_SQL = f"SELECT {_SELECT_COLUMNS} FROM orders WHERE tracking_number = ? LIMIT 1"
+    _DATE_RANGE_SQL = (
+        f"SELECT {_SELECT_COLUMNS} FROM orders WHERE order_date BETWEEN ? AND ? "
+        "ORDER BY order_date, order_id LIMIT ?"
+    )
+    _UPSERT_SQL = (
+        f"INSERT OR REPLACE INTO orders ({_SELECT_COLUMNS}) "
+        f"VALUES ({', '.join('?' for _ in ORDER_FIELDS)})"
+    )
+
+    def __init__(self, pool: SqliteConnectionPool):
+        self.pool = pool
+        with self.pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                "order_id TEXT PRIMARY KEY, "
+                "status TEXT NOT NULL, "
+                "product_name TEXT, "
+                "order_date TEXT, "
+                "estimated_delivery TEXT, "
+                "delivery_date TEXT, "
+                "tracking_number TEXT, "
+                "logistics_company TEXT, "
+                "logistics_status TEXT, "
+                "current_location TEXT"
+                ") WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_tracking_number ON orders (tracking_number)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_order_date ON orders (order_date)")
+            conn.commit()
+
+    @staticmethod
+    def _from_row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        return dict(zip(ORDER_FIELDS, row))
+
+    @classmethod
+    def _to_order(cls, row: Optional[Tuple[Any, ...]]) -> Optional[Dict[str, Any]]:
+        return cls._from_row(row) if row is not None else None
+
+    def get(self, order_id: str) -> Optional[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            return self._to_order(conn.execute(self._GET_SQL, (order_id,)).fetchone())
+
+    def get_many(self, order_ids: Sequence[str]) -> Dict[str, Dict[str, Any]]:
+        if not order_ids:
+            return {}
+        with self.pool.connection() as conn:
+            rows = conn.execute(self._GET_MANY_SQL, (json.dumps(list(order_ids)),)).fetchall()
+        return {row[0]: self._from_row(row) for row in rows}
+
+    def find_by_tracking_number(self, tracking_number: str) -> Optional[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            return self._to_order(conn.execute(self._TRACKING_SQL, (tracking_number,)).fetchone())
+
+    def list_by_date(self, start_date: str, end_date: str, limit: int = 100) -> List[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(self._DATE_RANGE_SQL, (start_date, end_date, limit)).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def save_many(self, orders: Iterable[Dict[str, Any]]) -> int:
+        rows = [tuple(order.get(field) for field in ORDER_FIELDS) for order in orders]
+        with self.pool.connection() as conn:
+            with conn:
+                conn.executemany(self._UPSERT_SQL, rows)
+        return len(rows)
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0])
+
+
+def create_order_repository(backend: str = "memory", db_path: str = "data/orders.db", pool_size: int = 4) -> OrderRepository:
+    """
+    创建订单仓储
+
+    Args:
+        backend: 存储后端，支持 "memory"（内置演示数据）和 "sqlite"
+        db_path: SQLite数据库文件路径
+        pool_size: SQLite连接池大小
+
+    Returns:
+        订单仓储
+    """
+    if backend == "memory":
+        return MemoryOrderRepository(SAMPLE_ORDERS)
+    if backend == "sqlite":
+        repository = SqliteOrderRepository(SqliteConnectionPool(db_path, size=pool_size))
+        app_logger.info(f"订单仓储初始化完成: SQLite {db_path}, 连接池大小={pool_size}")
+        return repository
+    raise ValueError(f"不支持的订单存储后端: {backend}")
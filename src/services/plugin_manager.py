@@ -1,7 +1,11 @@
 import os
+import json
+import hashlib
 import importlib
 import inspect
 from typing import Dict, Any, List, Callable, Optional
+from langchain_core.tools import StructuredTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
 from src.utils.logger import app_logger
 
 class PluginManager:
@@ -11,6 +15,14 @@ class PluginManager:
         self.plugins = {}
         self.plugin_modules = {}
         self.plugin_functions = {}
+        # 模型可见的工具名称 -> 工具函数，用于O(1)分发工具调用
+        self.tool_dispatch = {}
+        # 预先序列化的工具JSON Schema，避免每次调用模型时重新解析函数签名
+        self.tool_schemas = []
+        # 插件注册表版本，插件发生变化时递增，供下游缓存判断是否失效
+        self.registry_version = 0
+        # 工具Schema内容的哈希，跨进程稳定，供持久化缓存区分工具集合
+        self.tool_schema_hash = ""
         self._load_plugins()
     
     def _load_plugins(self):
@@ -29,6 +41,7 @@ class PluginManager:
                     plugin_name = filename[:-3]  # 移除.py扩展名
                     self._load_plugin(plugin_name)
             
+            self._rebuild_tool_index()
             app_logger.info(f"已加载 {len(self.plugins)} 个插件")
         except Exception as e:
             app_logger.error(f"加载插件时出错: {str(e)}")
@@ -46,29 +59,91 @@ class PluginManager:
             self.plugin_modules[plugin_name] = module
             
             # 查找插件中的工具函数
-            tools = []
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isfunction(obj) and 
-                    not name.startswith("_") and 
-                    hasattr(obj, "__doc__") and 
-                    obj.__doc__):
-                    
-                    # 保存函数引用
-                    self.plugin_functions[f"{plugin_name}.{name}"] = obj
-                    tools.append({
-                        "name": f"{plugin_name}.{name}",
-                        "description": obj.__doc__,
-                        "function": obj
-                    })
+            tools = self._discover_tools(plugin_name, module)
             
             if tools:
                 self.plugins[plugin_name] = tools
-                app_logger.info(f"已加载插件: {plugin_name}, 包含 {len(tools)} 个工具")
+                app_logger.info(f"已加载插件: {plugin_name}, 包含 {len(tools)} 个工具{self._describe_async_tools(tools)}")
             else:
                 app_logger.warning(f"插件 {plugin_name} 中没有找到有效的工具函数")
         except Exception as e:
             app_logger.error(f"加载插件 {plugin_name} 时出错: {str(e)}")
     
+    def _discover_tools(self, plugin_name: str, module: Any) -> List[Dict[str, Any]]:
+        """
+        查找模块中定义的工具函数
+        
+        工具函数为模块中定义（而不是导入）的、带文档字符串的公开函数，支持普通函数和 async def 协程函数。
+        异步工具由聊天服务直接在事件循环中等待，同步工具在线程池中执行。
+        """
+        tools = []
+        for name, obj in inspect.getmembers(module, inspect.isfunction):
+            if name.startswith("_") or not obj.__doc__ or obj.__module__ != module.__name__:
+                continue
+            
+            # 保存函数引用
+            self.plugin_functions[f"{plugin_name}.{name}"] = obj
+            tools.append({
+                "name": f"{plugin_name}.{name}",
+                "description": obj.__doc__,
+                "function": obj,
+                "is_async": inspect.iscoroutinefunction(obj)
+            })
+        return tools
+    
+    @staticmethod
+    def _describe_async_tools(tools: List[Dict[str, Any]]) -> str:
+        async_count = sum(1 for tool in tools if tool["is_async"])
+        return f"（其中 {async_count} 个异步工具）" if async_count else ""
+    
+    def _rebuild_tool_index(self) -> None:
+        """重建工具分发表和工具Schema，并递增注册表版本"""
+        tool_dispatch = {}
+        tool_schemas: List[Dict[str, Any]] = []
+        for plugin_name, tools in self.plugins.items():
+            for tool in tools:
+                try:
+                    schema = self._build_tool_schema(tool["function"])
+                except Exception as e:
+                    app_logger.error(f"生成工具 {tool['name']} 的Schema时出错: {str(e)}")
+                    continue
+                
+                tool_name = schema["function"]["name"]
+                if tool_name in tool_dispatch:
+                    app_logger.warning(f"工具名称 {tool_name} 重复，{tool['name']} 将覆盖已有工具")
+                    tool_schemas = [
+                        existing for existing in tool_schemas 
+                        if existing["function"]["name"] != tool_name
+                    ]
+                
+                tool_dispatch[tool_name] = tool["function"]
+                tool_schemas.append(schema)
+        
+        # 整体替换，保证并发读取时看到的是一致的快照
+        self.tool_dispatch = tool_dispatch
+        self.tool_schemas = tool_schemas
+        self.tool_schema_hash = hashlib.sha256(
+            json.dumps(tool_schemas, ensure_ascii=False, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        self.registry_version += 1
+    
+    def _build_tool_schema(self, function: Callable) -> Dict[str, Any]:
+        """生成工具的OpenAI JSON Schema"""
+        try:
+            # 优先解析Google风格文档字符串中的参数说明
+            return convert_to_openai_tool(function)
+        except ValueError:
+            # 文档字符串格式不规范时，仅根据函数签名生成参数Schema
+            return convert_to_openai_tool(StructuredTool.from_function(function))
+    
+    def get_tool_schemas(self) -> List[Dict[str, Any]]:
+        """获取所有工具预先序列化的JSON Schema"""
+        return self.tool_schemas
+    
+    def get_tool_function(self, tool_name: str) -> Optional[Callable]:
+        """根据模型可见的工具名称获取工具函数"""
+        return self.tool_dispatch.get(tool_name) or self.plugin_functions.get(tool_name)
+    
     def get_plugin(self, plugin_name: str) -> Optional[List[Dict[str, Any]]]:
         """获取指定插件"""
         return self.plugins.get(plugin_name)
@@ -107,23 +182,11 @@ class PluginManager:
                 del self.plugin_functions[name]
             
             # 重新加载插件函数
-            tools = []
-            for name, obj in inspect.getmembers(module):
-                if (inspect.isfunction(obj) and 
-                    not name.startswith("_") and 
-                    hasattr(obj, "__doc__") and 
-                    obj.__doc__):
-                    
-                    # 保存函数引用
-                    self.plugin_functions[f"{plugin_name}.{name}"] = obj
-                    tools.append({
-                        "name": f"{plugin_name}.{name}",
-                        "description": obj.__doc__,
-                        "function": obj
-                    })
+            tools = self._discover_tools(plugin_name, module)
             
             if tools:
                 self.plugins[plugin_name] = tools
+                self._rebuild_tool_index()
                 app_logger.info(f"已重新加载插件: {plugin_name}, 包含 {len(tools)} 个工具")
                 
                 return {
@@ -134,6 +197,7 @@ class PluginManager:
             else:
                 # 如果没有找到工具函数，移除插件
                 del self.plugins[plugin_name]
+                self._rebuild_tool_index()
                 return {
                     "success": False,
                     "message": f"重新加载后，插件 {plugin_name} 中没有找到有效的工具函数，已移除"
@@ -188,6 +252,7 @@ class PluginManager:
                 }
             
             self._load_plugin(plugin_name)
+            self._rebuild_tool_index()
             
             if plugin_name in self.plugins:
                 tools_count = len(self.plugins[plugin_name])
@@ -228,6 +293,7 @@ class PluginManager:
             # 移除插件
             tools_count = len(self.plugins[plugin_name])
             del self.plugins[plugin_name]
+            self._rebuild_tool_index()
             
             app_logger.info(f"已卸载插件: {plugin_name}")
             
@@ -253,12 +319,14 @@ class PluginManager:
             for plugin_name, tools in self.plugins.items():
                 plugin_details[plugin_name] = {
                     "tools_count": len(tools),
-                    "tools": [tool["name"] for tool in tools]
+                    "tools": [tool["name"] for tool in tools],
+                    "async_tools": [tool["name"] for tool in tools if tool["is_async"]]
                 }
             
             return {
                 "total_plugins": total_plugins,
                 "total_tools": total_tools,
+                "registry_version": self.registry_version,
                 "plugins": plugin_details
             }
         except Exception as e:
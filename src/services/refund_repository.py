@@ -0,0 +1,251 @@
+"""
+退款仓储
+
+退款申请的持久化存储：内存实现用于演示和测试，SQLite实现用于生产环境，重启后数据不丢失。
+除按退款单号查询外，两种实现都在 order_id、status、apply_time 上维护二级索引，
+按订单号查询退款、按状态和申请时间列出退款在百万级数据下仍是 O(log n + 返回条数)。
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.services.order_repository import SqliteConnectionPool
+from src.utils.logger import app_logger
+
+
+# 退款字段，SQLite实现中每个字段对应一列
+REFUND_FIELDS = (
+    "refund_id",
+    "order_id",
+    "reason",
+    "description",
+    "status",
+    "apply_time",
+    "estimated_process_time",
+    "refund_amount",
+    "process_result",
+)
+
+# 比任何申请时间都大的后缀，用于把结束日期（如"2023-11-07"）扩展为包含当天的上界
+_TIME_UPPER_BOUND = "\uffff"
+
+
+class RefundRepository:
+    """退款仓储接口"""
+
+    # 查询是否会阻塞（如磁盘或网络I/O），异步调用方据此决定是否放到线程中执行
+    blocking = False
+
+    def get(self, refund_id: str) -> Optional[Dict[str, Any]]:
+        """按退款单号获取退款申请，不存在时返回None"""
+        raise NotImplementedError
+
+    def list_by_order(self, order_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """按申请时间倒序列出订单的退款申请"""
+        raise NotImplementedError
+
+    def list_refunds(
+        self,
+        status: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        按申请时间倒序列出退款申请
+
+        Args:
+            status: 只列出该状态的退款，为空时不限
+            start_time: 申请时间下界（包含），如"2023-11-01"或"2023-11-01 08:00:00"
+            end_time: 申请时间上界（包含），只有日期时包含当天
+            limit: 最多返回的数量
+        """
+        raise NotImplementedError
+
+    def save_many(self, refunds: Iterable[Dict[str, Any]]) -> int:
+        """批量新增或更新退款申请，返回写入的数量"""
+        raise NotImplementedError
+
+    def save(self, refund: Dict[str, Any]) -> None:
+        """新增或更新退款申请"""
+        self.save_many([refund])
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryRefundRepository(RefundRepository):
+    """基于字典和有序列表的内存退款仓储"""
+
+    def __init__(self, refunds: Iterable[Dict[str, Any]] = ()):
+        self._refunds: Dict[str, Dict[str, Any]] = {}
+        # 以下索引都是按 (申请时间, 退款单号) 排序的列表，支持按时间范围二分查找
+        self._time_index: List[Tuple[str, str]] = []
+        self._order_index: Dict[str, List[Tuple[str, str]]] = {}
+        self._status_index: Dict[str, List[Tuple[str, str]]] = {}
+        self._lock = threading.Lock()
+        self.save_many(refunds)
+
+    def get(self, refund_id: str) -> Optional[Dict[str, Any]]:
+        return self._refunds.get(refund_id)
+
+    def list_by_order(self, order_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = self._order_index.get(order_id, [])
+            return [self._refunds[refund_id] for _, refund_id in reversed(keys[-limit:])] if limit > 0 else []
+
+    def list_refunds(
+        self,
+        status: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            keys = self._status_index.get(status, []) if status else self._time_index
+            low = bisect.bisect_left(keys, (start_time, "")) if start_time else 0
+            high = bisect.bisect_left(keys, (end_time + _TIME_UPPER_BOUND, "")) if end_time else len(keys)
+            start = max(low, high - max(limit, 0))
+            return [self._refunds[refund_id] for _, refund_id in reversed(keys[start:high])]
+
+    @staticmethod
+    def _index_remove(index: List[Tuple[str, str]], key: Tuple[str, str]) -> None:
+        position = bisect.bisect_left(index, key)
+        if position < len(index) and index[position] == key:
+            del index[position]
+
+    def save_many(self, refunds: Iterable[Dict[str, Any]]) -> int:
+        count = 0
+        with self._lock:
+            for refund in refunds:
+                refund_id = refund["refund_id"]
+                previous = self._refunds.get(refund_id)
+                if previous is not None:
+                    key = (previous["apply_time"], refund_id)
+                    self._index_remove(self._time_index, key)
+                    self._index_remove(self._order_index[previous["order_id"]], key)
+                    self._index_remove(self._status_index[previous["status"]], key)
+
+                self._refunds[refund_id] = dict(refund)
+                key = (refund["apply_time"], refund_id)
+                bisect.insort(self._time_index, key)
+                bisect.insort(self._order_index.setdefault(refund["order_id"], []), key)
+                bisect.insort(self._status_index.setdefault(refund["status"], []), key)
+                count += 1
+        return count
+
+    def __len__(self) -> int:
+        return len(self._refunds)
+
+
+class SqliteRefundRepository(RefundRepository):
+    """基于SQLite的退款仓储，与订单仓储共用连接池实现"""
+
+    blocking = True
+
+    _SELECT_COLUMNS = ", ".join(REFUND_FIELDS)
+    _GET_SQL = f"SELECT {_SELECT_COLUMNS} FROM refunds WHERE refund_id = ?"
+    _BY_ORDER_SQL = (
+        f"SELECT {_SELECT_COLUMNS} FROM refunds WHERE order_id = ? "
+        "ORDER BY apply_time DESC, refund_id DESC LIMIT ?"
+    )
+    # 不限条件时以空串和 _TIME_UPPER_BOUND 作为时间范围，语句文本固定，始终走申请时间索引
+    _LIST_SQL = (
+        f"SELECT {_SELECT_COLUMNS} FROM refunds WHERE apply_time >= ? AND apply_time < ? "
+        "ORDER BY apply_time DESC, refund_id DESC LIMIT ?"
+    )
+    _LIST_BY_STATUS_SQL = (
+        f"SELECT {_SELECT_COLUMNS} FROM refunds WHERE status = ? AND apply_time >= ? AND apply_time < ? "
+        "ORDER BY apply_time DESC, refund_id DESC LIMIT ?"
+    )
+    _UPSERT_SQL = (
+        f"INSERT OR REPLACE INTO refunds ({_SELECT_COLUMNS}) "
+        f"VALUES ({', '.join('?' for _ in REFUND_FIELDS)})"
+    )
+
+    def __init__(self, pool: SqliteConnectionPool):
+        self.pool = pool
+        with self.pool.connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS refunds ("
+                "refund_id TEXT PRIMARY KEY, "
+                "order_id TEXT NOT NULL, "
+                "reason TEXT, "
+                "description TEXT, "
+                "status TEXT NOT NULL, "
+                "apply_time TEXT NOT NULL, "
+                "estimated_process_time TEXT, "
+                "refund_amount REAL, "
+                "process_result TEXT"
+                ") WITHOUT ROWID"
+            )
+            # 索引末尾隐含主键 refund_id，按 (apply_time, refund_id) 倒序读取时无需额外排序
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_refunds_order_id ON refunds (order_id, apply_time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_refunds_status ON refunds (status, apply_time)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_refunds_apply_time ON refunds (apply_time)")
+            conn.commit()
+
+    @staticmethod
+    def _from_row(row: Tuple[Any, ...]) -> Dict[str, Any]:
+        return dict(zip(REFUND_FIELDS, row))
+
+    @classmethod
+    def _to_refund(cls, row: Optional[Tuple[Any, ...]]) -> Optional[Dict[str, Any]]:
+        return cls._from_row(row) if row is not None else None
+
+    def get(self, refund_id: str) -> Optional[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            return self._to_refund(conn.execute(self._GET_SQL, (refund_id,)).fetchone())
+
+    def list_by_order(self, order_id: str, limit: int = 20) -> List[Dict[str, Any]]:
+        with self.pool.connection() as conn:
+            rows = conn.execute(self._BY_ORDER_SQL, (order_id, limit)).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def list_refunds(
+        self,
+        status: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict[str, Any]]:
+        time_range = (start_time or "", (end_time or "") + _TIME_UPPER_BOUND)
+        with self.pool.connection() as conn:
+            if status:
+                rows = conn.execute(self._LIST_BY_STATUS_SQL, (status, *time_range, limit)).fetchall()
+            else:
+                rows = conn.execute(self._LIST_SQL, (*time_range, limit)).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def save_many(self, refunds: Iterable[Dict[str, Any]]) -> int:
+        rows = [tuple(refund.get(field) for field in REFUND_FIELDS) for refund in refunds]
+        with self.pool.connection() as conn:
+            with conn:
+                conn.executemany(self._UPSERT_SQL, rows)
+        return len(rows)
+
+    def __len__(self) -> int:
+        with self.pool.connection() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM refunds").fetchone()[0])
+
+
+def create_refund_repository(backend: str = "sqlite", db_path: str = "data/refunds.db", pool_size: int = 4) -> RefundRepository:
+    """
+    创建退款仓储
+
+    Args:
+        backend: 存储后端，支持 "sqlite" 和 "memory"（进程重启后数据丢失）
+        db_path: SQLite数据库文件路径
+        pool_size: SQLite连接池大小
+
+    Returns:
+        退款仓储
+    """
+    if backend == "memory":
+        return MemoryRefundRepository()
+    if backend == "sqlite":
+        repository = SqliteRefundRepository(SqliteConnectionPool(db_path, size=pool_size))
+        app_logger.info(f"退款仓储初始化完成: SQLite {db_path}, 连接池大小={pool_size}")
+        return repository
+    raise ValueError(f"不支持的退款存储后端: {backend}")
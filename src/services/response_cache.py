@@ -0,0 +1,165 @@
+"""
+模型响应缓存
+
+对（模型、工具Schema、规范化后的消息）完全相同的请求直接返回之前的模型回答，
+用于大量重复的首轮咨询（如"怎么退款"、"发票怎么开"）。缓存分为两层：
+带TTL的内存LRU，以及可选的SQLite磁盘层（服务重启后仍可命中，多个进程共享）。
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from langchain_core.messages import BaseMessage
+
+from src.utils.logger import app_logger
+
+
+# 规范化时忽略的句末标点和语气符号
+_TRAILING_PUNCTUATION = "?？!！。.~～…,，、;；"
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """规范化文本：全角转半角、合并空白、忽略大小写和句末标点"""
+    text = unicodedata.normalize("NFKC", text)
+    text = _WHITESPACE.sub(" ", text).strip().casefold()
+    return text.rstrip(_TRAILING_PUNCTUATION + " ")
+
+
+def _message_fingerprint(message: BaseMessage) -> Dict[str, Any]:
+    content = message.content if isinstance(message.content, str) else json.dumps(message.content, ensure_ascii=False)
+    fingerprint: Dict[str, Any] = {"role": message.type, "content": normalize_text(content)}
+    tool_calls = getattr(message, "tool_calls", None)
+    if tool_calls:
+        fingerprint["tool_calls"] = [
+            {"name": tool_call["name"], "args": tool_call["args"]} for tool_call in tool_calls
+        ]
+    return fingerprint
+
+
+def make_cache_key(model_name: str, tool_schema_hash: str, messages: Sequence[BaseMessage]) -> str:
+    """根据模型名称、工具Schema哈希和规范化后的消息生成缓存键"""
+    payload = json.dumps(
+        [model_name, tool_schema_hash, [_message_fingerprint(message) for message in messages]],
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """带TTL的LRU响应缓存，可选SQLite磁盘层"""
+
+    # 每写入多少条记录清理一次磁盘层中的过期数据
+    PURGE_INTERVAL = 256
+
+    def __init__(self, capacity: int = 1024, ttl: float = 3600, db_path: Optional[str] = None):
+        """
+        初始化响应缓存
+
+        Args:
+            capacity: 内存层保留的响应数量
+            ttl: 响应有效期（秒）
+            db_path: 磁盘层SQLite文件路径，为空时只使用内存层
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        # 缓存键 -> (响应内容, 写入时间)
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._writes = 0
+        self.conn = self._open_disk_tier(db_path) if db_path else None
+
+    def _open_disk_tier(self, db_path: str) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        conn = sqlite3.connect(db_path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            "cache_key TEXT PRIMARY KEY, "
+            "response TEXT NOT NULL, "
+            "created_at REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_created_at ON response_cache (created_at)")
+        conn.commit()
+        return conn
+
+    def _remember(self, key: str, response: str, created_at: float) -> None:
+        self._entries[key] = (response, created_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """获取未过期的缓存响应，未命中时返回None"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[1] < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry[0]
+                del self._entries[key]
+
+            if self.conn is not None:
+                row = self.conn.execute(
+                    "SELECT response, created_at FROM response_cache WHERE cache_key = ? AND created_at > ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+                if row is not None:
+                    response: str = row[0]
+                    self._remember(key, response, row[1])
+                    self._stats["disk_hits"] += 1
+                    return response
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, response: str) -> None:
+        """写入响应（同时写入磁盘层）"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, response, now)
+            if self.conn is None:
+                return
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO response_cache (cache_key, response, created_at) VALUES (?, ?, ?)",
+                (key, response, now)
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_INTERVAL == 0:
+                self.conn.execute("DELETE FROM response_cache WHERE created_at <= ?", (now - self.ttl,))
+            self.conn.commit()
+
+    def clear(self) -> None:
+        """清空所有缓存（模型或插件变化后调用）"""
+        with self._lock:
+            self._entries.clear()
+            if self.conn is not None:
+                self.conn.execute("DELETE FROM response_cache")
+                self.conn.commit()
+        app_logger.info("响应缓存已清空")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["memory_entries"] = len(self._entries)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hits"] = hits
+        stats["hit_rate"] = round(hits / lookups, 4) if lookups else 0.0
+        stats["disk_enabled"] = self.conn is not None
+        return stats
@@ -0,0 +1,186 @@
+"""
+近似重复问题的回答缓存
+
+对用户问题做字符n-gram切分并计算MinHash签名，通过LSH分桶在O(1)时间内找到候选问题，
+再用精确的Jaccard相似度确认，相似度达到阈值时复用之前的回答。不依赖外部向量服务。
+
+字符级相似度能识别标点、语气词、个别字词不同的问法（如"怎么申请退款" / "如何申请退款呀"），
+无法识别用词完全不同的同义改写。问题中的订单号、数字等字母数字串必须完全一致才会命中，
+避免把A订单的回答返回给B订单的提问。
+"""
+
+import hashlib
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from src.services.response_cache import normalize_text
+
+
+# 切分前移除的语气词和代词，减少对相似度的干扰
+_STOP_CHARS = set("的了吗呢吧啊呀哦么嘛我你您请")
+_ID_TOKEN = re.compile(r"[0-9a-z]+")
+# 每次blake2b计算产生64字节摘要，即16个相互独立的32位哈希值
+_HASHES_PER_DIGEST = 16
+_DIGEST_FORMAT = struct.Struct(f"<{_HASHES_PER_DIGEST}I")
+
+
+class SemanticCache:
+    """基于MinHash/LSH的近似重复问题回答缓存"""
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        capacity: int = 100000,
+        ttl: float = 3600,
+        ngram_sizes: Sequence[int] = (1, 2),
+        bands: int = 8,
+        rows: int = 2,
+        seed: int = 1
+    ):
+        """
+        初始化近似缓存
+
+        Args:
+            threshold: 命中所需的最小Jaccard相似度（0~1）
+            capacity: 最多缓存的问题数量，超出后淘汰最久未使用的问题
+            ttl: 回答有效期（秒）
+            ngram_sizes: 字符n-gram的长度，中文短问题同时使用单字和双字效果较好
+            bands: LSH分桶数，bands * rows 为MinHash签名长度
+            rows: 每个桶包含的签名行数，越小召回率越高、候选越多
+            seed: 生成MinHash哈希函数的种子，多个进程需一致
+        """
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl = ttl
+        self.ngram_sizes = tuple(ngram_sizes)
+        self.bands = bands
+        self.rows = rows
+        self.num_hashes = bands * rows
+        # 每个盐值对应16个哈希函数，签名计算在C实现的blake2b中完成，避免逐个哈希函数循环
+        self._salts = [
+            struct.pack("<II", seed, chunk)
+            for chunk in range(-(-self.num_hashes // _HASHES_PER_DIGEST))
+        ]
+        # 条目ID -> (规范化问题, 作用域, 回答, 写入时间)
+        self._entries: "OrderedDict[int, Tuple[str, str, str, float]]" = OrderedDict()
+        # 每个分桶：桶键 -> 最近写入该桶的条目ID（每桶只保留一个条目，内存与查询成本均为O(1)）
+        self._buckets: List[Dict[int, int]] = [{} for _ in range(bands)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    def _prepare(self, text: str) -> str:
+        normalized = normalize_text(text)
+        return "".join(char for char in normalized if char not in _STOP_CHARS and not char.isspace())
+
+    def _shingles(self, prepared: str) -> Set[str]:
+        shingles: Set[str] = set()
+        for size in self.ngram_sizes:
+            if len(prepared) < size:
+                continue
+            shingles.update(prepared[i:i + size] for i in range(len(prepared) - size + 1))
+        return shingles or {prepared}
+
+    def _bucket_keys(self, prepared: str, shingles: Set[str], scope: str) -> List[int]:
+        """计算问题在每个分桶中的桶键"""
+        encoded = [shingle.encode("utf-8") for shingle in shingles]
+        signature: List[int] = []
+        for salt in self._salts:
+            digests = [
+                _DIGEST_FORMAT.unpack(hashlib.blake2b(data, salt=salt).digest())
+                for data in encoded
+            ]
+            signature.extend(map(min, zip(*digests)))
+        # 字母数字串（订单号、金额等）和作用域参与分桶，不同订单号的问题不会互相命中
+        guard = hash((scope, tuple(sorted(set(_ID_TOKEN.findall(prepared))))))
+        rows = self.rows
+        return [
+            hash((band, guard, tuple(signature[band * rows:(band + 1) * rows])))
+            for band in range(self.bands)
+        ]
+
+    @staticmethod
+    def _jaccard(left: set, right: set) -> float:
+        return len(left & right) / len(left | right) if left or right else 1.0
+
+    def _remove(self, entry_id: int, prepared: str, scope: str) -> None:
+        del self._entries[entry_id]
+        for band, key in enumerate(self._bucket_keys(prepared, self._shingles(prepared), scope)):
+            if self._buckets[band].get(key) == entry_id:
+                del self._buckets[band][key]
+
+    def get(self, question: str, scope: str = "") -> Optional[Tuple[str, float]]:
+        """
+        查找相似问题的回答
+
+        Args:
+            question: 用户问题
+            scope: 作用域（如模型与工具集合），不同作用域的条目互不命中
+
+        Returns:
+            (回答, 相似度)，未命中时返回None
+        """
+        prepared = self._prepare(question)
+        shingles = self._shingles(prepared)
+        keys = self._bucket_keys(prepared, shingles, scope)
+        now = time.time()
+
+        with self._lock:
+            best = None
+            for band, key in enumerate(keys):
+                entry_id = self._buckets[band].get(key)
+                if entry_id is None or (best is not None and best[0] == entry_id):
+                    continue
+                entry = self._entries.get(entry_id)
+                if entry is None or now - entry[3] >= self.ttl:
+                    continue
+                similarity = self._jaccard(shingles, self._shingles(entry[0]))
+                if similarity >= self.threshold and (best is None or similarity > best[2]):
+                    best = (entry_id, entry[2], similarity)
+
+            if best is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best[0])
+            self._stats["hits"] += 1
+            return best[1], best[2]
+
+    def put(self, question: str, answer: str, scope: str = "") -> None:
+        """缓存问题的回答"""
+        prepared = self._prepare(question)
+        keys = self._bucket_keys(prepared, self._shingles(prepared), scope)
+
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (prepared, scope, answer, time.time())
+            for band, key in enumerate(keys):
+                self._buckets[band][key] = entry_id
+
+            while len(self._entries) > self.capacity:
+                oldest_id, (oldest_prepared, oldest_scope, _, _) = next(iter(self._entries.items()))
+                self._remove(oldest_id, oldest_prepared, oldest_scope)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            for bucket in self._buckets:
+                bucket.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓存命中统计"""
+        with self._lock:
+            stats: Dict[str, Any] = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        stats["threshold"] = self.threshold
+        return stats
@@ -0,0 +1,648 @@
+"""
+会话存储
+
+提供可插拔的会话元数据存储和LangGraph检查点存储。默认使用SQLite（WAL模式）持久化，
+服务重启或多进程部署时会话不会丢失；前端维护有界的LRU内存缓存，热点会话无需每轮反序列化
+完整状态。多个进程共享同一数据库时，缓存命中前会用索引查询确认其仍是最新版本。
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Any, Callable, Iterator, AsyncIterator, List, Optional, Sequence, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    copy_checkpoint,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+from src.utils.logger import app_logger
+
+if TYPE_CHECKING:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+
+
+class SessionStore:
+    """会话元数据存储接口"""
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """获取会话，不存在时返回None"""
+        raise NotImplementedError
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        """保存（新增或更新）会话"""
+        raise NotImplementedError
+
+    def delete(self, session_id: str) -> bool:
+        """删除会话，返回会话是否存在"""
+        raise NotImplementedError
+
+    def record_turn(self, session_id: str, message_delta: int, last_activity: str) -> bool:
+        """原子地累加消息数并更新最后活跃时间，返回会话是否存在"""
+        raise NotImplementedError
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """遍历所有会话"""
+        raise NotImplementedError
+
+    def list_by_user(self, user_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """按创建顺序获取指定用户的所有会话，耗时与该用户的会话数成正比"""
+        raise NotImplementedError
+
+    def get_stats(self) -> Dict[str, int]:
+        """获取增量维护的会话统计（会话总数、用户数），O(1)"""
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return self.get_stats()["total_sessions"]
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str) -> Dict[str, Any]:
+        session = self.get(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
+
+
+class MemorySessionStore(SessionStore):
+    """基于字典的内存会话存储，进程重启后数据丢失"""
+
+    def __init__(self) -> None:
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        # 用户ID -> 会话ID（dict保持插入顺序，删除为O(1)）
+        self._user_index: Dict[str, Dict[str, None]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        return self._sessions.get(session_id)
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        with self._lock:
+            if session_id not in self._sessions:
+                self._user_index.setdefault(session["user_id"], {})[session_id] = None
+            self._sessions[session_id] = session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                return False
+
+            user_sessions = self._user_index.get(session["user_id"], {})
+            user_sessions.pop(session_id, None)
+            if not user_sessions:
+                self._user_index.pop(session["user_id"], None)
+            return True
+
+    def record_turn(self, session_id: str, message_delta: int, last_activity: str) -> bool:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return False
+            session["message_count"] = session.get("message_count", 0) + message_delta
+            session["last_activity"] = last_activity
+            return True
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return iter(list(self._sessions.items()))
+
+    def list_by_user(self, user_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            session_ids = list(self._user_index.get(user_id, ()))
+        return [
+            (session_id, self._sessions[session_id])
+            for session_id in session_ids
+            if session_id in self._sessions
+        ]
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "total_sessions": len(self._sessions),
+            "unique_users": len(self._user_index)
+        }
+
+
+class SqliteSessionStore(SessionStore):
+    """
+    基于SQLite（WAL模式）的会话存储，多个进程可共享同一个数据库文件
+
+    会话按 user_id 建立索引，会话总数、用户数以及每个用户的会话数保存在计数表中，
+    与会话的新增、删除在同一事务内更新，统计查询无需扫描全表。
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, "
+                "user_id TEXT NOT NULL, "
+                "data TEXT NOT NULL)"
+            )
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_user_id ON sessions (user_id)")
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_user_counts ("
+                "user_id TEXT PRIMARY KEY, "
+                "session_count INTEGER NOT NULL)"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_stats ("
+                "name TEXT PRIMARY KEY, "
+                "value INTEGER NOT NULL)"
+            )
+            self.conn.commit()
+        self._backfill_counters()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """开启写事务（BEGIN IMMEDIATE），保证多进程并发写入时计数准确"""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+    def _backfill_counters(self) -> None:
+        """为没有计数数据的旧数据库一次性生成计数"""
+        with self._transaction() as conn:
+            if conn.execute("SELECT COUNT(*) FROM session_stats").fetchone()[0]:
+                return
+            conn.execute("DELETE FROM session_user_counts")
+            conn.execute(
+                "INSERT INTO session_user_counts (user_id, session_count) "
+                "SELECT user_id, COUNT(*) FROM sessions GROUP BY user_id"
+            )
+            conn.execute(
+                "INSERT INTO session_stats (name, value) "
+                "SELECT 'total_sessions', COUNT(*) FROM sessions"
+            )
+            conn.execute(
+                "INSERT INTO session_stats (name, value) "
+                "SELECT 'unique_users', COUNT(*) FROM session_user_counts"
+            )
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        data = json.dumps(session, ensure_ascii=False)
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE sessions SET data = ? WHERE session_id = ?", (data, session_id)
+            ).rowcount
+            if updated:
+                return
+
+            # 新会话：写入会话并更新计数
+            user_id = session["user_id"]
+            conn.execute(
+                "INSERT INTO sessions (session_id, user_id, data) VALUES (?, ?, ?)",
+                (session_id, user_id, data)
+            )
+            conn.execute(
+                "INSERT INTO session_user_counts (user_id, session_count) VALUES (?, 1) "
+                "ON CONFLICT (user_id) DO UPDATE SET session_count = session_count + 1",
+                (user_id,)
+            )
+            user_session_count = conn.execute(
+                "SELECT session_count FROM session_user_counts WHERE user_id = ?", (user_id,)
+            ).fetchone()[0]
+            conn.execute("UPDATE session_stats SET value = value + 1 WHERE name = 'total_sessions'")
+            if user_session_count == 1:
+                conn.execute("UPDATE session_stats SET value = value + 1 WHERE name = 'unique_users'")
+
+    def delete(self, session_id: str) -> bool:
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT user_id FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return False
+
+            user_id = row[0]
+            conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            conn.execute(
+                "UPDATE session_user_counts SET session_count = session_count - 1 WHERE user_id = ?",
+                (user_id,)
+            )
+            conn.execute("UPDATE session_stats SET value = value - 1 WHERE name = 'total_sessions'")
+            removed_user = conn.execute(
+                "DELETE FROM session_user_counts WHERE user_id = ? AND session_count <= 0", (user_id,)
+            ).rowcount
+            if removed_user:
+                conn.execute("UPDATE session_stats SET value = value - 1 WHERE name = 'unique_users'")
+            return True
+
+    def record_turn(self, session_id: str, message_delta: int, last_activity: str) -> bool:
+        # 在单条UPDATE中完成读改写，多个进程同时更新同一会话时计数不会丢失
+        with self._transaction() as conn:
+            updated = conn.execute(
+                "UPDATE sessions SET data = json_set(data, "
+                "'$.message_count', COALESCE(json_extract(data, '$.message_count'), 0) + ?, "
+                "'$.last_activity', ?) "
+                "WHERE session_id = ?",
+                (message_delta, last_activity, session_id)
+            ).rowcount
+        return bool(updated)
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        with self.lock:
+            rows = self.conn.execute("SELECT session_id, data FROM sessions").fetchall()
+        return ((session_id, json.loads(data)) for session_id, data in rows)
+
+    def list_by_user(self, user_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT session_id, data FROM sessions WHERE user_id = ? ORDER BY rowid",
+                (user_id,)
+            ).fetchall()
+        return [(session_id, json.loads(data)) for session_id, data in rows]
+
+    def get_stats(self) -> Dict[str, int]:
+        with self.lock:
+            rows = self.conn.execute("SELECT name, value FROM session_stats").fetchall()
+        stats = {"total_sessions": 0, "unique_users": 0}
+        stats.update(dict(rows))
+        return stats
+
+
+class LRUSessionStore(SessionStore):
+    """
+    带有界LRU内存缓存的会话存储，写操作直接写穿到后端存储
+
+    缓存只保存会话创建后不再变化的字段（所属用户、创建时间），用于每轮对话的会话存在性检查；
+    消息数等可变字段始终从后端读取，多个进程共享后端时不会读到过期数据。
+    """
+
+    IMMUTABLE_FIELDS = ("user_id", "created_at")
+
+    def __init__(self, backend: SessionStore, capacity: int = 1024):
+        self.backend = backend
+        self.capacity = capacity
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _remember(self, session_id: str, session: Dict[str, Any]) -> None:
+        identity = {field: session.get(field) for field in self.IMMUTABLE_FIELDS}
+        with self._lock:
+            self._cache[session_id] = identity
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.capacity:
+                self._cache.popitem(last=False)
+
+    def _forget(self, session_id: str) -> None:
+        with self._lock:
+            self._cache.pop(session_id, None)
+
+    def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = self.backend.get(session_id)
+        if session is None:
+            self._forget(session_id)
+        else:
+            self._remember(session_id, session)
+        return session
+
+    def __contains__(self, session_id: str) -> bool:
+        """
+        缓存命中时不访问后端，会话被其他进程删除后可能仍返回True（下次 record_turn 失败时移出缓存）；
+        需要读取会话内容的调用方应使用 get()，并把None视为不存在
+        """
+        with self._lock:
+            if session_id in self._cache:
+                self._cache.move_to_end(session_id)
+                return True
+        return self.get(session_id) is not None
+
+    def save(self, session_id: str, session: Dict[str, Any]) -> None:
+        self.backend.save(session_id, session)
+        self._remember(session_id, session)
+
+    def delete(self, session_id: str) -> bool:
+        self._forget(session_id)
+        return self.backend.delete(session_id)
+
+    def record_turn(self, session_id: str, message_delta: int, last_activity: str) -> bool:
+        recorded = self.backend.record_turn(session_id, message_delta, last_activity)
+        if not recorded:
+            # 会话已被其他进程删除
+            self._forget(session_id)
+        return recorded
+
+    def items(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        return self.backend.items()
+
+    def list_by_user(self, user_id: str) -> List[Tuple[str, Dict[str, Any]]]:
+        return self.backend.list_by_user(user_id)
+
+    def get_stats(self) -> Dict[str, int]:
+        return self.backend.get_stats()
+
+
+class CachedCheckpointSaver(BaseCheckpointSaver):
+    """
+    带LRU热缓存的检查点存储
+
+    包装任意同步检查点存储（如SqliteSaver），缓存每个会话线程的最新检查点，
+    热点会话读取最新状态时无需反序列化完整检查点。异步接口在线程中调用后端，
+    使仅支持同步接口的后端也能用于ainvoke/astream。
+
+    多个进程共享同一后端时，需要提供 latest_checkpoint_id 探测函数：缓存命中前先查询
+    该线程在后端的最新检查点ID，不一致（其他进程已写入新检查点）时重新从后端加载。
+    未提供探测函数时假定只有当前进程写入该后端。
+    """
+
+    def __init__(
+        self,
+        backend: BaseCheckpointSaver,
+        capacity: int = 1024,
+        latest_checkpoint_id: Optional[Callable[[str, str], Optional[str]]] = None
+    ):
+        super().__init__(serde=backend.serde)
+        self.backend = backend
+        self.capacity = capacity
+        self.latest_checkpoint_id = latest_checkpoint_id
+        self._latest: "OrderedDict[Tuple[str, str], CheckpointTuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _cache_key(self, config: RunnableConfig) -> Tuple[str, str]:
+        configurable = config["configurable"]
+        return (str(configurable["thread_id"]), configurable.get("checkpoint_ns", ""))
+
+    def _cached_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """获取缓存的最新检查点，请求的是历史检查点时返回None"""
+        with self._lock:
+            cached = self._latest.get(self._cache_key(config))
+            if cached is None:
+                return None
+            checkpoint_id = config["configurable"].get("checkpoint_id")
+            if checkpoint_id and checkpoint_id != cached.checkpoint["id"]:
+                return None
+
+        if not checkpoint_id and self.latest_checkpoint_id is not None:
+            # 确认缓存仍是后端中的最新检查点
+            if self.latest_checkpoint_id(*self._cache_key(config)) != cached.checkpoint["id"]:
+                self._forget(config)
+                return None
+
+        with self._lock:
+            if self._cache_key(config) in self._latest:
+                self._latest.move_to_end(self._cache_key(config))
+        return cached
+
+    def _remember(self, key: Tuple[str, str], checkpoint_tuple: CheckpointTuple) -> None:
+        with self._lock:
+            self._latest[key] = checkpoint_tuple
+            self._latest.move_to_end(key)
+            while len(self._latest) > self.capacity:
+                self._latest.popitem(last=False)
+
+    def _forget(self, config: RunnableConfig) -> None:
+        with self._lock:
+            self._latest.pop(self._cache_key(config), None)
+
+    def _forget_thread(self, thread_id: str) -> None:
+        with self._lock:
+            for key in [key for key in self._latest if key[0] == str(thread_id)]:
+                del self._latest[key]
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        cached = self._cached_tuple(config)
+        if cached is not None:
+            return cached
+
+        checkpoint_tuple = self.backend.get_tuple(config)
+        if checkpoint_tuple is not None and not config["configurable"].get("checkpoint_id"):
+            self._remember(self._cache_key(config), checkpoint_tuple)
+        return checkpoint_tuple
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        return self.backend.list(config, filter=filter, before=before, limit=limit)
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved_config = self.backend.put(config, checkpoint, metadata, new_versions)
+
+        # 新写入的检查点即为该线程的最新状态，直接放入缓存
+        parent_checkpoint_id = config["configurable"].get("checkpoint_id")
+        parent_config: Optional[RunnableConfig] = None
+        if parent_checkpoint_id:
+            parent_config = {
+                "configurable": {
+                    "thread_id": saved_config["configurable"]["thread_id"],
+                    "checkpoint_ns": saved_config["configurable"].get("checkpoint_ns", ""),
+                    "checkpoint_id": parent_checkpoint_id,
+                }
+            }
+        self._remember(
+            self._cache_key(saved_config),
+            CheckpointTuple(
+                config=saved_config,
+                checkpoint=copy_checkpoint(checkpoint),
+                metadata=get_checkpoint_metadata(config, metadata),
+                parent_config=parent_config,
+                pending_writes=[],
+            )
+        )
+        return saved_config
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.backend.put_writes(config, writes, task_id, task_path)
+        # 缓存的检查点不包含待写入数据，下次读取时从后端加载完整状态
+        self._forget(config)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.backend.delete_thread(thread_id)
+        self._forget_thread(thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        version: str = self.backend.get_next_version(current, channel)
+        return version
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        # 新鲜度探测同样会访问数据库，整体放到线程中执行
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _connect_sqlite(db_path: str) -> sqlite3.Connection:
+    """创建WAL模式的SQLite连接"""
+    if db_path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    # 连接在线程池中共享，存储类内部通过锁保证串行访问
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _sqlite_latest_checkpoint_probe(saver: "SqliteSaver") -> Callable[[str, str], Optional[str]]:
+    """创建查询SqliteSaver中线程最新检查点ID的探测函数（走主键索引，不读取检查点内容）"""
+    def latest_checkpoint_id(thread_id: str, checkpoint_ns: str) -> Optional[str]:
+        with saver.lock:
+            row = saver.conn.execute(
+                "SELECT checkpoint_id FROM checkpoints "
+                "WHERE thread_id = ? AND checkpoint_ns = ? "
+                "ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns)
+            ).fetchone()
+        return row[0] if row else None
+    return latest_checkpoint_id
+
+
+def _check_backend(backend: str) -> None:
+    if backend not in ("sqlite", "memory"):
+        raise ValueError(f"不支持的会话存储后端: {backend}")
+
+
+def create_session_store(
+    backend: str = "sqlite",
+    db_path: str = "data/sessions.db",
+    cache_size: int = 1024
+) -> SessionStore:
+    """
+    创建会话元数据存储
+
+    Args:
+        backend: 存储后端，支持 "sqlite" 和 "memory"
+        db_path: SQLite数据库文件路径
+        cache_size: LRU热缓存中保留的会话数量
+
+    Returns:
+        会话存储
+    """
+    _check_backend(backend)
+    if backend == "memory":
+        return MemorySessionStore()
+    return LRUSessionStore(SqliteSessionStore(_connect_sqlite(db_path)), capacity=cache_size)
+
+
+def create_checkpointer(
+    backend: str = "sqlite",
+    db_path: str = "data/sessions.db",
+    cache_size: int = 1024
+) -> BaseCheckpointSaver:
+    """
+    创建状态图检查点存储
+
+    Args:
+        backend: 存储后端，支持 "sqlite" 和 "memory"
+        db_path: SQLite数据库文件路径
+        cache_size: LRU热缓存中保留的会话数量
+
+    Returns:
+        检查点存储
+    """
+    _check_backend(backend)
+    if backend == "memory":
+        # 内存后端本身即为热存储，无需额外的检查点缓存
+        return InMemorySaver()
+
+    try:
+        from langgraph.checkpoint.sqlite import SqliteSaver
+    except ImportError as e:
+        raise ImportError(
+            "SQLite会话存储需要安装 langgraph-checkpoint-sqlite: uv add langgraph-checkpoint-sqlite"
+        ) from e
+
+    checkpointer = SqliteSaver(_connect_sqlite(db_path))
+    checkpointer.setup()
+    return CachedCheckpointSaver(
+        checkpointer,
+        capacity=cache_size,
+        latest_checkpoint_id=_sqlite_latest_checkpoint_probe(checkpointer)
+    )
+
+
+def create_session_backend(
+    backend: str = "sqlite",
+    db_path: str = "data/sessions.db",
+    cache_size: int = 1024
+) -> Tuple[SessionStore, BaseCheckpointSaver]:
+    """
+    创建会话存储和检查点存储
+
+    Args:
+        backend: 存储后端，支持 "sqlite" 和 "memory"
+        db_path: SQLite数据库文件路径
+        cache_size: LRU热缓存中保留的会话数量
+
+    Returns:
+        (会话存储, 检查点存储) 元组
+    """
+    session_store = create_session_store(backend, db_path, cache_size)
+    checkpointer = create_checkpointer(backend, db_path, cache_size)
+    app_logger.info(f"会话存储初始化完成: 后端={backend}, 热缓存容量={cache_size}")
+    return session_store, checkpointer
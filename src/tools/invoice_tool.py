@@ -2,26 +2,77 @@
 发票开具工具
 
 此工具用于处理发票开具相关的请求，包括创建发票、查询发票状态和获取发票详情。
+发票以紧凑记录的形式分片保存（见 src/services/invoice_store.py），只在返回给调用方时转换为字典。
+不同分片上的写入互不阻塞；列出发票时各分片按 (开票日期, 发票ID) 倒序取出一页后归并，
+支持游标分页，每页的开销为 O(分片数 × (log n + 返回条数))。
+批量开票时全部商品一次校验、一次算出金额，发票ID一次取出一段，全部校验通过后才写入。
+按客户、状态、开票月份的汇总随写入增量维护，汇总查询的开销只与分片数有关，与发票数量无关。
 """
 
+import dataclasses
+import heapq
+import itertools
+import time
 import uuid
 import json
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+from collections import ChainMap
+from contextlib import ExitStack
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, List, Mapping, Optional
+from src.services.invoice_store import (
+    STATUS_CODES,
+    STATUS_DESCRIPTIONS,
+    STATUSES,
+    InvoiceRecord,
+    InvoiceShard,
+    InvoiceTotals,
+    decode_cursor,
+    encode_cursor,
+    first_invalid_item,
+    to_yuan,
+)
 from src.utils.logger import app_logger
 
 class InvoiceManager:
     """发票管理器"""
     
-    def __init__(self):
-        """初始化发票管理器"""
-        self.invoices = {}  # 存储发票数据
-        self.invoice_counter = 1000  # 发票计数器
+    # 一次批量开票的最大发票数量
+    MAX_BULK_SIZE = 1000
+    
+    def __init__(self, shard_count: int = 16):
+        """
+        初始化发票管理器
+        
+        Args:
+            shard_count: 分片数量，并发写入的线程越多，分片应越多
+        """
+        self._shards = [InvoiceShard() for _ in range(shard_count)]
+        # itertools.count 的 next() 在C层面一次完成，多线程并发取号时不会重复，也无需加锁
+        self._invoice_counter = itertools.count(1001)  # 发票计数器
+    
+    @property
+    def invoices(self) -> Mapping[str, InvoiceRecord]:
+        """全部发票记录的只读视图（发票ID -> 发票记录）"""
+        return ChainMap(*(shard.invoices for shard in self._shards))
+    
+    def _shard_for(self, invoice_id: str) -> InvoiceShard:
+        return self._shards[hash(invoice_id) % len(self._shards)]
+    
+    def _get_invoice(self, invoice_id: str) -> Optional[InvoiceRecord]:
+        # 字典的单次读取是原子的，记录不可变，读取无需加锁
+        return self._shard_for(invoice_id).invoices.get(invoice_id)
     
     def generate_invoice_id(self) -> str:
         """生成发票ID"""
-        self.invoice_counter += 1
-        return f"INV{datetime.now().strftime('%Y%m%d')}{self.invoice_counter:04d}"
+        return f"INV{datetime.now().strftime('%Y%m%d')}{next(self._invoice_counter):04d}"
+    
+    def generate_invoice_ids(self, count: int) -> List[str]:
+        """一次生成多个发票ID"""
+        # islice 在C层面一次取出 count 个号码，不会与其他线程的取号交错
+        numbers = list(islice(self._invoice_counter, count))
+        prefix = f"INV{datetime.now().strftime('%Y%m%d')}"
+        return [f"{prefix}{number:04d}" for number in numbers]
     
     def create_invoice(
         self, 
@@ -73,54 +124,25 @@ class InvoiceManager:
             # 处理开票日期
             if issue_date:
                 try:
-                    parsed_date = datetime.strptime(issue_date, "%Y-%m-%d")
+                    parsed_date = datetime.strptime(issue_date, "%Y-%m-%d").date()
                 except ValueError:
                     return {
                         "success": False,
                         "error": "开票日期格式不正确，请使用YYYY-MM-DD格式"
                     }
             else:
-                parsed_date = datetime.now()
-                issue_date = parsed_date.strftime("%Y-%m-%d")
+                parsed_date = datetime.now().date()
             
             # 生成发票ID
             invoice_id = self.generate_invoice_id()
             
-            # 计算总金额
-            total_amount = 0.0
-            for item in items:
-                item_total = item["quantity"] * item["unit_price"]
-                item["total"] = round(item_total, 2)
-                total_amount += item_total
-            
-            total_amount = round(total_amount, 2)
-            
-            # 计算税额（假设税率为13%）
-            tax_rate = 0.13
-            tax_amount = round(total_amount * tax_rate, 2)
-            
-            # 计算价税合计
-            total_with_tax = round(total_amount + tax_amount, 2)
-            
-            # 创建发票记录
-            invoice = {
-                "invoice_id": invoice_id,
-                "customer_name": customer_name,
-                "customer_tax_id": customer_tax_id,
-                "items": items,
-                "issue_date": issue_date,
-                "due_date": (parsed_date + timedelta(days=30)).strftime("%Y-%m-%d"),
-                "subtotal": total_amount,
-                "tax_rate": tax_rate,
-                "tax_amount": tax_amount,
-                "total_with_tax": total_with_tax,
-                "status": "issued",
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat()
-            }
+            # 创建发票记录：金额按整数分计算，税率13%
+            invoice = InvoiceRecord.create(invoice_id, customer_name, customer_tax_id, items, parsed_date, time.time())
             
             # 保存发票
-            self.invoices[invoice_id] = invoice
+            shard = self._shard_for(invoice_id)
+            with shard.lock:
+                shard.add(invoice)
             
             app_logger.info(f"创建发票成功: {invoice_id}")
             
@@ -128,7 +150,7 @@ class InvoiceManager:
                 "success": True,
                 "invoice_id": invoice_id,
                 "message": f"发票 {invoice_id} 创建成功",
-                "invoice": invoice
+                "invoice": invoice.to_dict()
             }
         except Exception as e:
             app_logger.error(f"创建发票时出错: {str(e)}")
@@ -137,6 +159,122 @@ class InvoiceManager:
                 "error": f"创建发票时出错: {str(e)}"
             }
     
+    def create_invoices_bulk(self, requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        批量创建发票，全部校验通过后才写入，任意一张无效时不创建任何发票
+        
+        Args:
+            requests: 开票请求列表，每个请求包含 customer_name、customer_tax_id、items
+                和可选的 issue_date，含义同 create_invoice
+            
+        Returns:
+            包含创建结果的字典，失败时 error 中指明第几张发票无效
+        """
+        try:
+            if not requests:
+                return {
+                    "success": False,
+                    "error": "开票请求列表不能为空"
+                }
+            
+            if len(requests) > self.MAX_BULK_SIZE:
+                return {
+                    "success": False,
+                    "error": f"一次最多批量开具 {self.MAX_BULK_SIZE} 张发票"
+                }
+            
+            # 逐张检查必填字段并解析开票日期
+            today = datetime.now().date()
+            parsed_dates = {}
+            issue_dates = []
+            item_owners = []
+            for position, request in enumerate(requests):
+                label = f"第 {position + 1} 张发票"
+                if not request.get("customer_name") or not request.get("customer_tax_id"):
+                    return {
+                        "success": False,
+                        "error": f"{label}: 客户名称和税号不能为空"
+                    }
+                
+                items = request.get("items")
+                if not items:
+                    return {
+                        "success": False,
+                        "error": f"{label}: 商品列表不能为空"
+                    }
+                
+                for item in items:
+                    if "name" not in item or "quantity" not in item or "unit_price" not in item:
+                        return {
+                            "success": False,
+                            "error": f"{label}: 商品信息不完整，必须包含名称、数量和单价"
+                        }
+                item_owners.extend([position] * len(items))
+                
+                issue_date = request.get("issue_date")
+                if not issue_date:
+                    issue_dates.append(today)
+                    continue
+                if issue_date not in parsed_dates:
+                    try:
+                        parsed_dates[issue_date] = datetime.strptime(issue_date, "%Y-%m-%d").date()
+                    except ValueError:
+                        return {
+                            "success": False,
+                            "error": f"{label}: 开票日期格式不正确，请使用YYYY-MM-DD格式"
+                        }
+                issue_dates.append(parsed_dates[issue_date])
+            
+            # 全部商品的数量和单价一次校验
+            all_items = [item for request in requests for item in request["items"]]
+            try:
+                invalid = first_invalid_item(
+                    [item["quantity"] for item in all_items],
+                    [item["unit_price"] for item in all_items]
+                )
+            except (TypeError, ValueError):
+                return {
+                    "success": False,
+                    "error": "商品数量和单价必须为数字"
+                }
+            if invalid >= 0:
+                return {
+                    "success": False,
+                    "error": f"第 {item_owners[invalid] + 1} 张发票: 商品数量和单价必须大于0"
+                }
+            
+            # 一次取出一段发票ID，金额按整数分一次算出
+            invoice_ids = self.generate_invoice_ids(len(requests))
+            records = InvoiceRecord.create_many(invoice_ids, requests, issue_dates, time.time())
+            
+            # 按分片顺序获取涉及的全部分片锁后一次写入，其他写入不会与本批交错，也不会死锁
+            by_shard: Dict[int, List[InvoiceRecord]] = {}
+            for record in records:
+                by_shard.setdefault(hash(record.invoice_id) % len(self._shards), []).append(record)
+            with ExitStack() as stack:
+                for index in sorted(by_shard):
+                    stack.enter_context(self._shards[index].lock)
+                for index, shard_records in by_shard.items():
+                    for record in shard_records:
+                        self._shards[index].add(record)
+            
+            app_logger.info(f"批量创建发票成功: {len(records)} 张，{invoice_ids[0]} ~ {invoice_ids[-1]}")
+            
+            return {
+                "success": True,
+                "invoice_ids": invoice_ids,
+                "message": f"成功创建 {len(records)} 张发票",
+                "invoices": [record.summary() for record in records],
+                "total_count": len(records),
+                "total_with_tax": to_yuan(sum(record.total_cents for record in records))
+            }
+        except Exception as e:
+            app_logger.error(f"批量创建发票时出错: {str(e)}")
+            return {
+                "success": False,
+                "error": f"批量创建发票时出错: {str(e)}"
+            }
+    
     def query_invoice_status(self, invoice_id: str) -> Dict[str, Any]:
         """
         查询发票状态
@@ -155,7 +293,7 @@ class InvoiceManager:
                 }
             
             # 查找发票
-            invoice = self.invoices.get(invoice_id)
+            invoice = self._get_invoice(invoice_id)
             
             if not invoice:
                 return {
@@ -164,26 +302,19 @@ class InvoiceManager:
                 }
             
             # 获取状态描述
-            status_descriptions = {
-                "issued": "已开具",
-                "sent": "已发送",
-                "paid": "已支付",
-                "overdue": "已逾期",
-                "cancelled": "已取消"
-            }
+            status_description = STATUS_DESCRIPTIONS.get(invoice.status, invoice.status)
             
-            status_description = status_descriptions.get(invoice["status"], invoice["status"])
-            
-            app_logger.info(f"查询发票状态: {invoice_id}, 状态: {invoice['status']}")
+            app_logger.info(f"查询发票状态: {invoice_id}, 状态: {invoice.status}")
             
             return {
                 "success": True,
                 "invoice_id": invoice_id,
-                "status": invoice["status"],
+                "status": invoice.status,
                 "status_description": status_description,
-                "issue_date": invoice["issue_date"],
-                "due_date": invoice["due_date"],
-                "total_with_tax": invoice["total_with_tax"]
+                "issue_date": invoice.issue_date,
+                "due_date": invoice.due_date,
+                "total_with_tax": to_yuan(invoice.total_cents),
+                "version": invoice.version
             }
         except Exception as e:
             app_logger.error(f"查询发票状态时出错: {str(e)}")
@@ -210,7 +341,7 @@ class InvoiceManager:
                 }
             
             # 查找发票
-            invoice = self.invoices.get(invoice_id)
+            invoice = self._get_invoice(invoice_id)
             
             if not invoice:
                 return {
@@ -222,7 +353,7 @@ class InvoiceManager:
             
             return {
                 "success": True,
-                "invoice": invoice
+                "invoice": invoice.to_dict()
             }
         except Exception as e:
             app_logger.error(f"获取发票详情时出错: {str(e)}")
@@ -231,13 +362,20 @@ class InvoiceManager:
                 "error": f"获取发票详情时出错: {str(e)}"
             }
     
-    def update_invoice_status(self, invoice_id: str, new_status: str) -> Dict[str, Any]:
+    def update_invoice_status(
+        self,
+        invoice_id: str,
+        new_status: str,
+        expected_version: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         更新发票状态
         
         Args:
             invoice_id: 发票ID
             new_status: 新状态
+            expected_version: 期望的当前版本号（可选，来自查询结果中的 version），
+                发票在此期间已被其他请求修改时更新失败，返回 conflict 和最新版本号
             
         Returns:
             包含更新结果的字典
@@ -256,15 +394,14 @@ class InvoiceManager:
                 }
             
             # 验证状态
-            valid_statuses = ["issued", "sent", "paid", "overdue", "cancelled"]
-            if new_status not in valid_statuses:
+            if new_status not in STATUS_CODES:
                 return {
                     "success": False,
-                    "error": f"无效的状态，有效状态为: {', '.join(valid_statuses)}"
+                    "error": f"无效的状态，有效状态为: {', '.join(STATUSES)}"
                 }
             
             # 查找发票
-            invoice = self.invoices.get(invoice_id)
+            invoice = self._get_invoice(invoice_id)
             
             if not invoice:
                 return {
@@ -272,10 +409,25 @@ class InvoiceManager:
                     "error": f"发票 {invoice_id} 不存在"
                 }
             
-            # 更新状态
-            old_status = invoice["status"]
-            invoice["status"] = new_status
-            invoice["updated_at"] = datetime.now().isoformat()
+            # 更新状态：在分片锁内比较版本号并替换为新记录，不修改读取方可能持有的旧记录
+            shard = self._shard_for(invoice_id)
+            with shard.lock:
+                invoice = shard.invoices[invoice_id]
+                if expected_version is not None and invoice.version != expected_version:
+                    return {
+                        "success": False,
+                        "conflict": True,
+                        "current_version": invoice.version,
+                        "error": f"发票 {invoice_id} 已被其他请求修改（当前版本 {invoice.version}），请重新查询后再更新"
+                    }
+                old_status = invoice.status
+                invoice = dataclasses.replace(
+                    invoice,
+                    status_code=STATUS_CODES[new_status],
+                    version=invoice.version + 1,
+                    updated_at=time.time()
+                )
+                shard.replace(invoice, STATUS_CODES[old_status])
             
             app_logger.info(f"更新发票状态: {invoice_id}, 从 {old_status} 到 {new_status}")
             
@@ -284,7 +436,8 @@ class InvoiceManager:
                 "invoice_id": invoice_id,
                 "message": f"发票 {invoice_id} 状态已从 {old_status} 更新为 {new_status}",
                 "old_status": old_status,
-                "new_status": new_status
+                "new_status": new_status,
+                "version": invoice.version
             }
         except Exception as e:
             app_logger.error(f"更新发票状态时出错: {str(e)}")
@@ -297,55 +450,48 @@ class InvoiceManager:
         self, 
         customer_name: Optional[str] = None, 
         status: Optional[str] = None,
-        limit: int = 10
+        limit: int = 10,
+        cursor: Optional[str] = None
     ) -> Dict[str, Any]:
         """
-        列出发票
+        按开票日期倒序列出发票
         
         Args:
-            customer_name: 客户名称（可选）
+            customer_name: 客户名称（可选），不区分大小写的子串匹配
             status: 发票状态（可选）
-            limit: 返回的最大数量
+            limit: 返回的最大数量，不大于0时返回全部
+            cursor: 分页游标（可选），传入上一页结果中的 next_cursor 获取下一页
             
         Returns:
-            包含发票列表的字典
+            包含发票列表的字典，还有更多发票时 next_cursor 不为空
         """
         try:
-            # 筛选发票
-            filtered_invoices = []
+            before = decode_cursor(cursor) if cursor else None
+            query = customer_name.casefold() if customer_name else ""
+            status_code = STATUS_CODES.get(status, -1) if status else None
             
-            for invoice_id, invoice in self.invoices.items():
-                # 按客户名称筛选
-                if customer_name and customer_name.lower() not in invoice["customer_name"].lower():
-                    continue
-                
-                # 按状态筛选
-                if status and invoice["status"] != status:
-                    continue
-                
-                # 添加到结果列表
-                filtered_invoices.append({
-                    "invoice_id": invoice_id,
-                    "customer_name": invoice["customer_name"],
-                    "issue_date": invoice["issue_date"],
-                    "due_date": invoice["due_date"],
-                    "total_with_tax": invoice["total_with_tax"],
-                    "status": invoice["status"]
-                })
-            
-            # 按开票日期降序排序
-            filtered_invoices.sort(key=lambda x: x["issue_date"], reverse=True)
-            
-            # 限制结果数量
-            if limit > 0:
-                filtered_invoices = filtered_invoices[:limit]
+            # 各分片取出一页后按 (开票日期, 发票ID) 倒序归并；多取一条用于判断是否还有下一页
+            fetch = limit + 1 if limit > 0 else 0
+            shard_pages = [shard.page(status_code, query, before, fetch) for shard in self._shards]
+            merged = heapq.merge(*shard_pages, key=lambda entry: entry[0], reverse=True)
+            page = list(islice(merged, fetch)) if fetch else list(merged)
+            has_more = limit > 0 and len(page) > limit
+            page = page[:limit] if has_more else page
+            
+            filtered_invoices = [invoice.summary() for _, invoice in page]
             
             app_logger.info(f"列出发票，筛选条件: 客户={customer_name}, 状态={status}, 返回数量={len(filtered_invoices)}")
             
             return {
                 "success": True,
                 "invoices": filtered_invoices,
-                "total_count": len(filtered_invoices)
+                "total_count": len(filtered_invoices),
+                "next_cursor": encode_cursor(page[-1][0]) if has_more else None
+            }
+        except ValueError as e:
+            return {
+                "success": False,
+                "error": str(e)
             }
         except Exception as e:
             app_logger.error(f"列出发票时出错: {str(e)}")
@@ -354,6 +500,94 @@ class InvoiceManager:
                 "error": f"列出发票时出错: {str(e)}"
             }
 
+    def invoice_summary(
+        self,
+        customer_name: Optional[str] = None,
+        status: Optional[str] = None,
+        month: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        汇总发票张数和金额，一次按一个维度汇总
+        
+        Args:
+            customer_name: 客户名称（可选），与开票时的名称完全一致（不区分大小写）
+            status: 发票状态（可选）
+            month: 开票月份（可选），格式为YYYY-MM
+            
+        Returns:
+            包含汇总结果的字典；不指定条件时返回全部发票的汇总及按状态的分布
+        """
+        try:
+            filters = [value for value in (customer_name, status, month) if value]
+            if len(filters) > 1:
+                return {
+                    "success": False,
+                    "error": "一次只能按客户名称、状态或开票月份中的一个条件汇总"
+                }
+            
+            if status and status not in STATUS_CODES:
+                return {
+                    "success": False,
+                    "error": f"无效的状态，有效状态为: {', '.join(STATUSES)}"
+                }
+            
+            if month:
+                try:
+                    month = datetime.strptime(month, "%Y-%m").strftime("%Y-%m")
+                except ValueError:
+                    return {
+                        "success": False,
+                        "error": "开票月份格式不正确，请使用YYYY-MM格式"
+                    }
+            
+            # 汇总维度及其键：客户名、状态码或开票月份
+            dimension: Optional[str]
+            key: Any
+            if customer_name:
+                dimension, key = "customer", customer_name.casefold()
+            elif status:
+                dimension, key = "status", STATUS_CODES[status]
+            elif month:
+                dimension, key = "month", month
+            else:
+                dimension, key = None, None
+            
+            # 各分片的汇总在分片锁内读取后相加
+            totals = InvoiceTotals()
+            by_status = {code: InvoiceTotals() for code in range(len(STATUSES))}
+            for shard in self._shards:
+                with shard.lock:
+                    if dimension:
+                        totals.merge(shard.totals[dimension].get(key))
+                    else:
+                        for code, status_totals in shard.totals["status"].items():
+                            by_status[code].merge(status_totals)
+            
+            result: Dict[str, Any] = {
+                "success": True,
+                "customer_name": customer_name,
+                "status": status,
+                "month": month
+            }
+            if dimension is None:
+                for status_totals in by_status.values():
+                    totals.merge(status_totals)
+                result["by_status"] = {
+                    STATUSES[code]: status_totals.to_dict()
+                    for code, status_totals in by_status.items() if status_totals.count
+                }
+            result.update(totals.to_dict())
+            
+            app_logger.info(f"汇总发票，筛选条件: 客户={customer_name}, 状态={status}, 月份={month}, 张数={totals.count}")
+            
+            return result
+        except Exception as e:
+            app_logger.error(f"汇总发票时出错: {str(e)}")
+            return {
+                "success": False,
+                "error": f"汇总发票时出错: {str(e)}"
+            }
+
 # 创建全局发票管理器实例
 invoice_manager = InvoiceManager()
 
@@ -384,6 +618,28 @@ def create_invoice(
     else:
         return f"发票创建失败: {result['error']}"
 
+def create_invoices_bulk(invoices: List[Dict[str, Any]]) -> str:
+    """
+    批量创建发票，为多个订单或客户一次开具多张发票，任意一张信息有误时全部不开具
+    
+    Args:
+        invoices: 发票列表，每张发票包含 customer_name（客户名称）、customer_tax_id（客户税号）、
+            items（商品列表，每个商品包含名称、数量、单价）和可选的 issue_date（YYYY-MM-DD）
+        
+    Returns:
+        创建结果的消息
+    """
+    result = invoice_manager.create_invoices_bulk(invoices)
+    
+    if result["success"]:
+        invoices_str = "\n".join([
+            f"- {inv['invoice_id']}: {inv['customer_name']}, {inv['total_with_tax']}元"
+            for inv in result["invoices"]
+        ])
+        return f"{result['message']}，合计 {result['total_with_tax']}元:\n{invoices_str}"
+    else:
+        return f"批量创建发票失败: {result['error']}"
+
 def query_invoice_status(invoice_id: str) -> str:
     """
     查询发票状态
@@ -458,20 +714,22 @@ def update_invoice_status(invoice_id: str, new_status: str) -> str:
 def list_invoices(
     customer_name: Optional[str] = None, 
     status: Optional[str] = None,
-    limit: int = 10
+    limit: int = 10,
+    cursor: Optional[str] = None
 ) -> str:
     """
-    列出发票
+    按开票日期倒序列出发票
     
     Args:
         customer_name: 客户名称（可选）
         status: 发票状态（可选）
         limit: 返回的最大数量
+        cursor: 分页游标（可选），查看下一页时传入上次结果中的游标
         
     Returns:
         发票列表信息
     """
-    result = invoice_manager.list_invoices(customer_name, status, limit)
+    result = invoice_manager.list_invoices(customer_name, status, limit, cursor)
     
     if result["success"]:
         if not result["invoices"]:
@@ -482,6 +740,48 @@ def list_invoices(
             for inv in result["invoices"]
         ])
         
-        return f"找到 {result['total_count']} 张发票:\n{invoices_str}"
+        message = f"找到 {result['total_count']} 张发票:\n{invoices_str}"
+        if result["next_cursor"]:
+            message += f"\n还有更多发票，查看下一页请使用游标: {result['next_cursor']}"
+        return message
+    else:
+        return f"列出发票失败: {result['error']}"
+
+def invoice_summary(
+    customer_name: Optional[str] = None,
+    status: Optional[str] = None,
+    month: Optional[str] = None
+) -> str:
+    """
+    汇总发票张数和金额，回答"这个月开了多少发票""某客户的发票总金额"等问题，
+    客户名称、状态、开票月份一次只能指定一个
+    
+    Args:
+        customer_name: 客户名称（可选）
+        status: 发票状态（可选）
+        month: 开票月份（可选），格式为YYYY-MM
+        
+    Returns:
+        汇总信息
+    """
+    result = invoice_manager.invoice_summary(customer_name, status, month)
+    
+    if result["success"]:
+        if customer_name:
+            scope = f"客户 {customer_name} 的发票"
+        elif status:
+            scope = f"状态为{STATUS_DESCRIPTIONS[status]}的发票"
+        elif month:
+            scope = f"{result['month']} 开具的发票"
+        else:
+            scope = "全部发票"
+        message = (f"{scope}共 {result['count']} 张，不含税金额 {result['subtotal']}元，"
+                   f"税额 {result['tax_amount']}元，价税合计 {result['total_with_tax']}元")
+        if result.get("by_status"):
+            message += "\n" + "\n".join([
+                f"- {STATUS_DESCRIPTIONS[name]}: {totals['count']} 张，{totals['total_with_tax']}元"
+                for name, totals in result["by_status"].items()
+            ])
+        return message
     else:
-        return f"列出发票失败: {result['error']}"
\ No newline at end of file
+        return f"汇总发票失败: {result['error']}"
\ No newline at end of file
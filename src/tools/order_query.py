@@ -1,50 +1,45 @@
 """
 订单查询工具
 """
-from typing import Dict, Any
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Tuple
+import asyncio
 import random
+import time
 from datetime import datetime, timedelta
 
+from src.core.config import config
+from src.services.order_cache import OrderCache
+from src.services.order_repository import MemoryOrderRepository, OrderRepository, create_order_repository
+
 class OrderQueryTool:
     """订单查询工具类"""
     
-    def __init__(self):
-        # 模拟订单数据库
-        self.orders_db = {
-            "ORD202311001": {
-                "order_id": "ORD202311001",
-                "status": "已发货",
-                "product_name": "智能手表",
-                "order_date": "2023-11-05",
-                "estimated_delivery": "2023-11-08",
-                "tracking_number": "SF1234567890",
-                "logistics_company": "顺丰快递",
-                "logistics_status": "运输中",
-                "current_location": "上海转运中心"
-            },
-            "ORD202311002": {
-                "order_id": "ORD202311002",
-                "status": "已签收",
-                "product_name": "无线耳机",
-                "order_date": "2023-11-03",
-                "delivery_date": "2023-11-06",
-                "tracking_number": "YT9876543210",
-                "logistics_company": "圆通快递",
-                "logistics_status": "已签收",
-                "current_location": "已送达"
-            },
-            "ORD202311003": {
-                "order_id": "ORD202311003",
-                "status": "处理中",
-                "product_name": "智能音箱",
-                "order_date": "2023-11-07",
-                "estimated_delivery": "2023-11-12",
-                "tracking_number": None,
-                "logistics_company": None,
-                "logistics_status": "仓库处理中",
-                "current_location": "北京仓库"
-            }
-        }
+    # 单次批量查询最多包含的订单数量
+    MAX_BATCH_SIZE = 50
+    
+    def __init__(
+        self,
+        repository: Optional[OrderRepository] = None,
+        simulated_latency: Optional[float] = None,
+        cache: Optional[OrderCache] = None
+    ):
+        """
+        初始化订单查询工具
+        
+        Args:
+            repository: 订单仓储，默认按 ORDER_BACKEND 配置创建
+            simulated_latency: 模拟的后端查询延迟（秒），默认内存仓储为0.5秒，真实仓储为0
+            cache: 订单读穿缓存，默认在 ORDER_CACHE_ENABLED 时按配置创建
+        """
+        if repository is None:
+            repository = create_order_repository(config.ORDER_BACKEND, config.ORDER_DB_PATH, config.ORDER_DB_POOL_SIZE)
+        self.repository = repository
+        if simulated_latency is None:
+            simulated_latency = 0.5 if isinstance(repository, MemoryOrderRepository) else 0.0
+        self.simulated_latency = simulated_latency
+        if cache is None and config.ORDER_CACHE_ENABLED:
+            cache = OrderCache(capacity=config.ORDER_CACHE_SIZE, negative_ttl=config.ORDER_CACHE_NEGATIVE_TTL)
+        self.cache = cache
     
     def query_order(self, order_id: str) -> Dict[str, Any]:
         """
@@ -56,13 +51,103 @@ class OrderQueryTool:
         Returns:
             包含订单信息的字典
         """
-        # 模拟查询延迟
-        import time
-        time.sleep(0.5)
-        
-        # 查询订单
-        order_info = self.orders_db.get(order_id)
+        if self.cache is not None:
+            order_info = self.cache.get_or_load(order_id, self._load_order)
+        else:
+            order_info = self._load_order(order_id)
+        return self._order_result(order_id, order_info)
+    
+    async def aquery_order(self, order_id: str) -> Dict[str, Any]:
+        """异步查询订单信息，等待后端期间不占用事件循环，参数和返回值同 query_order"""
+        if self.cache is not None:
+            order_info = await self.cache.aget_or_load(order_id, self._aload_order)
+        else:
+            order_info = await self._aload_order(order_id)
+        return self._order_result(order_id, order_info)
+    
+    def query_orders(self, order_ids: Sequence[str]) -> Dict[str, Any]:
+        """
+        批量查询订单信息，未缓存的订单通过一次后端查询获取
         
+        Args:
+            order_ids: 订单号列表，重复的订单号只查询一次
+            
+        Returns:
+            包含每个订单查询结果的字典，results 按订单号首次出现的顺序排列
+        """
+        order_ids, error = self._normalize_order_ids(order_ids)
+        if error:
+            return {"success": False, "error": error}
+        orders: Mapping[str, Optional[Dict[str, Any]]]
+        if self.cache is not None:
+            orders = self.cache.get_many_or_load(order_ids, self._load_orders)
+        else:
+            orders = self._load_orders(order_ids)
+        return self._orders_result(order_ids, orders)
+    
+    async def aquery_orders(self, order_ids: Sequence[str]) -> Dict[str, Any]:
+        """异步批量查询订单信息，参数和返回值同 query_orders"""
+        order_ids, error = self._normalize_order_ids(order_ids)
+        if error:
+            return {"success": False, "error": error}
+        orders: Mapping[str, Optional[Dict[str, Any]]]
+        if self.cache is not None:
+            orders = await self.cache.aget_many_or_load(order_ids, self._aload_orders)
+        else:
+            orders = await self._aload_orders(order_ids)
+        return self._orders_result(order_ids, orders)
+    
+    def _normalize_order_ids(self, order_ids: Sequence[str]) -> Tuple[List[str], Optional[str]]:
+        """去重并校验订单号列表，返回 (订单号列表, 错误信息)"""
+        order_ids = list(dict.fromkeys(order_id.strip() for order_id in order_ids if order_id and order_id.strip()))
+        if not order_ids:
+            return [], "请提供至少一个订单号"
+        if len(order_ids) > self.MAX_BATCH_SIZE:
+            return [], f"单次最多查询 {self.MAX_BATCH_SIZE} 个订单，当前为 {len(order_ids)} 个"
+        return order_ids, None
+    
+    def _load_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        """从订单仓储读取订单"""
+        # 模拟查询延迟
+        if self.simulated_latency:
+            time.sleep(self.simulated_latency)
+        return self.repository.get(order_id)
+    
+    async def _aload_order(self, order_id: str) -> Optional[Dict[str, Any]]:
+        # 模拟查询延迟
+        if self.simulated_latency:
+            await asyncio.sleep(self.simulated_latency)
+        if self.repository.blocking:
+            return await asyncio.to_thread(self.repository.get, order_id)
+        return self.repository.get(order_id)
+    
+    def _load_orders(self, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """从订单仓储批量读取订单，整批只产生一次查询延迟"""
+        # 模拟查询延迟
+        if self.simulated_latency:
+            time.sleep(self.simulated_latency)
+        return self.repository.get_many(order_ids)
+    
+    async def _aload_orders(self, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        # 模拟查询延迟
+        if self.simulated_latency:
+            await asyncio.sleep(self.simulated_latency)
+        if self.repository.blocking:
+            return await asyncio.to_thread(self.repository.get_many, order_ids)
+        return self.repository.get_many(order_ids)
+    
+    def _orders_result(self, order_ids: List[str], orders: Mapping[str, Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        results = []
+        for order_id in order_ids:
+            result = self._order_result(order_id, orders.get(order_id))
+            result["order_id"] = order_id
+            results.append(result)
+        return {
+            "success": True,
+            "results": results
+        }
+    
+    def _order_result(self, order_id: str, order_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         if order_info:
             return {
                 "success": True,
@@ -113,4 +198,43 @@ class OrderQueryTool:
             return f"您的订单 {order_id} 当前状态为：{status}，如需了解更多信息请联系客服。"
 
 # 创建全局订单查询工具实例
-order_query_tool = OrderQueryTool()
\ No newline at end of file
+order_query_tool = OrderQueryTool()
+
+# 工具函数
+
+async def query_order(order_id: str) -> str:
+    """
+    查询订单状态和物流信息
+    
+    Args:
+        order_id: 订单号，格式如ORD202311001
+        
+    Returns:
+        订单状态描述
+    """
+    result = await order_query_tool.aquery_order(order_id)
+    
+    if result["success"]:
+        return order_query_tool.get_order_status_description(result["order_info"])
+    else:
+        return str(result["error"])
+
+
+async def query_orders(order_ids: List[str]) -> str:
+    """
+    一次查询多个订单的状态和物流信息
+    
+    Args:
+        order_ids: 订单号列表，格式如["ORD202311001", "ORD202311002"]，最多50个
+        
+    Returns:
+        每个订单的状态描述，每行一个
+    """
+    result = await order_query_tool.aquery_orders(order_ids)
+    
+    if not result["success"]:
+        return str(result["error"])
+    return "\n".join(
+        order_query_tool.get_order_status_description(item["order_info"]) if item["success"] else item["error"]
+        for item in result["results"]
+    )
@@ -1,16 +1,36 @@
 """
 退款申请工具
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional
 from datetime import datetime
+import asyncio
+import threading
+import time
 import uuid
 
+from src.core.config import config
+from src.services.idempotency import IdempotencyWindow, current_turn, make_idempotency_key
+from src.services.refund_repository import RefundRepository, create_refund_repository
+
 class RefundRequestTool:
     """退款申请工具类"""
     
-    def __init__(self):
-        # 模拟退款申请数据库
-        self.refunds_db = {}
+    # 列出退款时单次最多返回的数量
+    MAX_LIST_LIMIT = 100
+    
+    def __init__(self, repository: Optional[RefundRepository] = None, dedup_window: Optional[IdempotencyWindow] = None):
+        """
+        初始化退款申请工具
+        
+        Args:
+            repository: 退款仓储，默认在首次使用时按 REFUND_BACKEND 配置创建
+            dedup_window: 重复提交的去重窗口，默认按 REFUND_DEDUP_WINDOW 配置创建
+        """
+        self._repository = repository
+        self._repository_lock = threading.Lock()
+        if dedup_window is None:
+            dedup_window = IdempotencyWindow(config.REFUND_DEDUP_WINDOW, config.REFUND_DEDUP_SIZE)
+        self.dedup_window = dedup_window
         
         # 退款原因选项
         self.refund_reasons = [
@@ -22,6 +42,17 @@ class RefundRequestTool:
             "其他原因"
         ]
     
+    @property
+    def repository(self) -> RefundRepository:
+        """退款仓储；导入模块时不创建，避免仅加载插件就在工作目录中生成数据库文件"""
+        if self._repository is None:
+            with self._repository_lock:
+                if self._repository is None:
+                    self._repository = create_refund_repository(
+                        config.REFUND_BACKEND, config.REFUND_DB_PATH, config.REFUND_DB_POOL_SIZE
+                    )
+        return self._repository
+    
     def get_refund_reasons(self) -> List[str]:
         """
         获取退款原因选项
@@ -31,22 +62,76 @@ class RefundRequestTool:
         """
         return self.refund_reasons
     
-    def submit_refund_request(self, order_id: str, reason: str, description: str = "") -> Dict[str, Any]:
+    def submit_refund_request(
+        self,
+        order_id: str,
+        reason: str,
+        description: str = "",
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         提交退款申请
         
+        去重窗口内重复的提交（幂等键相同）不会创建新的退款申请，直接返回第一次提交的结果，
+        结果中 duplicate 为True。
+        
         Args:
             order_id: 订单号
             reason: 退款原因
             description: 退款描述（可选）
+            idempotency_key: 幂等键，默认由订单号、退款原因和当前对话轮次生成
             
         Returns:
             包含申请结果的字典
         """
-        # 模拟处理延迟
-        import time
-        time.sleep(0.5)
+        def submit() -> Dict[str, Any]:
+            # 模拟处理延迟
+            time.sleep(0.5)
+            return self._create_refund(order_id, reason, description)
+        
+        result, duplicate = self.dedup_window.run(self._idempotency_key(order_id, reason, idempotency_key), submit)
+        return self._duplicate_result(result) if duplicate else result
+    
+    async def asubmit_refund_request(
+        self,
+        order_id: str,
+        reason: str,
+        description: str = "",
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """异步提交退款申请，等待后端期间不占用线程，参数和返回值同 submit_refund_request"""
+        async def submit() -> Dict[str, Any]:
+            # 模拟处理延迟
+            await asyncio.sleep(0.5)
+            return await self._run_repository(self._create_refund, order_id, reason, description)
         
+        result, duplicate = await self.dedup_window.arun(self._idempotency_key(order_id, reason, idempotency_key), submit)
+        return self._duplicate_result(result) if duplicate else result
+    
+    @staticmethod
+    def _idempotency_key(order_id: str, reason: str, idempotency_key: Optional[str]) -> str:
+        if idempotency_key:
+            return idempotency_key
+        return make_idempotency_key("refund", order_id.strip().upper(), reason.strip(), current_turn())
+    
+    @staticmethod
+    def _duplicate_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """重复提交时返回第一次提交的退款申请"""
+        if not result.get("success"):
+            return result
+        return {
+            **result,
+            "duplicate": True,
+            "message": f"您的退款申请已提交，申请编号：{result['refund_id']}，无需重复提交，我们将在24小时内处理您的申请。"
+        }
+    
+    async def _run_repository(self, func: Callable[..., Dict[str, Any]], *args: Any) -> Dict[str, Any]:
+        """执行访问仓储的函数，仓储会阻塞时放到线程中执行，避免占用事件循环"""
+        if self.repository.blocking:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+    
+    def _create_refund(self, order_id: str, reason: str, description: str) -> Dict[str, Any]:
         # 生成退款申请ID
         refund_id = f"REF{datetime.now().strftime('%Y%m%d')}{str(uuid.uuid4())[:8].upper()}"
         
@@ -64,7 +149,7 @@ class RefundRequestTool:
         }
         
         # 保存到数据库
-        self.refunds_db[refund_id] = refund_record
+        self.repository.save(refund_record)
         
         return {
             "success": True,
@@ -83,10 +168,17 @@ class RefundRequestTool:
             包含退款状态的字典
         """
         # 模拟查询延迟
-        import time
         time.sleep(0.3)
-        
-        refund_record = self.refunds_db.get(refund_id)
+        return self._lookup_refund(refund_id)
+    
+    async def aquery_refund_status(self, refund_id: str) -> Dict[str, Any]:
+        """异步查询退款申请状态，等待后端期间不占用线程，参数和返回值同 query_refund_status"""
+        # 模拟查询延迟
+        await asyncio.sleep(0.3)
+        return await self._run_repository(self._lookup_refund, refund_id)
+    
+    def _lookup_refund(self, refund_id: str) -> Dict[str, Any]:
+        refund_record = self.repository.get(refund_id)
         
         if refund_record:
             return {
@@ -99,6 +191,82 @@ class RefundRequestTool:
                 "error": f"退款申请编号 {refund_id} 不存在，请检查编号是否正确"
             }
     
+    def query_refunds_by_order(self, order_id: str) -> Dict[str, Any]:
+        """
+        查询订单的全部退款申请
+        
+        Args:
+            order_id: 订单号
+            
+        Returns:
+            包含退款申请列表（按申请时间倒序）的字典
+        """
+        # 模拟查询延迟
+        time.sleep(0.3)
+        return self._lookup_refunds_by_order(order_id)
+    
+    async def aquery_refunds_by_order(self, order_id: str) -> Dict[str, Any]:
+        """异步查询订单的全部退款申请，参数和返回值同 query_refunds_by_order"""
+        # 模拟查询延迟
+        await asyncio.sleep(0.3)
+        return await self._run_repository(self._lookup_refunds_by_order, order_id)
+    
+    def _lookup_refunds_by_order(self, order_id: str) -> Dict[str, Any]:
+        refunds = self.repository.list_by_order(order_id, limit=self.MAX_LIST_LIMIT)
+        
+        if refunds:
+            return {
+                "success": True,
+                "refunds": refunds
+            }
+        else:
+            return {
+                "success": False,
+                "error": f"订单 {order_id} 没有退款申请记录"
+            }
+    
+    def list_refunds(
+        self,
+        status: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """
+        按申请时间倒序列出退款申请
+        
+        Args:
+            status: 退款状态（处理中、已批准、已拒绝），为空时不限
+            start_time: 申请时间下界，如"2023-11-01"
+            end_time: 申请时间上界，只有日期时包含当天
+            limit: 最多返回的数量，不超过 MAX_LIST_LIMIT
+            
+        Returns:
+            包含退款申请列表的字典
+        """
+        # 模拟查询延迟
+        time.sleep(0.3)
+        return self._list_refunds(status, start_time, end_time, limit)
+    
+    async def alist_refunds(
+        self,
+        status: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: int = 20
+    ) -> Dict[str, Any]:
+        """异步列出退款申请，参数和返回值同 list_refunds"""
+        # 模拟查询延迟
+        await asyncio.sleep(0.3)
+        return await self._run_repository(self._list_refunds, status, start_time, end_time, limit)
+    
+    def _list_refunds(self, status: Optional[str], start_time: Optional[str], end_time: Optional[str], limit: int) -> Dict[str, Any]:
+        limit = min(max(limit, 1), self.MAX_LIST_LIMIT)
+        return {
+            "success": True,
+            "refunds": self.repository.list_refunds(status or None, start_time or None, end_time or None, limit)
+        }
+    
     def get_refund_status_description(self, refund_info: Dict[str, Any]) -> str:
         """
         获取退款状态描述
@@ -136,4 +304,78 @@ class RefundRequestTool:
             return f"您的退款申请 {refund_id} 当前状态为：{status}，如需了解更多信息请联系客服。"
 
 # 创建全局退款申请工具实例
-refund_request_tool = RefundRequestTool()
\ No newline at end of file
+refund_request_tool = RefundRequestTool()
+
+# 工具函数
+
+async def submit_refund_request(order_id: str, reason: str, description: str = "") -> str:
+    """
+    为订单提交退款申请
+    
+    Args:
+        order_id: 订单号，格式如ORD202311001
+        reason: 退款原因，如商品质量问题、商品与描述不符、不想要了/买错了、商品损坏、发货延迟、其他原因
+        description: 退款描述（可选）
+        
+    Returns:
+        申请结果，包含退款申请编号
+    """
+    result = await refund_request_tool.asubmit_refund_request(order_id, reason, description)
+    return str(result["message"])
+
+async def query_refund_status(refund_id: str) -> str:
+    """
+    查询退款申请的处理状态
+    
+    Args:
+        refund_id: 退款申请编号，格式如REF20231107ABCD1234
+        
+    Returns:
+        退款状态描述
+    """
+    result = await refund_request_tool.aquery_refund_status(refund_id)
+    
+    if result["success"]:
+        return refund_request_tool.get_refund_status_description(result["refund_info"])
+    else:
+        return str(result["error"])
+
+async def query_refunds_by_order(order_id: str) -> str:
+    """
+    查询订单的全部退款申请及其状态，用户不知道退款申请编号时使用
+    
+    Args:
+        order_id: 订单号，格式如ORD202311001
+        
+    Returns:
+        该订单各退款申请的状态描述，每行一个
+    """
+    result = await refund_request_tool.aquery_refunds_by_order(order_id)
+    
+    if result["success"]:
+        return "\n".join(refund_request_tool.get_refund_status_description(refund) for refund in result["refunds"])
+    else:
+        return str(result["error"])
+
+async def list_refunds(status: str = "", start_date: str = "", end_date: str = "", limit: int = 10) -> str:
+    """
+    按申请时间倒序列出退款申请
+    
+    Args:
+        status: 退款状态，可选值：处理中、已批准、已拒绝，为空时不限
+        start_date: 申请日期下界，格式如2023-11-01，为空时不限
+        end_date: 申请日期上界（包含当天），格式如2023-11-30，为空时不限
+        limit: 最多返回的数量，默认10
+        
+    Returns:
+        退款申请列表，每行一个
+    """
+    result = await refund_request_tool.alist_refunds(status, start_date, end_date, limit)
+    refunds = result["refunds"]
+    
+    if not refunds:
+        return "没有找到符合条件的退款申请"
+    return "\n".join(
+        f"{refund['refund_id']}（订单号：{refund['order_id']}）：{refund['status']}，申请时间：{refund['apply_time']}"
+        for refund in refunds
+    )
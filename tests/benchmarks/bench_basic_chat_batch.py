@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+批量对话吞吐量基准测试脚本
+对比逐条调用 chat 与 chat_batch 处理同一批消息的耗时。默认使用固定延迟的模拟模型，
+只衡量调度开销和并发收益；加 --real 时调用 .env 中配置的真实模型。
+
+用法:
+    python tests/benchmarks/bench_basic_chat_batch.py --messages 64 --latency 0.5 --max-concurrency 16
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.services import basic_chat_service as basic_chat_module
+
+
+MESSAGES = [
+    "我前几天下的单，什么时候能到货？",
+    "退款一般多久到账？",
+    "我上周三买的东西可以退吗？",
+    "发票可以开公司抬头吗？",
+]
+
+
+def make_simulated_model(latency: float):
+    def simulated_model(prompt):
+        time.sleep(latency)
+        if "时间推断助手" in prompt.to_string():
+            return AIMessage(content="2023-11-08")
+        return AIMessage(content="您好，已为您查询。")
+    return RunnableLambda(simulated_model)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量对话吞吐量基准测试")
+    parser.add_argument("--messages", type=int, default=64, help="消息数量")
+    parser.add_argument("--latency", type=float, default=0.5, help="模拟模型的单次调用延迟（秒）")
+    parser.add_argument("--max-concurrency", type=int, default=16, help="chat_batch 的最大并发数")
+    parser.add_argument("--real", action="store_true", help="调用真实模型而不是模拟模型")
+    args = parser.parse_args()
+
+    if not args.real:
+        basic_chat_module.ChatOpenAI = lambda **kwargs: make_simulated_model(args.latency)
+    service = basic_chat_module.BasicChatService()
+    inputs = [MESSAGES[index % len(MESSAGES)] for index in range(args.messages)]
+
+    started = time.perf_counter()
+    sequential = [service.chat(user_input) for user_input in inputs]
+    sequential_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = service.chat_batch(inputs, max_concurrency=args.max_concurrency)
+    batch_seconds = time.perf_counter() - started
+
+    print(f"消息数: {args.messages}，最大并发数: {args.max_concurrency}")
+    print(f"逐条调用: {sequential_seconds:.2f}s（{args.messages / sequential_seconds:.1f}条/秒），"
+          f"成功 {sum(result['success'] for result in sequential)} 条")
+    print(f"chat_batch: {batch_seconds:.2f}s（{args.messages / batch_seconds:.1f}条/秒），"
+          f"成功 {sum(result['success'] for result in batched)} 条")
+    print(f"加速比: {sequential_seconds / batch_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+时间表达解析基准测试脚本
+测量本地日历运算解析常见时间表达的单次耗时（对比一次模型调用通常需要数百毫秒）
+
+用法:
+    python tests/benchmarks/bench_date_resolver.py --iterations 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.date_resolver import find_date_expression, resolve_date
+
+
+EXPRESSIONS = ["昨天", "上周三", "下个月", "3天前", "两周后", "11月5号", "2023-11-05", "上个月5号", "前几天"]
+SENTENCES = [
+    "我上周三下的单，什么时候能到货？",
+    "订单ORD202311001昨天就该到了，怎么还没有物流信息",
+    "请帮我查一下3天前申请的退款",
+    "你好，请问发票怎么开？",
+]
+
+
+def measure(func, inputs, iterations: int) -> float:
+    """返回单次调用的平均耗时（微秒）"""
+    today = date(2023, 11, 10)
+    started = time.perf_counter()
+    for index in range(iterations):
+        func(inputs[index % len(inputs)], today)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="时间表达解析基准测试")
+    parser.add_argument("--iterations", type=int, default=100_000, help="每项测试的调用次数")
+    args = parser.parse_args()
+
+    print(f"resolve_date（完整表达）: {measure(resolve_date, EXPRESSIONS, args.iterations):.2f}µs/次")
+    print(f"find_date_expression（整句查找）: {measure(find_date_expression, SENTENCES, args.iterations):.2f}µs/次")
+
+
+if __name__ == "__main__":
+    main()
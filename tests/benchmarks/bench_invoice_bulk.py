@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+批量开票基准测试脚本
+对比逐张调用 create_invoice 与一次调用 create_invoices_bulk 开具同一批发票的耗时，
+批量开票分别测量 numpy 向量化计算与未安装 numpy 时的逐条计算
+
+用法:
+    python tests/benchmarks/bench_invoice_bulk.py --batch-sizes 10 100 1000 --rounds 20
+"""
+
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services import invoice_store
+from src.tools.invoice_tool import InvoiceManager
+from src.utils.logger import app_logger
+
+
+CUSTOMERS = [f"{city}{industry}有限公司" for city in ("上海", "北京", "深圳", "杭州", "成都") for industry in ("科技", "贸易", "传媒", "物流")]
+PRODUCTS = ["咨询服务", "软件授权", "技术支持", "硬件设备"]
+
+
+def make_requests(count: int, rng: random.Random):
+    return [
+        {
+            "customer_name": CUSTOMERS[index % len(CUSTOMERS)],
+            "customer_tax_id": "91310000123456789X",
+            "items": [
+                {"name": rng.choice(PRODUCTS), "quantity": rng.randint(1, 20), "unit_price": round(rng.uniform(1, 5000), 2)}
+                for _ in range(rng.randint(1, 5))
+            ],
+            "issue_date": "2023-11-15"
+        }
+        for index in range(count)
+    ]
+
+
+def measure(func, batches) -> float:
+    """返回每张发票的平均耗时（秒），每批使用新的发票管理器"""
+    elapsed = 0.0
+    invoices = 0
+    for requests in batches:
+        manager = InvoiceManager()
+        started = time.perf_counter()
+        func(manager, requests)
+        elapsed += time.perf_counter() - started
+        invoices += len(requests)
+    return elapsed / invoices
+
+
+def loop_create(manager: InvoiceManager, requests):
+    for request in requests:
+        assert manager.create_invoice(**request)["success"]
+
+
+def bulk_create(manager: InvoiceManager, requests):
+    assert manager.create_invoices_bulk(requests)["success"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量开票基准测试")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000], help="每批发票数量")
+    parser.add_argument("--rounds", type=int, default=20, help="每种批量测量的批数")
+    args = parser.parse_args()
+
+    app_logger.setLevel(logging.WARNING)
+    numpy = invoice_store.np
+    if numpy is None:
+        print("未安装 numpy，只测量逐条计算")
+    rng = random.Random(42)
+    for batch_size in args.batch_sizes:
+        batches = [make_requests(batch_size, rng) for _ in range(args.rounds)]
+        print(f"--- 每批 {batch_size} 张 ---")
+        looped = measure(loop_create, batches)
+        print(f"逐张 create_invoice: {looped * 1e6:.1f}µs/张")
+        for name, module in (("numpy", numpy), ("逐条计算", None)):
+            if name == "numpy" and module is None:
+                continue
+            invoice_store.np = module
+            bulk = measure(bulk_create, batches)
+            print(f"create_invoices_bulk（{name}）: {bulk * 1e6:.1f}µs/张，加速比 {looped / bulk:.2f}x")
+        invoice_store.np = numpy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+发票管理器并发基准测试脚本
+多个线程同时创建发票，测量不同线程数、不同分片数下 create_invoice 的吞吐量，
+并校验发票ID没有重复
+
+用法:
+    python tests/benchmarks/bench_invoice_concurrency.py --invoices 200000 --threads 1 2 4 8 --shards 1 16
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.invoice_tool import InvoiceManager
+from src.utils.logger import app_logger
+
+
+CUSTOMERS = ["上海科技有限公司", "北京贸易有限公司", "深圳传媒有限公司", "杭州物流有限公司"]
+
+
+def run(shard_count: int, thread_count: int, invoices: int) -> float:
+    """返回每秒创建的发票数"""
+    manager = InvoiceManager(shard_count=shard_count)
+    per_thread = invoices // thread_count
+    barrier = threading.Barrier(thread_count + 1)
+
+    def worker(seed: int):
+        items = [{"name": "咨询服务", "quantity": 1, "unit_price": 100 + seed}]
+        barrier.wait()
+        for index in range(per_thread):
+            manager.create_invoice(CUSTOMERS[seed % len(CUSTOMERS)], "91310000123456789X", items, f"2023-11-{index % 28 + 1:02d}")
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(thread_count)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    assert len(manager.invoices) == per_thread * thread_count, "发票ID出现重复"
+    return per_thread * thread_count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发票管理器并发基准测试")
+    parser.add_argument("--invoices", type=int, default=200_000, help="每轮创建的发票总数")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8], help="线程数")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 16], help="分片数")
+    args = parser.parse_args()
+
+    app_logger.setLevel(logging.WARNING)
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}，CPU核数: {os.cpu_count()}，GIL: {'开启' if gil else '关闭'}")
+    for shard_count in args.shards:
+        baseline = None
+        for thread_count in args.threads:
+            throughput = run(shard_count, thread_count, args.invoices)
+            baseline = baseline or throughput
+            print(f"分片数 {shard_count:>2}，线程数 {thread_count}: {throughput:,.0f} 张/秒（{throughput / baseline:.2f}x）")
+
+
+if __name__ == "__main__":
+    main()
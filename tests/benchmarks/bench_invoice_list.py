@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+发票列表基准测试脚本
+向发票管理器写入大量发票（默认100万张），对比索引 + 游标分页与逐条筛选再排序（原实现）
+列出一页发票的延迟
+
+用法:
+    python tests/benchmarks/bench_invoice_list.py --invoices 1000000 --pages 200
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.invoice_tool import InvoiceManager
+from src.utils.logger import app_logger
+
+
+CUSTOMERS = [f"{city}{industry}有限公司" for city in ("上海", "北京", "深圳", "杭州", "成都") for industry in ("科技", "贸易", "传媒", "物流")]
+STATUSES = ["issued", "sent", "paid", "overdue", "cancelled"]
+
+
+def scan_and_sort(manager: InvoiceManager, customer_name=None, status=None, limit: int = 10):
+    """原实现：逐条筛选，再对全部结果按开票日期排序"""
+    matched = [
+        invoice for invoice in manager.invoices.values()
+        if (not customer_name or customer_name.lower() in invoice.customer_name.lower())
+        and (not status or invoice.status == status)
+    ]
+    matched.sort(key=lambda invoice: invoice.issue_date, reverse=True)
+    return matched[:limit]
+
+
+def measure(name: str, func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{name}: {elapsed * 1e3:.3f}ms/页")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发票列表基准测试")
+    parser.add_argument("--invoices", type=int, default=1_000_000, help="发票数量")
+    parser.add_argument("--pages", type=int, default=200, help="索引查询的页数")
+    parser.add_argument("--page-size", type=int, default=10, help="每页数量")
+    args = parser.parse_args()
+
+    app_logger.setLevel(logging.WARNING)
+    manager = InvoiceManager()
+    start_date = date(2021, 1, 1)
+    started = time.perf_counter()
+    for index in range(args.invoices):
+        # 开票日期随写入顺序递增，与真实场景一致
+        issue_date = start_date + timedelta(days=index * 1000 // args.invoices)
+        result = manager.create_invoice(
+            CUSTOMERS[index % len(CUSTOMERS)],
+            "91310000123456789X",
+            [{"name": "咨询服务", "quantity": 1, "unit_price": 100 + index % 900}],
+            issue_date.isoformat()
+        )
+        if index % 7 == 0:
+            manager.update_invoice_status(result["invoice_id"], STATUSES[index % len(STATUSES)])
+    print(f"写入 {args.invoices:,} 张发票耗时: {time.perf_counter() - started:.1f}s")
+
+    cases = [
+        ("不筛选", {}),
+        ("按状态筛选", {"status": "paid"}),
+        ("按客户名称筛选", {"customer_name": "深圳传媒"}),
+        ("按客户名称和状态筛选", {"customer_name": "杭州", "status": "overdue"}),
+    ]
+    for name, filters in cases:
+        print(f"--- {name} ---")
+        indexed = measure("索引 + 首页", lambda: manager.list_invoices(limit=args.page_size, **filters), args.pages)
+
+        def walk_pages():
+            cursor = None
+            for _ in range(args.pages):
+                result = manager.list_invoices(limit=args.page_size, cursor=cursor, **filters)
+                cursor = result["next_cursor"]
+                if cursor is None:
+                    break
+
+        started = time.perf_counter()
+        walk_pages()
+        print(f"索引 + 连续翻 {args.pages} 页: {(time.perf_counter() - started) / args.pages * 1e3:.3f}ms/页")
+        scanned = measure("逐条筛选再排序", lambda: scan_and_sort(manager, limit=args.page_size, **filters), 1)
+        print(f"加速比: {scanned / indexed:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
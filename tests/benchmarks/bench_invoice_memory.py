@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+发票内存占用基准测试脚本
+对比大量发票（默认100万张）以紧凑记录（InvoiceRecord）保存与以原来的字典形式保存时的内存占用，
+以及写入发票管理器（包括分片索引）后的总内存占用
+
+用法:
+    python tests/benchmarks/bench_invoice_memory.py --invoices 1000000
+"""
+
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.invoice_store import InvoiceRecord
+from src.tools.invoice_tool import InvoiceManager
+from src.utils.logger import app_logger
+
+
+CUSTOMERS = [f"{city}{industry}有限公司" for city in ("上海", "北京", "深圳", "杭州", "成都") for industry in ("科技", "贸易", "传媒", "物流")]
+PRODUCTS = ["咨询服务", "软件授权", "技术支持", "硬件设备"]
+
+
+def invoice_args(index: int, invoices: int):
+    issue_date = date(2021, 1, 1) + timedelta(days=index * 1000 // invoices)
+    items = [
+        {"name": PRODUCTS[(index + offset) % len(PRODUCTS)], "quantity": 1 + offset, "unit_price": 99.9 + index % 900}
+        for offset in range(1 + index % 3)
+    ]
+    return CUSTOMERS[index % len(CUSTOMERS)], "91310000123456789X", items, issue_date
+
+
+def build_dicts(records):
+    """与原实现保存的字典相同：浮点金额、ISO格式时间字符串、每项商品一个字典"""
+    return {record.invoice_id: record.to_dict() for record in records}
+
+
+def measure(name: str, build, invoices: int, *build_args):
+    """调用 build(*build_args)，返回构建结果，并打印其占用的内存"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build(*build_args)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{name}: {current / 1024 ** 2:,.0f}MB，每张 {current / invoices:,.0f} 字节，耗时 {elapsed:.1f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发票内存占用基准测试")
+    parser.add_argument("--invoices", type=int, default=1_000_000, help="发票数量")
+    args = parser.parse_args()
+
+    app_logger.setLevel(logging.WARNING)
+    now = time.time()
+
+    def build_records():
+        return [InvoiceRecord.create(f"INV20231101{index:08d}", *invoice_args(index, args.invoices), now) for index in range(args.invoices)]
+
+    records = measure("紧凑记录", build_records, args.invoices)
+
+    measure("字典（原实现）", build_dicts, args.invoices, records)
+    del records
+
+    def build_manager():
+        manager = InvoiceManager()
+        for index in range(args.invoices):
+            customer_name, tax_id, items, issue_date = invoice_args(index, args.invoices)
+            manager.create_invoice(customer_name, tax_id, items, issue_date.isoformat())
+        return manager
+
+    measure("发票管理器（记录 + 分片索引）", build_manager, args.invoices)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+发票汇总基准测试脚本
+向发票管理器写入大量发票（默认100万张），对比增量维护的汇总与逐条累加（原方式）
+回答"某月/某客户/某状态的发票张数和总金额"的延迟
+
+用法:
+    python tests/benchmarks/bench_invoice_summary.py --invoices 1000000 --repeat 1000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.tools.invoice_tool import InvoiceManager
+from src.utils.logger import app_logger
+
+
+CUSTOMERS = [f"{city}{industry}有限公司" for city in ("上海", "北京", "深圳", "杭州", "成都") for industry in ("科技", "贸易", "传媒", "物流")]
+STATUSES = ["issued", "sent", "paid", "overdue", "cancelled"]
+
+
+def scan_summary(manager: InvoiceManager, customer_name=None, status=None, month=None):
+    """原方式：逐条筛选并累加金额"""
+    count = 0
+    total_cents = 0
+    for invoice in manager.invoices.values():
+        if customer_name and invoice.customer_name != customer_name:
+            continue
+        if status and invoice.status != status:
+            continue
+        if month and not invoice.issue_date.startswith(month):
+            continue
+        count += 1
+        total_cents += invoice.total_cents
+    return count, total_cents / 100
+
+
+def measure(name: str, func, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - started) / repeat
+    print(f"{name}: {elapsed * 1e3:.3f}ms/次")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="发票汇总基准测试")
+    parser.add_argument("--invoices", type=int, default=1_000_000, help="发票数量")
+    parser.add_argument("--repeat", type=int, default=1000, help="汇总查询的次数")
+    args = parser.parse_args()
+
+    app_logger.setLevel(logging.WARNING)
+    manager = InvoiceManager()
+    start_date = date(2021, 1, 1)
+    started = time.perf_counter()
+    for index in range(args.invoices):
+        issue_date = start_date + timedelta(days=index * 1000 // args.invoices)
+        result = manager.create_invoice(
+            CUSTOMERS[index % len(CUSTOMERS)],
+            "91310000123456789X",
+            [{"name": "咨询服务", "quantity": 1, "unit_price": 100 + index % 900}],
+            issue_date.isoformat()
+        )
+        if index % 7 == 0:
+            manager.update_invoice_status(result["invoice_id"], STATUSES[index % len(STATUSES)])
+    print(f"写入 {args.invoices:,} 张发票耗时: {time.perf_counter() - started:.1f}s")
+
+    cases = [
+        ("全部发票", {}),
+        ("按月份汇总", {"month": "2022-06"}),
+        ("按客户汇总", {"customer_name": "深圳传媒有限公司"}),
+        ("按状态汇总", {"status": "paid"}),
+    ]
+    for name, filters in cases:
+        print(f"--- {name} ---")
+        summary = manager.invoice_summary(**filters)
+        count, total = scan_summary(manager, **filters)
+        assert (summary["count"], summary["total_with_tax"]) == (count, total), "汇总结果与逐条累加不一致"
+        incremental = measure("增量汇总", lambda: manager.invoice_summary(**filters), args.repeat)
+        scanned = measure("逐条累加", lambda: scan_summary(manager, **filters), 1)
+        print(f"加速比: {scanned / incremental:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+订单仓储基准测试脚本
+向SQLite订单仓储写入大量订单（默认1000万条），测量按订单号、快递单号查询的延迟，
+以及多线程共享连接池时的查询吞吐量
+
+用法:
+    python tests/benchmarks/bench_order_repository.py --orders 10000000 --lookups 20000 --threads 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.order_repository import SqliteConnectionPool, SqliteOrderRepository
+
+
+STATUSES = ["处理中", "已发货", "运输中", "已签收"]
+PRODUCTS = ["智能手表", "无线耳机", "智能音箱", "平板电脑", "扫地机器人"]
+BATCH_SIZE = 100_000
+
+
+def order_id(index: int) -> str:
+    return f"ORD{index:09d}"
+
+
+def tracking_number(index: int) -> str:
+    return f"SF{index:012d}"
+
+
+def generate_orders(start: int, stop: int):
+    for index in range(start, stop):
+        yield {
+            "order_id": order_id(index),
+            "status": STATUSES[index % len(STATUSES)],
+            "product_name": PRODUCTS[index % len(PRODUCTS)],
+            "order_date": f"2023-{index % 12 + 1:02d}-{index % 28 + 1:02d}",
+            "tracking_number": tracking_number(index),
+            "logistics_company": "顺丰快递",
+            "logistics_status": "运输中",
+            "current_location": "上海转运中心",
+        }
+
+
+def percentile(samples, ratio: float) -> float:
+    return sorted(samples)[int(len(samples) * ratio)] * 1e6
+
+
+def measure(name: str, func, keys):
+    samples = []
+    for key in keys:
+        started = time.perf_counter()
+        func(key)
+        samples.append(time.perf_counter() - started)
+    print(f"{name}: p50 {percentile(samples, 0.5):.1f}µs, p99 {percentile(samples, 0.99):.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="订单仓储基准测试")
+    parser.add_argument("--orders", type=int, default=10_000_000, help="订单数量")
+    parser.add_argument("--lookups", type=int, default=20_000, help="每项查询测试的次数")
+    parser.add_argument("--threads", type=int, default=8, help="并发查询的线程数")
+    parser.add_argument("--pool-size", type=int, default=4, help="连接池大小")
+    parser.add_argument("--db-path", default=None, help="数据库文件路径，已包含足够订单时直接复用")
+    args = parser.parse_args()
+
+    db_path = args.db_path or os.path.join(tempfile.mkdtemp(), "orders.db")
+    pool = SqliteConnectionPool(db_path, size=args.pool_size)
+    repository = SqliteOrderRepository(pool)
+
+    existing = len(repository)
+    if existing < args.orders:
+        started = time.perf_counter()
+        for start in range(existing, args.orders, BATCH_SIZE):
+            repository.save_many(generate_orders(start, min(start + BATCH_SIZE, args.orders)))
+        build_seconds = time.perf_counter() - started
+        print(f"写入 {args.orders - existing:,} 条订单耗时: {build_seconds:.1f}s")
+    print(f"订单总数: {len(repository):,}，数据库大小: {os.path.getsize(db_path) / 1024 ** 2:.0f}MB")
+
+    rng = random.Random(42)
+    indexes = [rng.randrange(args.orders) for _ in range(args.lookups)]
+    measure("按订单号查询", repository.get, [order_id(index) for index in indexes])
+    measure("按快递单号查询", repository.find_by_tracking_number, [tracking_number(index) for index in indexes])
+    measure("查询不存在的订单", repository.get, [order_id(args.orders + index) for index in indexes])
+
+    # 多线程共享连接池
+    per_thread = args.lookups // args.threads
+
+    def worker(seed: int):
+        worker_rng = random.Random(seed)
+        for _ in range(per_thread):
+            repository.get(order_id(worker_rng.randrange(args.orders)))
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    print(f"{args.threads} 个线程并发查询: {per_thread * args.threads / elapsed:,.0f} 次/秒")
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+退款仓储基准测试脚本
+向SQLite退款仓储写入大量退款申请（默认200万条），测量按退款单号查询、按订单号查询退款
+以及按状态和申请时间列出退款的延迟
+
+用法:
+    python tests/benchmarks/bench_refund_repository.py --refunds 2000000 --lookups 20000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.order_repository import SqliteConnectionPool
+from src.services.refund_repository import SqliteRefundRepository
+
+
+STATUSES = ["处理中", "已批准", "已拒绝"]
+REASONS = ["商品质量问题", "商品与描述不符", "不想要了/买错了", "商品损坏", "发货延迟", "其他原因"]
+BATCH_SIZE = 100_000
+# 平均每个订单的退款申请数量
+REFUNDS_PER_ORDER = 2
+
+
+def refund_id(index: int) -> str:
+    return f"REF20231101{index:08X}"
+
+
+def order_id(index: int) -> str:
+    return f"ORD{index // REFUNDS_PER_ORDER:09d}"
+
+
+def apply_time(index: int) -> str:
+    return f"2023-{index % 12 + 1:02d}-{index % 28 + 1:02d} {index % 24:02d}:{index % 60:02d}:{index % 59:02d}"
+
+
+def generate_refunds(start: int, stop: int):
+    for index in range(start, stop):
+        yield {
+            "refund_id": refund_id(index),
+            "order_id": order_id(index),
+            "reason": REASONS[index % len(REASONS)],
+            "description": "",
+            "status": STATUSES[index % len(STATUSES)],
+            "apply_time": apply_time(index),
+        }
+
+
+def percentile(samples, ratio: float) -> float:
+    return sorted(samples)[int(len(samples) * ratio)] * 1e6
+
+
+def measure(name: str, func, keys):
+    samples = []
+    for key in keys:
+        started = time.perf_counter()
+        func(key)
+        samples.append(time.perf_counter() - started)
+    print(f"{name}: p50 {percentile(samples, 0.5):.1f}µs, p99 {percentile(samples, 0.99):.1f}µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="退款仓储基准测试")
+    parser.add_argument("--refunds", type=int, default=2_000_000, help="退款申请数量")
+    parser.add_argument("--lookups", type=int, default=20_000, help="每项查询测试的次数")
+    parser.add_argument("--db-path", default=None, help="数据库文件路径，已包含足够退款申请时直接复用")
+    args = parser.parse_args()
+
+    db_path = args.db_path or os.path.join(tempfile.mkdtemp(), "refunds.db")
+    pool = SqliteConnectionPool(db_path, size=1)
+    repository = SqliteRefundRepository(pool)
+
+    existing = len(repository)
+    if existing < args.refunds:
+        started = time.perf_counter()
+        for start in range(existing, args.refunds, BATCH_SIZE):
+            repository.save_many(generate_refunds(start, min(start + BATCH_SIZE, args.refunds)))
+        print(f"写入 {args.refunds - existing:,} 条退款申请耗时: {time.perf_counter() - started:.1f}s")
+    print(f"退款申请总数: {len(repository):,}，数据库大小: {os.path.getsize(db_path) / 1024 ** 2:.0f}MB")
+
+    rng = random.Random(42)
+    indexes = [rng.randrange(args.refunds) for _ in range(args.lookups)]
+    measure("按退款单号查询", repository.get, [refund_id(index) for index in indexes])
+    measure("按订单号查询退款", repository.list_by_order, [order_id(index) for index in indexes])
+    measure(
+        "按状态列出最近20条",
+        lambda status: repository.list_refunds(status=status, limit=20),
+        [STATUSES[index % len(STATUSES)] for index in indexes]
+    )
+    measure(
+        "按状态和日期范围列出20条",
+        lambda day: repository.list_refunds(status="已拒绝", start_time=f"2023-06-{day:02d}", end_time=f"2023-06-{day:02d}"),
+        [index % 28 + 1 for index in indexes]
+    )
+    pool.close()
+
+
+if __name__ == "__main__":
+    main()
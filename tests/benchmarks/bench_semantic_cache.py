@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+近似问题缓存基准测试脚本
+测量缓存中有大量问题（默认100万条）时单次查询的耗时和内存占用
+
+用法:
+    python tests/benchmarks/bench_semantic_cache.py --entries 1000000 --lookups 10000
+"""
+
+import argparse
+import os
+import random
+import resource
+import sys
+import time
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.semantic_cache import SemanticCache
+
+
+SUBJECTS = ["订单", "快递", "退款", "发票", "优惠券", "会员", "积分", "账户", "地址", "售后"]
+ACTIONS = ["怎么查询", "如何修改", "多久能到", "怎么申请", "为什么失败", "在哪里看", "能不能取消", "怎么开具"]
+DETAILS = ["", "今天", "昨天下单的", "上周买的", "刚刚提交的", "手机上", "电脑上", "海外"]
+
+
+def make_question(rng: random.Random, index: int) -> str:
+    """生成带编号的合成问题，保证条目互不相同"""
+    return f"{rng.choice(DETAILS)}{rng.choice(SUBJECTS)}{rng.choice(ACTIONS)}#{index}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="近似问题缓存基准测试")
+    parser.add_argument("--entries", type=int, default=1_000_000, help="缓存条目数")
+    parser.add_argument("--lookups", type=int, default=10_000, help="查询次数")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cache = SemanticCache(threshold=0.8, capacity=args.entries)
+
+    questions = [make_question(rng, index) for index in range(args.entries)]
+    started = time.perf_counter()
+    for question in questions:
+        cache.put(question, "回答")
+    build_seconds = time.perf_counter() - started
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    # 一半查询命中已缓存的问题（加语气词改写），一半为未缓存的问题
+    queries = []
+    for _ in range(args.lookups // 2):
+        queries.append(f"请问{rng.choice(questions)}呢")
+        queries.append(make_question(rng, args.entries + rng.randrange(args.entries)))
+
+    started = time.perf_counter()
+    hits = sum(1 for query in queries if cache.get(query) is not None)
+    lookup_seconds = time.perf_counter() - started
+
+    print(f"缓存条目数: {len(cache):,}")
+    print(f"写入耗时: {build_seconds:.1f}s（{build_seconds / args.entries * 1e6:.1f}µs/条）")
+    print(f"查询次数: {len(queries):,}，命中: {hits:,}")
+    print(f"平均查询耗时: {lookup_seconds / len(queries) * 1e6:.1f}µs")
+    print(f"进程峰值内存: {peak_mb:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
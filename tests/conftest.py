@@ -0,0 +1,7 @@
+"""
+测试公共配置
+"""
+import os
+
+# 测试使用内存退款仓储，避免在工作目录中生成 data/refunds.db；需在导入 src.core.config 之前设置
+os.environ["REFUND_BACKEND"] = "memory"
@@ -1,6 +1,13 @@
+import os
 import pytest
 import asyncio
 from fastapi.testclient import TestClient
+
+# 测试使用内存会话存储，避免在工作目录中生成数据库文件
+os.environ["SESSION_BACKEND"] = "memory"
+from src.core.config import Config
+Config.SESSION_BACKEND = "memory"  # 配置模块可能已被其他测试提前导入
+
 from main import app
 
 client = TestClient(app)
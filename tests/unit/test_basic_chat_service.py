@@ -0,0 +1,152 @@
+"""
+测试基础聊天服务的并行链路
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# 模型在导入时即初始化，测试中使用占位密钥（不会发出真实请求）
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+
+from src.services import basic_chat_service as basic_chat_module
+from src.services.basic_chat_service import BasicChatService
+
+MODEL_LATENCY = 0.3
+
+
+def _reply(prompt) -> AIMessage:
+    # 时间推断提示返回日期，其余提示返回普通回答
+    text = prompt.to_string()
+    if "故障" in text:
+        raise RuntimeError("模型服务不可用")
+    if "时间推断助手" in text:
+        return AIMessage(content="2023-11-08")
+    return AIMessage(content="您的订单正在配送中")
+
+
+def _slow_model(prompt) -> AIMessage:
+    time.sleep(MODEL_LATENCY)
+    return _reply(prompt)
+
+
+async def _aslow_model(prompt) -> AIMessage:
+    await asyncio.sleep(MODEL_LATENCY)
+    return _reply(prompt)
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(
+        basic_chat_module, "ChatOpenAI",
+        lambda **kwargs: RunnableLambda(_slow_model, afunc=_aslow_model)
+    )
+    return BasicChatService()
+
+
+def test_chat_runs_time_inference_and_chat_chain_in_parallel(service):
+    started = time.perf_counter()
+    result = service.chat("我前几天下的单，什么时候能到货？")
+    elapsed = time.perf_counter() - started
+
+    assert result["success"] is True
+    assert result["response"] == "您的订单正在配送中\n\n(时间推断: 您提到的'前几天'是指2023-11-08)"
+    assert result["time_inference"]["source"] == "llm"
+    assert elapsed < MODEL_LATENCY * 1.8
+
+
+def test_achat_runs_time_inference_and_chat_chain_in_parallel(service):
+    started = time.perf_counter()
+    result = asyncio.run(service.achat("我前几天下的单，什么时候能到货？"))
+    elapsed = time.perf_counter() - started
+
+    assert result["time_inference"]["inferred_date"] == "2023-11-08"
+    assert elapsed < MODEL_LATENCY * 1.8
+
+
+def test_chat_uses_local_resolver_for_known_expressions(service):
+    result = service.chat("我上周三下的单")
+
+    assert result["time_inference"]["time_expression"] == "上周三"
+    assert result["time_inference"]["source"] == "rule"
+
+
+def test_chat_without_time_expression(service):
+    result = service.chat("你好")
+
+    assert result["response"] == "您的订单正在配送中"
+    assert result["time_inference"] is None
+
+
+def test_chat_batch_keeps_order_and_isolates_failures(service):
+    results = service.chat_batch(["你好", "模拟故障", "我前几天下的单"], max_concurrency=3)
+
+    assert [result["success"] for result in results] == [True, False, True]
+    assert results[1]["error"] == "模型服务不可用"
+    assert results[2]["time_inference"]["inferred_date"] == "2023-11-08"
+
+
+def test_chat_batch_respects_max_concurrency(monkeypatch):
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+
+    def tracking_model(prompt):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return _reply(prompt)
+
+    monkeypatch.setattr(basic_chat_module, "ChatOpenAI", lambda **kwargs: RunnableLambda(tracking_model))
+    service = BasicChatService()
+
+    results = service.chat_batch([f"问题{index}" for index in range(8)], max_concurrency=2)
+
+    assert all(result["success"] for result in results)
+    # 每条输入内部还会并行执行时间推断，但没有时间表达时不调用模型
+    assert peak[0] == 2
+
+
+def test_achat_batch_runs_concurrently(service):
+    started = time.perf_counter()
+    results = asyncio.run(service.achat_batch(["你好"] * 4, max_concurrency=4))
+    elapsed = time.perf_counter() - started
+
+    assert len(results) == 4
+    assert elapsed < MODEL_LATENCY * 2
+
+
+def test_infer_time_batch_only_sends_unresolved_expressions_to_model(service):
+    calls = []
+    chain = service.time_inference_chain
+    original_batch = chain.batch
+
+    def recording_batch(inputs, *args, **kwargs):
+        calls.extend(item["time_expression"] for item in inputs)
+        return original_batch(inputs, *args, **kwargs)
+
+    object.__setattr__(chain, "batch", recording_batch)
+
+    results = service.infer_time_batch(["昨天", "前几天", "上周三", "月底"])
+
+    assert [result["source"] for result in results] == ["rule", "llm", "rule", "llm"]
+    assert [result["time_expression"] for result in results] == ["昨天", "前几天", "上周三", "月底"]
+    assert calls == ["前几天", "月底"]
+
+
+def test_ainfer_time_batch_reports_errors_per_item(service):
+    results = asyncio.run(service.ainfer_time_batch(["故障", "明天"]))
+
+    assert results[0] == {"success": False, "error": "模型服务不可用", "time_expression": "故障"}
+    assert results[1]["success"] is True
@@ -0,0 +1,516 @@
+"""
+测试聊天服务的状态图执行流程
+"""
+import asyncio
+import os
+import sys
+import time
+from typing import Any, List
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# 模型在导入时即初始化，测试中使用占位密钥（不会发出真实请求）
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.services.chat_service import ChatService
+from src.services.model_manager import model_manager
+from src.services.plugin_manager import plugin_manager
+from src.services.session_store import create_session_backend
+
+
+def make_service() -> ChatService:
+    """创建使用内存会话存储的聊天服务"""
+    session_store, checkpointer = create_session_backend("memory")
+    return ChatService(session_store=session_store, checkpointer=checkpointer)
+
+
+class ScriptedChatModel(BaseChatModel):
+    """按顺序返回预设消息的测试模型"""
+
+    responses: List[AIMessage]
+    delay: float = 0.0
+    index: int = 0
+    bind_count: int = 0
+    inputs: List[Any] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        self.bind_count += 1
+        return self
+
+    def _next_result(self) -> ChatResult:
+        # 复制消息，避免重复返回同一消息ID时被状态图合并
+        message = self.responses[self.index % len(self.responses)].model_copy(update={"id": None})
+        self.index += 1
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.inputs.append(messages)
+        time.sleep(self.delay)
+        return self._next_result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.inputs.append(messages)
+        await asyncio.sleep(self.delay)
+        return self._next_result()
+
+
+@pytest.fixture
+def use_model(monkeypatch):
+    """替换当前模型为测试模型"""
+    def _use(model: BaseChatModel) -> BaseChatModel:
+        monkeypatch.setattr(model_manager, "current_model", model)
+        return model
+    return _use
+
+
+@pytest.fixture
+def echo_tool(monkeypatch):
+    """注册一个测试工具"""
+    calls = []
+
+    def echo(text: str) -> str:
+        """回显文本"""
+        calls.append(text)
+        return f"echo:{text}"
+
+    monkeypatch.setitem(plugin_manager.tool_dispatch, "echo", echo)
+    return calls
+
+
+def test_process_input_returns_model_reply(use_model):
+    use_model(ScriptedChatModel(responses=[AIMessage(content="你好")]))
+    service = make_service()
+
+    result = service.process_input("user_1", "你好")
+
+    assert result["status"] == "success"
+    assert result["response"] == "你好"
+    assert service.sessions[result["session_id"]]["message_count"] == 2
+
+
+async def test_aprocess_input_runs_tool_loop(use_model, echo_tool):
+    use_model(ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"text": "hi"}, "id": "call_1"}]),
+        AIMessage(content="工具已执行"),
+    ]))
+    service = make_service()
+
+    result = await service.aprocess_input("user_1", "请回显hi")
+
+    assert result["status"] == "success"
+    assert result["response"] == "工具已执行"
+    assert echo_tool == ["hi"]
+
+
+async def test_call_tools_reports_missing_tool(use_model):
+    service = make_service()
+    message = AIMessage(content="", tool_calls=[{"name": "missing", "args": {}, "id": "call_1"}])
+
+    result = await service._acall_tools({"messages": [message]})
+
+    tool_message = result["messages"][0]
+    assert isinstance(tool_message, ToolMessage)
+    assert tool_message.tool_call_id == "call_1"
+    assert "不存在" in tool_message.content
+
+
+async def test_aprocess_input_does_not_block_event_loop(use_model):
+    use_model(ScriptedChatModel(responses=[AIMessage(content="ok")], delay=0.2))
+    service = make_service()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        service.aprocess_input(f"user_{i}", "你好") for i in range(20)
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert all(result["status"] == "success" for result in results)
+    # 20个会话并发等待模型，总耗时应接近单次调用而不是累加
+    assert elapsed < 20 * 0.2 / 2
+
+
+async def test_astream_input_emits_tool_progress_and_tokens(use_model, echo_tool):
+    use_model(ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"text": "hi"}, "id": "call_1"}]),
+        AIMessage(content="工具已执行"),
+    ]))
+    service = make_service()
+
+    events = [event async for event in service.astream_input("user_1", "请回显hi")]
+    names = [event["event"] for event in events]
+
+    assert names[0] == "session"
+    assert names.index("tool_start") < names.index("tool_end") < names.index("token")
+    assert events[names.index("tool_start")]["data"]["message"] == "正在调用工具 echo…"
+    assert "".join(e["data"]["content"] for e in events if e["event"] == "token") == "工具已执行"
+    assert events[-1]["event"] == "done"
+    assert events[-1]["data"]["response"] == "工具已执行"
+    session_id = events[0]["data"]["session_id"]
+    assert service.sessions[session_id]["message_count"] == 2
+
+
+def test_model_input_is_limited_by_history_window(use_model):
+    model = use_model(ScriptedChatModel(responses=[AIMessage(content="好的" * 20)]))
+    service = make_service()
+    service.history_window.max_tokens = 150
+    service.history_window.summarizer = lambda summary, messages: "用户之前咨询过订单"
+
+    session_id = service.process_input("user_1", "第1轮" + "问题" * 20)["session_id"]
+    for i in range(2, 6):
+        service.process_input("user_1", f"第{i}轮" + "问题" * 20, session_id=session_id)
+    service.history_window.wait_for_pending()
+    service.process_input("user_1", "最后一轮", session_id=session_id)
+
+    history = service.get_session_history("user_1", session_id)
+    last_input = model.inputs[-1]
+    assert len(history["messages"]) == 12
+    assert "用户之前咨询过订单" in last_input[0].content
+    assert last_input[-1].content == "最后一轮"
+    assert len(last_input) < 12
+
+
+def test_repeated_first_turn_questions_are_served_from_response_cache(use_model, monkeypatch):
+    model = use_model(ScriptedChatModel(responses=[AIMessage(content="请在订单详情页申请退款")]))
+    service = make_service()
+
+    first = service.process_input("user_1", "怎么退款？")
+    second = service.process_input("user_2", "怎么退款")
+
+    assert second["response"] == first["response"] == "请在订单详情页申请退款"
+    assert len(model.inputs) == 1
+    stats = service.get_service_status()["response_cache"]
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    # 模型更新后缓存失效
+    monkeypatch.setattr(model_manager, "update_model", lambda **kwargs: {"success": True})
+    service.update_model({"model_name": "gpt-4o"})
+    service.process_input("user_3", "怎么退款")
+    assert len(model.inputs) == 2
+
+
+def test_paraphrased_first_turn_question_is_served_from_semantic_cache(use_model):
+    model = use_model(ScriptedChatModel(responses=[AIMessage(content="请在订单详情页申请退款")]))
+    service = make_service()
+    service.semantic_cache.threshold = 0.6
+
+    service.process_input("user_1", "怎么申请退款")
+    result = service.process_input("user_2", "请问怎么申请退款呢？")
+
+    assert result["response"] == "请在订单详情页申请退款"
+    assert len(model.inputs) == 1
+    assert service.get_service_status()["semantic_cache"]["hits"] == 1
+
+
+def test_answers_based_on_tool_output_are_not_cached(use_model, echo_tool):
+    model = use_model(ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[{"name": "echo", "args": {"text": "hi"}, "id": "call_1"}]),
+        AIMessage(content="工具已执行"),
+    ]))
+    service = make_service()
+
+    service.process_input("user_1", "请回显hi")
+    service.process_input("user_2", "请回显hi")
+
+    assert len(model.inputs) == 4
+    assert echo_tool == ["hi", "hi"]
+
+
+def test_order_lookup_bypasses_model(use_model):
+    model = use_model(ScriptedChatModel(responses=[AIMessage(content="还有什么可以帮您")]))
+    service = make_service()
+
+    result = service.process_input("user_1", "查询订单ORD202311003")
+    service.process_input("user_1", "谢谢", session_id=result["session_id"])
+
+    assert result["status"] == "success"
+    assert "智能音箱" in result["response"]
+    assert len(model.inputs) == 1
+    # 快速路由的问答写入了会话历史，后续轮次的模型可以看到
+    assert [m.content for m in model.inputs[0]][:2] == ["查询订单ORD202311003", result["response"]]
+    assert service.sessions[result["session_id"]]["message_count"] == 4
+
+
+async def test_astream_order_lookup_emits_tool_progress(use_model):
+    model = use_model(ScriptedChatModel(responses=[AIMessage(content="unused")]))
+    service = make_service()
+
+    events = [event async for event in service.astream_input("user_1", "ORD202311001到哪了")]
+
+    assert [e["event"] for e in events] == ["session", "tool_start", "tool_end", "token", "done"]
+    assert events[1]["data"]["message"] == "正在查询订单…"
+    assert events[-1]["data"]["response"] == events[3]["data"]["content"]
+    assert "顺丰快递" in events[-1]["data"]["response"]
+    assert model.inputs == []
+
+
+def test_tool_progress_messages_cover_order_and_refund_tools():
+    service = make_service()
+
+    assert service._describe_tool_progress("query_order") == "正在查询订单…"
+    assert service._describe_tool_progress("submit_refund_request") == "正在提交退款申请…"
+    assert service._describe_tool_progress("query_refund_status") == "正在查询退款状态…"
+
+
+def test_tool_binding_is_cached_until_plugins_reload(use_model):
+    model = use_model(ScriptedChatModel(responses=[AIMessage(content="ok")]))
+    service = make_service()
+
+    service.process_input("user_1", "你好")
+    service.process_input("user_1", "再问一次")
+    assert model.bind_count == 1
+
+    assert service.reload_plugins()["success"] is True
+    service.process_input("user_1", "插件重载后")
+    assert model.bind_count == 2
+
+
+def test_tool_dispatch_uses_llm_visible_name():
+    schema_names = [schema["function"]["name"] for schema in plugin_manager.get_tool_schemas()]
+
+    assert "list_invoices" in schema_names
+    assert plugin_manager.get_tool_function("list_invoices") is plugin_manager.get_plugin_function("invoice_tool.list_invoices")
+
+
+@pytest.fixture
+def slow_tool(monkeypatch):
+    """注册一个模拟后端延迟的同步工具"""
+    def slow_lookup(order_id: str) -> str:
+        """模拟慢查询"""
+        time.sleep(0.3)
+        return f"result:{order_id}"
+
+    monkeypatch.setitem(plugin_manager.tool_dispatch, "slow_lookup", slow_lookup)
+
+
+def _three_lookups() -> AIMessage:
+    return AIMessage(content="", tool_calls=[
+        {"name": "slow_lookup", "args": {"order_id": f"ORD{i}"}, "id": f"call_{i}"}
+        for i in range(3)
+    ])
+
+
+def test_call_tools_runs_sync_tools_concurrently(slow_tool):
+    service = make_service()
+
+    started = time.perf_counter()
+    result = service._call_tools({"messages": [_three_lookups()]})
+    elapsed = time.perf_counter() - started
+
+    assert [m.tool_call_id for m in result["messages"]] == ["call_0", "call_1", "call_2"]
+    assert [m.content for m in result["messages"]] == ["result:ORD0", "result:ORD1", "result:ORD2"]
+    assert elapsed < 0.6
+
+
+async def test_acall_tools_runs_sync_and_async_tools_concurrently(slow_tool, monkeypatch):
+    async def async_lookup(order_id: str) -> str:
+        """模拟异步慢查询"""
+        await asyncio.sleep(0.3)
+        return f"async:{order_id}"
+
+    monkeypatch.setitem(plugin_manager.tool_dispatch, "async_lookup", async_lookup)
+    message = _three_lookups()
+    message.tool_calls.append({"name": "async_lookup", "args": {"order_id": "ORD9"}, "id": "call_9"})
+    service = make_service()
+
+    started = time.perf_counter()
+    result = await service._acall_tools({"messages": [message]})
+    elapsed = time.perf_counter() - started
+
+    assert [m.tool_call_id for m in result["messages"]] == ["call_0", "call_1", "call_2", "call_9"]
+    assert result["messages"][-1].content == "async:ORD9"
+    assert elapsed < 0.6
+
+
+async def test_tool_worker_limit_applies_per_step_not_across_conversations(slow_tool):
+    service = make_service()
+    service.config.TOOL_MAX_WORKERS = 1
+    single_lookup = lambda i: AIMessage(content="", tool_calls=[
+        {"name": "slow_lookup", "args": {"order_id": f"ORD{i}"}, "id": f"call_{i}"}
+    ])
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        service._acall_tools({"messages": [single_lookup(i)]}) for i in range(4)
+    ])
+    elapsed = time.perf_counter() - started
+
+    assert [r["messages"][0].content for r in results] == [f"result:ORD{i}" for i in range(4)]
+    # 4个会话各自的单次工具调用并行执行，不会被单步并发上限串行化
+    assert elapsed < 0.6
+
+
+def test_sqlite_sessions_survive_service_restart(use_model, tmp_path):
+    use_model(ScriptedChatModel(responses=[AIMessage(content="第一轮回答"), AIMessage(content="第二轮回答")]))
+    db_path = str(tmp_path / "sessions.db")
+
+    def make_sqlite_service() -> ChatService:
+        session_store, checkpointer = create_session_backend("sqlite", db_path=db_path, cache_size=8)
+        return ChatService(session_store=session_store, checkpointer=checkpointer)
+
+    session_id = make_sqlite_service().process_input("user_1", "第一轮")["session_id"]
+
+    restarted = make_sqlite_service()
+    result = restarted.process_input("user_1", "第二轮", session_id=session_id)
+    history = restarted.get_session_history("user_1", session_id)
+
+    assert result["session_id"] == session_id
+    assert [m["content"] for m in history["messages"]] == ["第一轮", "第一轮回答", "第二轮", "第二轮回答"]
+    assert restarted.get_user_sessions("user_1")["sessions"][0]["message_count"] == 4
+
+
+def test_hot_sessions_are_served_from_memory_tier(use_model, tmp_path, monkeypatch):
+    use_model(ScriptedChatModel(responses=[AIMessage(content="ok")]))
+    session_store, checkpointer = create_session_backend("sqlite", db_path=str(tmp_path / "sessions.db"))
+    service = ChatService(session_store=session_store, checkpointer=checkpointer)
+    session_id = service.process_input("user_1", "你好")["session_id"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("热会话不应读取磁盘")
+
+    monkeypatch.setattr(checkpointer.backend, "get_tuple", fail)
+    monkeypatch.setattr(session_store.backend, "get", fail)
+
+    result = service.process_input("user_1", "再来一轮", session_id=session_id)
+    assert result["status"] == "success"
+    assert result["session_id"] == session_id
+
+
+def test_hot_tier_sees_turns_written_by_another_process(use_model, tmp_path):
+    use_model(ScriptedChatModel(responses=[AIMessage(content="A1"), AIMessage(content="B"), AIMessage(content="A2")]))
+    db_path = str(tmp_path / "sessions.db")
+
+    def make_sqlite_service() -> ChatService:
+        session_store, checkpointer = create_session_backend("sqlite", db_path=db_path)
+        return ChatService(session_store=session_store, checkpointer=checkpointer)
+
+    # 两个服务实例模拟共享同一数据库的两个工作进程，同一会话的请求交替落到两边
+    worker_a, worker_b = make_sqlite_service(), make_sqlite_service()
+    session_id = worker_a.process_input("user_1", "a1")["session_id"]
+    worker_b.process_input("user_1", "b", session_id=session_id)
+    worker_a.process_input("user_1", "a2", session_id=session_id)
+
+    history = worker_a.get_session_history("user_1", session_id)
+    assert [m["content"] for m in history["messages"]] == ["a1", "A1", "b", "B", "a2", "A2"]
+    assert worker_b.get_user_sessions("user_1")["sessions"][0]["message_count"] == 6
+
+
+def test_explicit_empty_session_store_is_used():
+    session_store, checkpointer = create_session_backend("memory")
+    assert len(session_store) == 0
+
+    service = ChatService(session_store=session_store, checkpointer=checkpointer)
+
+    assert service.sessions is session_store
+    assert service.checkpointer is checkpointer
+
+
+def test_user_entities_fill_missing_tool_arguments(use_model, monkeypatch):
+    calls = []
+
+    def lookup_order(order_id: str) -> str:
+        """查询订单"""
+        calls.append(order_id)
+        return f"订单 {order_id} 已发货"
+
+    monkeypatch.setitem(plugin_manager.tool_dispatch, "lookup_order", lookup_order)
+    use_model(ScriptedChatModel(responses=[
+        # 模型漏掉了订单号前缀
+        AIMessage(content="", tool_calls=[{"name": "lookup_order", "args": {"order_id": "202311001"}, "id": "call_1"}]),
+        AIMessage(content="您的订单已发货"),
+    ]))
+    service = make_service()
+
+    result = service.process_input("user_1", "帮我看看订单ORD202311001，顺便退掉另一件")
+
+    assert result["response"] == "您的订单已发货"
+    assert calls == ["ORD202311001"]
+    state = service.app.get_state({"configurable": {"thread_id": result["session_id"]}})
+    assert state.values["entities"]["order_ids"] == ["ORD202311001"]
+
+
+def test_plugin_manager_discovers_async_order_and_refund_tools():
+    status = plugin_manager.get_plugin_status()["plugins"]
+
+    assert sorted(status["order_query"]["async_tools"]) == ["order_query.query_order", "order_query.query_orders"]
+    assert sorted(status["refund_request"]["async_tools"]) == [
+        "refund_request.list_refunds",
+        "refund_request.query_refund_status",
+        "refund_request.query_refunds_by_order",
+        "refund_request.submit_refund_request",
+    ]
+    assert status["invoice_tool"]["async_tools"] == []
+    schema_names = {schema["function"]["name"] for schema in plugin_manager.get_tool_schemas()}
+    assert {"query_order", "query_orders", "submit_refund_request", "query_refund_status"} <= schema_names
+
+
+async def test_async_tools_are_awaited_without_worker_threads(monkeypatch):
+    async def no_threads(*args, **kwargs):
+        raise AssertionError("异步工具不应交给线程池执行")
+
+    monkeypatch.setattr(asyncio, "to_thread", no_threads)
+    service = make_service()
+    message = AIMessage(content="", tool_calls=[
+        {"name": "query_order", "args": {"order_id": f"ORD20231100{index % 3 + 1}"}, "id": f"call_{index}"}
+        for index in range(8)
+    ])
+
+    started = time.perf_counter()
+    result = await service._acall_tools({"messages": [message]})
+    elapsed = time.perf_counter() - started
+
+    assert "智能手表" in result["messages"][0].content
+    # 8个各需0.5秒的查询在事件循环中并发等待
+    assert elapsed < 1.0
+
+
+def test_sync_chain_runs_async_tools(use_model):
+    use_model(ScriptedChatModel(responses=[
+        AIMessage(content="", tool_calls=[
+            {"name": "submit_refund_request", "args": {"order_id": "ORD202311002", "reason": "商品损坏"}, "id": "call_1"}
+        ]),
+        AIMessage(content="退款申请已提交"),
+    ]))
+    service = make_service()
+
+    result = service.process_input("user_1", "ORD202311002的耳机坏了，帮我退款")
+
+    state = service.app.get_state({"configurable": {"thread_id": result["session_id"]}})
+    tool_message = [m for m in state.values["messages"] if isinstance(m, ToolMessage)][0]
+    assert tool_message.content.startswith("您的退款申请已提交")
+    assert result["response"] == "退款申请已提交"
+
+
+@pytest.mark.parametrize("run_async", [False, True])
+async def test_repeated_refund_submissions_create_one_refund(use_model, run_async):
+    submit = {"name": "submit_refund_request", "args": {"order_id": "ORD202311003", "reason": "不想要了/买错了"}}
+    use_model(ScriptedChatModel(responses=[
+        # 模型在同一步中重复发出了相同的工具调用
+        AIMessage(content="", tool_calls=[{**submit, "id": "call_1"}, {**submit, "id": "call_2"}]),
+        AIMessage(content="退款申请已提交"),
+    ]))
+    service = make_service()
+    message = f"ORD202311003不想要了，帮我退款（{run_async}-{time.time()}）"
+
+    if run_async:
+        result = await service.aprocess_input("user_1", message)
+        # 客户端超时后重试同一条消息
+        await service.aprocess_input("user_1", message, result["session_id"])
+    else:
+        result = service.process_input("user_1", message)
+        service.process_input("user_1", message, result["session_id"])
+
+    state = service.app.get_state({"configurable": {"thread_id": result["session_id"]}})
+    tool_messages = [m.content for m in state.values["messages"] if isinstance(m, ToolMessage)]
+    refund_ids = {content.split("申请编号：")[1][:19] for content in tool_messages}
+    assert len(tool_messages) == 4
+    assert len(refund_ids) == 1
@@ -0,0 +1,144 @@
+"""
+测试中文相对日期解析
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# 模型在导入时即初始化，测试中使用占位密钥（不会发出真实请求）
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+
+from src.services.basic_chat_service import BasicChatService
+from src.services.date_resolver import find_date_expression, parse_chinese_number, resolve_date
+
+# 2023-11-10 是星期五
+TODAY = date(2023, 11, 10)
+
+
+@pytest.mark.parametrize("expression, expected", [
+    # 相对天数
+    ("今天", "2023-11-10"),
+    ("明天", "2023-11-11"),
+    ("后天", "2023-11-12"),
+    ("大后天", "2023-11-13"),
+    ("昨天", "2023-11-09"),
+    ("前天", "2023-11-08"),
+    ("大前天", "2023-11-07"),
+    # 周
+    ("上周三", "2023-11-01"),
+    ("上星期日", "2023-11-05"),
+    ("下周一", "2023-11-13"),
+    ("下礼拜五", "2023-11-17"),
+    ("本周日", "2023-11-12"),
+    ("这周二", "2023-11-07"),
+    ("周一", "2023-11-06"),
+    ("上上周五", "2023-10-27"),
+    ("上周", "2023-11-03"),
+    ("下周", "2023-11-17"),
+    # 月
+    ("上个月", "2023-10-10"),
+    ("下个月", "2023-12-10"),
+    ("上月", "2023-10-10"),
+    ("上个月5号", "2023-10-05"),
+    ("下个月一号", "2023-12-01"),
+    # N天/周/月前后
+    ("3天前", "2023-11-07"),
+    ("三天前", "2023-11-07"),
+    ("十天后", "2023-11-20"),
+    ("两周前", "2023-10-27"),
+    ("一个星期以后", "2023-11-17"),
+    ("2个月前", "2023-09-10"),
+    ("半个月前", "2023-10-26"),
+    ("二十一天之前", "2023-10-20"),
+    # 具体日期
+    ("2023-11-05", "2023-11-05"),
+    ("2023/1/5", "2023-01-05"),
+    ("2023.12.31", "2023-12-31"),
+    ("2023年11月5日", "2023-11-05"),
+    ("11月5号", "2023-11-05"),
+    ("十一月十五日", "2023-11-15"),
+    ("去年12月25日", "2022-12-25"),
+    ("5号", "2023-11-05"),
+])
+def test_resolve_date(expression, expected):
+    assert resolve_date(expression, TODAY).isoformat() == expected
+
+
+@pytest.mark.parametrize("expression", ["", "不久前", "那天", "2023-02-30", "13月1日", "最近", "上周三下午三点左右吧"])
+def test_unsupported_expressions_return_none(expression):
+    assert resolve_date(expression, TODAY) is None
+
+
+@pytest.mark.parametrize("today, expression, expected", [
+    # 月末顺延到目标月份最后一天
+    (date(2024, 3, 31), "上个月", "2024-02-29"),
+    (date(2023, 1, 15), "上个月", "2022-12-15"),
+    (date(2023, 12, 31), "下个月", "2024-01-31"),
+    # 星期一时"上周一"为7天前
+    (date(2023, 11, 6), "上周一", "2023-10-30"),
+])
+def test_calendar_edge_cases(today, expression, expected):
+    assert resolve_date(expression, today).isoformat() == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("我上周三下的单，什么时候能到货？", ("上周三", "2023-11-01")),
+    ("订单ORD202311001昨天就该到了", ("昨天", "2023-11-09")),
+    ("请把开票日期改为2023-11-05", ("2023-11-05", "2023-11-05")),
+    ("你好", None),
+    # 单号或楼号、线路中的"N号"不是日期
+    ("请查一下ORD202311001号订单", None),
+    ("我住在3号楼", None),
+    ("坐地铁十号线过去", None),
+    ("收件地址是5号院2号门", None),
+    ("15号能到吗", ("15号", "2023-11-15")),
+])
+def test_find_date_expression(text, expected):
+    found = find_date_expression(text, TODAY)
+    assert (found[0], found[1].isoformat()) == expected if expected else found is None
+
+
+@pytest.mark.parametrize("text, expected", [("3", 3), ("十", 10), ("十五", 15), ("二十", 20), ("三十一", 31), ("两", 2)])
+def test_parse_chinese_number(text, expected):
+    assert parse_chinese_number(text) == expected
+
+
+class FailingChain:
+    def invoke(self, inputs):
+        raise AssertionError("可解析的表达不应调用模型")
+
+
+class StubChain:
+    def __init__(self):
+        self.calls = []
+
+    def invoke(self, inputs):
+        self.calls.append(inputs["time_expression"])
+        return {"inferred_date": "2023-11-08", "current_date": inputs["current_date"]}
+
+
+def test_infer_time_resolves_locally_without_llm():
+    service = BasicChatService()
+    service.time_inference_chain = FailingChain()
+
+    result = service.infer_time("昨天")
+
+    assert result["success"] is True
+    assert result["source"] == "rule"
+    assert result["inferred_date"] == resolve_date("昨天").isoformat()
+
+
+def test_infer_time_falls_back_to_llm():
+    service = BasicChatService()
+    service.time_inference_chain = StubChain()
+
+    result = service.infer_time("前几天")
+
+    assert result["success"] is True
+    assert result["source"] == "llm"
+    assert result["inferred_date"] == "2023-11-08"
+    assert service.time_inference_chain.calls == ["前几天"]
@@ -0,0 +1,84 @@
+"""
+测试用户消息实体抽取
+"""
+import os
+import sys
+from datetime import date
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.entity_extractor import extract_entities, prefill_tool_args
+
+TODAY = date(2023, 11, 10)
+
+
+@pytest.mark.parametrize("text, field, expected", [
+    ("查询订单ORD202311001", "order_ids", ["ORD202311001"]),
+    ("ord202311001和ORD202311002都没到", "order_ids", ["ORD202311001", "ORD202311002"]),
+    ("ORD202311001 ORD202311001", "order_ids", ["ORD202311001"]),
+    ("退款单REF20231107ABCD1234进度", "refund_ids", ["REF20231107ABCD1234"]),
+    ("发票INV202311071001开好了吗", "invoice_ids", ["INV202311071001"]),
+    ("快递单号SF1234567890", "tracking_numbers", ["SF1234567890"]),
+    ("圆通YT9876543210到哪了", "tracking_numbers", ["YT9876543210"]),
+    # 更长的字母数字串中的片段不算单号
+    ("XORD202311001", "order_ids", []),
+    ("ORD2023110012", "order_ids", []),
+    ("my order ORD202311001", "order_ids", ["ORD202311001"]),
+])
+def test_extracts_identifiers(text, field, expected):
+    assert extract_entities(text, TODAY)[field] == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("订单ORD2023110少了一位", [{"type": "order_id", "text": "ORD2023110"}]),
+    ("REF2023XYZ", [{"type": "refund_id", "text": "REF2023XYZ"}]),
+    ("invoice和reference都不是单号", []),
+])
+def test_reports_malformed_identifiers(text, expected):
+    assert extract_entities(text, TODAY)["malformed_ids"] == expected
+
+
+def test_extracts_ids_and_dates_in_one_pass():
+    entities = extract_entities("我上周三下的订单ORD202311001，快递SF1234567890昨天还在上海", TODAY)
+
+    assert entities["order_ids"] == ["ORD202311001"]
+    assert entities["tracking_numbers"] == ["SF1234567890"]
+    assert entities["dates"] == [
+        {"text": "上周三", "date": "2023-11-01"},
+        {"text": "昨天", "date": "2023-11-09"},
+    ]
+
+
+def query_order(order_id: str) -> str:
+    """查询订单"""
+    return order_id
+
+
+def query_orders(order_ids: list) -> str:
+    """批量查询订单"""
+    return ",".join(order_ids)
+
+
+@pytest.mark.parametrize("function, args, expected", [
+    # 漏填
+    (query_order, {}, {"order_id": "ORD202311001"}),
+    # 格式不对
+    (query_order, {"order_id": "202311001"}, {"order_id": "ORD202311001"}),
+    # 模型填写的合法单号保持不变
+    (query_order, {"order_id": "ORD202311003"}, {"order_id": "ORD202311003"}),
+    # 单号列表参数
+    (query_orders, {}, {"order_ids": ["ORD202311001"]}),
+])
+def test_prefill_tool_args(function, args, expected):
+    entities = extract_entities("订单ORD202311001", TODAY)
+    assert prefill_tool_args(function, args, entities) == expected
+
+
+def test_prefill_skips_ambiguous_identifiers():
+    entities = extract_entities("ORD202311001和ORD202311002", TODAY)
+    args = {}
+
+    assert prefill_tool_args(query_order, args, entities) is args
@@ -0,0 +1,102 @@
+"""
+测试按token预算组装对话历史
+"""
+import os
+import sys
+import threading
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from src.services.history_window import HistoryWindow, estimate_message_tokens, estimate_tokens
+
+
+def _turns(count: int) -> list:
+    messages = []
+    for i in range(count):
+        messages.append(HumanMessage(content=f"第{i}轮问题" + "内容" * 20))
+        messages.append(AIMessage(content=f"第{i}轮回答" + "内容" * 20))
+    return messages
+
+
+def test_estimate_tokens_counts_cjk_per_character():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("发票怎么开") == 5
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("订单ORD202311003") == 2 + 3
+
+
+def test_history_within_budget_is_sent_verbatim():
+    window = HistoryWindow(max_tokens=10000)
+    messages = _turns(3)
+
+    assert window.build_prompt("s1", messages) == messages
+
+
+def test_older_turns_are_trimmed_at_turn_boundaries():
+    window = HistoryWindow(max_tokens=200)
+    messages = _turns(10)
+    messages[-2:-1] = [
+        AIMessage(content="", tool_calls=[{"name": "query_order", "args": {"order_id": "ORD1"}, "id": "call_1"}]),
+        ToolMessage(content="已发货", tool_call_id="call_1", name="query_order"),
+        messages[-2],
+    ]
+
+    prompt = window.build_prompt("s1", messages)
+
+    assert isinstance(prompt[0], HumanMessage)
+    assert prompt == messages[-len(prompt):]
+    assert sum(estimate_message_tokens(m) for m in prompt) <= 200
+    assert len(prompt) < len(messages)
+
+
+def test_current_turn_is_kept_even_when_over_budget():
+    window = HistoryWindow(max_tokens=10)
+    messages = _turns(2) + [HumanMessage(content="很长的问题" * 50)]
+
+    assert window.build_prompt("s1", messages) == messages[-1:]
+
+
+def test_trimmed_turns_are_summarized_in_background():
+    release = threading.Event()
+    calls = []
+
+    def summarizer(summary, messages):
+        release.wait(5)
+        calls.append((summary, [m.content for m in messages]))
+        return f"摘要{len(calls)}"
+
+    window = HistoryWindow(max_tokens=200, summarizer=summarizer)
+    messages = _turns(10)
+
+    # 摘要尚未完成时不阻塞本轮请求，重复请求也不会重复提交摘要任务
+    first = window.build_prompt("s1", messages)
+    second = window.build_prompt("s1", messages)
+    assert first == second
+    assert not isinstance(first[0], SystemMessage)
+    release.set()
+    window.wait_for_pending()
+
+    assert len(calls) == 1
+    assert calls[0][0] == ""
+    assert calls[0][1] == [m.content for m in messages[:len(messages) - len(first)]]
+
+    prompt = window.build_prompt("s1", messages)
+    assert isinstance(prompt[0], SystemMessage)
+    assert "摘要1" in prompt[0].content
+    assert sum(estimate_message_tokens(m) for m in prompt) <= 200
+
+
+def test_summary_failure_keeps_previous_state():
+    def summarizer(summary, messages):
+        raise RuntimeError("模型不可用")
+
+    window = HistoryWindow(max_tokens=200, summarizer=summarizer)
+    messages = _turns(10)
+
+    window.build_prompt("s1", messages)
+    window.wait_for_pending()
+
+    assert not isinstance(window.build_prompt("s1", messages)[0], SystemMessage)
@@ -0,0 +1,109 @@
+"""
+测试幂等提交和退款申请去重
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.idempotency import IdempotencyWindow, conversation_turn, current_turn
+from src.services.refund_repository import MemoryRefundRepository
+from src.tools.refund_request import RefundRequestTool
+
+
+def make_tool(window_seconds: float = 600) -> RefundRequestTool:
+    return RefundRequestTool(repository=MemoryRefundRepository(), dedup_window=IdempotencyWindow(window_seconds))
+
+
+def test_window_returns_first_result_until_it_expires(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.idempotency.time.monotonic", lambda: now[0])
+    window = IdempotencyWindow(window_seconds=60)
+    calls = []
+
+    def submit():
+        calls.append(len(calls))
+        return f"结果{len(calls)}"
+
+    assert window.run("key", submit) == ("结果1", False)
+    assert window.run("key", submit) == ("结果1", True)
+    assert window.run("other", submit) == ("结果2", False)
+    now[0] += 61
+    assert window.run("key", submit) == ("结果3", False)
+
+
+def test_window_is_bounded():
+    window = IdempotencyWindow(capacity=2)
+    for key in ("a", "b", "c"):
+        window.run(key, lambda: key)
+
+    assert len(window) == 2
+    assert window.run("a", lambda: "新结果") == ("新结果", False)
+
+
+def test_failed_submission_can_be_retried():
+    window = IdempotencyWindow()
+
+    def failing():
+        raise ConnectionError("退款服务不可用")
+
+    with pytest.raises(ConnectionError):
+        window.run("key", failing)
+    assert window.run("key", lambda: "成功") == ("成功", False)
+
+
+def test_concurrent_duplicates_wait_for_first_submission():
+    tool = make_tool()
+    results = []
+
+    def submit():
+        results.append(tool.submit_refund_request("ORD202311001", "商品损坏", idempotency_key="retry-1"))
+
+    threads = [threading.Thread(target=submit) for _ in range(5)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert time.perf_counter() - started < 0.9
+    assert len({result["refund_id"] for result in results}) == 1
+    assert sorted(result.get("duplicate", False) for result in results) == [False] + [True] * 4
+    assert len(tool.repository) == 1
+
+
+async def test_repeated_submission_in_same_turn_returns_original_refund_immediately():
+    tool = make_tool()
+
+    with conversation_turn("session-1:turn-1"):
+        first = await tool.asubmit_refund_request("ORD202311001", "商品损坏")
+        started = time.perf_counter()
+        again = await tool.asubmit_refund_request("ord202311001", "商品损坏", "外壳裂了")
+        elapsed = time.perf_counter() - started
+    with conversation_turn("session-1:turn-2"):
+        next_turn = await tool.asubmit_refund_request("ORD202311001", "商品损坏")
+
+    assert elapsed < 0.1
+    assert again["refund_id"] == first["refund_id"]
+    assert again["duplicate"] is True and "无需重复提交" in again["message"]
+    assert next_turn["refund_id"] != first["refund_id"]
+    assert len(tool.repository) == 2
+    assert current_turn() is None
+
+
+async def test_turn_is_inherited_by_tasks_and_threads():
+    async def read_turn():
+        await asyncio.sleep(0)
+        return current_turn()
+
+    with conversation_turn("turn-1"):
+        in_task = await asyncio.create_task(read_turn())
+        in_thread = await asyncio.to_thread(current_turn)
+
+    assert in_task == in_thread == "turn-1"
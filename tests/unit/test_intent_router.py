@@ -0,0 +1,65 @@
+"""
+测试快速意图路由
+"""
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.intent_router import FastPathRouter
+
+
+@pytest.mark.parametrize("message, intent, entity_id", [
+    ("查询订单ORD202311003", "order_status", "ORD202311003"),
+    ("我想查询订单ORD202311003的状态", "order_status", "ORD202311003"),
+    ("ORD202311001到哪了？", "order_status", "ORD202311001"),
+    ("ord202311002", "order_status", "ORD202311002"),
+    ("订单 ORD202311002", "order_status", "ORD202311002"),
+    ("退款REF20231107ABCD1234进度怎么样", "refund_status", "REF20231107ABCD1234"),
+    ("查一下发票INV202311071001的状态", "invoice_status", "INV202311071001"),
+])
+def test_unambiguous_lookups_are_routed(message, intent, entity_id):
+    match = FastPathRouter().match(message)
+
+    assert match is not None
+    assert (match.intent, match.entity_id) == (intent, entity_id)
+
+
+@pytest.mark.parametrize("message", [
+    "你好",
+    "我想查询订单的状态",
+    "我想申请退款，订单号是ORD202311005，因为不想要了",
+    "请为订单ORD202311003开具发票",
+    "ORD202311001和ORD202311002都到哪了",
+    "取消退款REF20231107ABCD1234",
+    "把发票INV202311071001状态改为paid",
+    "ORD202311001这个商品好用吗",
+    "查询订单ORD202311003，另外我上周买的耳机有点问题想咨询一下怎么处理比较好",
+    # 单号后面多了字符或少了字符，不能截取成另一个单号
+    "查询订单ORD2023110031",
+    "ORD202311003A 到哪了",
+    "查询退款REF20231107ABCD12345",
+    "查询发票XINV202311071001",
+    "查询订单ORD20231100和ORD202311003",
+])
+def test_ambiguous_messages_fall_back_to_graph(message):
+    assert FastPathRouter().match(message) is None
+
+
+def test_order_reply_uses_status_formatter():
+    router = FastPathRouter()
+
+    reply = router.execute(router.match("查询订单ORD202311003"))
+
+    assert reply == "您的订单 ORD202311003（智能音箱）正在北京仓库处理中，预计 2023-11-12 发货，请耐心等待。"
+
+
+def test_unknown_ids_return_tool_error():
+    router = FastPathRouter()
+
+    reply = router.execute(router.match("查询订单ORD209912999"))
+
+    assert reply == "订单号 ORD209912999 不存在，请检查订单号是否正确"
@@ -0,0 +1,262 @@
+"""
+测试发票管理器
+"""
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services import invoice_store
+from src.tools.invoice_tool import InvoiceManager
+
+CUSTOMERS = ["ABC科技有限公司", "abc贸易公司", "星辰传媒", "Northwind Traders"]
+ITEMS = [{"name": "咨询服务", "quantity": 1, "unit_price": 1000}]
+
+
+@pytest.fixture
+def manager():
+    manager = InvoiceManager()
+    for index in range(40):
+        manager.create_invoice(
+            CUSTOMERS[index % len(CUSTOMERS)],
+            "91310000123456789X",
+            [dict(item) for item in ITEMS],
+            f"2023-{index % 12 + 1:02d}-{index % 28 + 1:02d}"
+        )
+    return manager
+
+
+def brute_force(manager, customer_name=None, status=None):
+    """逐条筛选并排序，作为索引查询的对照"""
+    invoices = [
+        invoice for invoice in manager.invoices.values()
+        if (not customer_name or customer_name.casefold() in invoice.customer_name.casefold())
+        and (not status or invoice.status == status)
+    ]
+    invoices.sort(key=lambda invoice: (invoice.issue_date, invoice.invoice_id), reverse=True)
+    return [invoice.invoice_id for invoice in invoices]
+
+
+def collect_pages(manager, limit, **filters):
+    invoice_ids, cursor = [], None
+    while True:
+        result = manager.list_invoices(limit=limit, cursor=cursor, **filters)
+        assert result["success"]
+        assert len(result["invoices"]) <= limit
+        invoice_ids.extend(invoice["invoice_id"] for invoice in result["invoices"])
+        cursor = result["next_cursor"]
+        if cursor is None:
+            return invoice_ids
+
+
+@pytest.mark.parametrize("filters", [
+    {},
+    {"customer_name": "ABC"},
+    {"customer_name": "c"},
+    {"customer_name": "公司"},
+    {"customer_name": "wind trad"},
+    {"status": "issued"},
+    {"status": "paid", "customer_name": "abc科技"},
+    {"customer_name": "不存在的客户"},
+])
+def test_pages_match_brute_force_order(manager, filters):
+    manager.update_invoice_status(next(iter(manager.invoices)), "paid")
+    for invoice_id in list(manager.invoices)[::3]:
+        manager.update_invoice_status(invoice_id, "paid")
+
+    assert collect_pages(manager, limit=7, **filters) == brute_force(manager, **filters)
+
+
+def test_status_index_follows_updates(manager):
+    invoice_id = manager.list_invoices(limit=1)["invoices"][0]["invoice_id"]
+
+    manager.update_invoice_status(invoice_id, "sent")
+
+    assert [invoice["invoice_id"] for invoice in manager.list_invoices(status="sent")["invoices"]] == [invoice_id]
+    assert invoice_id not in {invoice["invoice_id"] for invoice in manager.list_invoices(status="issued", limit=0)["invoices"]}
+
+
+def test_first_page_is_newest_and_reports_next_cursor(manager):
+    result = manager.list_invoices(limit=3)
+
+    assert [invoice["issue_date"] for invoice in result["invoices"]] == ["2023-12-24", "2023-12-12", "2023-12-08"]
+    assert result["next_cursor"] == f"2023-12-08|{result['invoices'][-1]['invoice_id']}"
+    assert manager.list_invoices(limit=0)["total_count"] == 40
+
+
+def test_money_is_computed_in_integer_cents():
+    manager = InvoiceManager()
+    items = [{"name": "签字笔", "quantity": 3, "unit_price": 0.1}, {"name": "笔记本", "quantity": 2, "unit_price": 19.99}]
+
+    invoice = manager.create_invoice("星辰传媒", "91310000123456789X", items, "2023-11-05")["invoice"]
+
+    assert [item["total"] for item in invoice["items"]] == [0.3, 39.98]
+    assert (invoice["subtotal"], invoice["tax_amount"], invoice["total_with_tax"]) == (40.28, 5.24, 45.52)
+    assert (invoice["issue_date"], invoice["due_date"], invoice["status"]) == ("2023-11-05", "2023-12-05", "issued")
+    assert manager.get_invoice_details(invoice["invoice_id"])["invoice"] == invoice
+    record = manager.invoices[invoice["invoice_id"]]
+    assert record.total_cents == 4552 and not hasattr(record, "__dict__")
+
+
+def bulk_requests(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "customer_name": CUSTOMERS[index % len(CUSTOMERS)],
+            "customer_tax_id": "91310000123456789X",
+            "items": [
+                {"name": f"商品{offset}", "quantity": rng.choice([1, 2, 3, 0.5, 1.25]), "unit_price": round(rng.uniform(0.01, 999.99), 2)}
+                for offset in range(rng.randint(1, 4))
+            ],
+            "issue_date": f"2023-11-{index % 28 + 1:02d}"
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize("use_numpy", [True, False])
+def test_bulk_create_matches_one_by_one(monkeypatch, use_numpy):
+    if not use_numpy:
+        monkeypatch.setattr(invoice_store, "np", None)
+    requests = bulk_requests(200)
+    single = InvoiceManager()
+    expected = [single.create_invoice(**request)["invoice"] for request in requests]
+
+    manager = InvoiceManager()
+    result = manager.create_invoices_bulk(requests)
+
+    assert result["success"] is True and result["total_count"] == 200
+    actual = [manager.get_invoice_details(invoice_id)["invoice"] for invoice_id in result["invoice_ids"]]
+    ignored = ("invoice_id", "created_at", "updated_at")
+    assert [{k: v for k, v in invoice.items() if k not in ignored} for invoice in actual] == [
+        {k: v for k, v in invoice.items() if k not in ignored} for invoice in expected
+    ]
+    assert result["total_with_tax"] == round(sum(invoice["total_with_tax"] for invoice in expected), 2)
+    assert len(set(result["invoice_ids"])) == 200
+    assert collect_pages(manager, limit=30) == brute_force(manager)
+
+
+def test_bulk_create_is_all_or_nothing():
+    manager = InvoiceManager()
+    requests = bulk_requests(5)
+    requests[3]["items"][0]["unit_price"] = 0
+
+    result = manager.create_invoices_bulk(requests)
+
+    assert result["success"] is False
+    assert result["error"].startswith("第 4 张发票")
+    assert len(manager.invoices) == 0
+    requests[3]["items"][0]["unit_price"] = "abc"
+    assert manager.create_invoices_bulk(requests)["success"] is False
+    assert manager.create_invoices_bulk([])["success"] is False
+
+
+def scan_summary(manager, predicate):
+    """逐条累加，作为增量汇总的对照"""
+    invoices = [invoice for invoice in manager.invoices.values() if predicate(invoice)]
+    return (
+        len(invoices),
+        sum(invoice.subtotal_cents for invoice in invoices),
+        sum(invoice.total_cents for invoice in invoices)
+    )
+
+
+def summary_cents(result):
+    return result["count"], round(result["subtotal"] * 100), round(result["total_with_tax"] * 100)
+
+
+def test_summary_follows_creates_and_status_updates(manager):
+    manager.create_invoices_bulk(bulk_requests(30))
+    for invoice_id in list(manager.invoices)[::3]:
+        manager.update_invoice_status(invoice_id, "paid")
+    for invoice_id in list(manager.invoices)[::7]:
+        manager.update_invoice_status(invoice_id, "cancelled")
+
+    overall = manager.invoice_summary()
+    assert summary_cents(overall) == scan_summary(manager, lambda invoice: True)
+    assert sum(totals["count"] for totals in overall["by_status"].values()) == 70
+    assert summary_cents(manager.invoice_summary(status="paid")) == scan_summary(manager, lambda invoice: invoice.status == "paid")
+    assert summary_cents(manager.invoice_summary(month="2023-11")) == scan_summary(
+        manager, lambda invoice: invoice.issue_date.startswith("2023-11")
+    )
+    assert summary_cents(manager.invoice_summary(customer_name="abc科技有限公司")) == scan_summary(
+        manager, lambda invoice: invoice.customer_name == "ABC科技有限公司"
+    )
+    assert manager.invoice_summary(customer_name="不存在的客户")["count"] == 0
+
+
+def test_summary_rejects_invalid_filters(manager):
+    assert manager.invoice_summary(month="2023/11")["success"] is False
+    assert manager.invoice_summary(status="unknown")["success"] is False
+    assert manager.invoice_summary(customer_name="星辰传媒", month="2023-11")["success"] is False
+
+
+def test_invalid_cursor_is_rejected(manager):
+    result = manager.list_invoices(cursor="not-a-cursor")
+
+    assert result["success"] is False
+    assert "游标" in result["error"]
+
+
+def run_threads(target, count: int):
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_concurrent_creates_allocate_unique_ids():
+    manager = InvoiceManager(shard_count=4)
+    invoice_ids = []
+
+    def create(worker: int):
+        for index in range(250):
+            result = manager.create_invoice(CUSTOMERS[worker % 4], "91310000123456789X", [dict(ITEMS[0])], f"2023-11-{index % 28 + 1:02d}")
+            invoice_ids.append(result["invoice_id"])
+
+    run_threads(create, 8)
+
+    assert len(set(invoice_ids)) == len(invoice_ids) == 2000
+    assert len(manager.invoices) == 2000
+    assert manager.list_invoices(limit=0)["total_count"] == 2000
+    assert len(collect_pages(manager, limit=50, status="issued")) == 2000
+
+
+def test_update_with_stale_version_is_rejected():
+    manager = InvoiceManager()
+    invoice_id = manager.create_invoice("星辰传媒", "91310000123456789X", [dict(ITEMS[0])], "2023-11-05")["invoice_id"]
+    results = []
+
+    run_threads(lambda worker: results.append(manager.update_invoice_status(invoice_id, "paid", expected_version=1)), 8)
+
+    assert sum(result["success"] for result in results) == 1
+    assert all(result["conflict"] and result["current_version"] == 2 for result in results if not result["success"])
+    assert manager.query_invoice_status(invoice_id)["version"] == 2
+
+
+def test_concurrent_read_modify_write_loses_no_updates():
+    manager = InvoiceManager()
+    invoice_id = manager.create_invoice("星辰传媒", "91310000123456789X", [dict(ITEMS[0])], "2023-11-05")["invoice_id"]
+    statuses = ["sent", "paid", "overdue", "issued"]
+
+    def update(worker: int):
+        for index in range(50):
+            while True:
+                version = manager.query_invoice_status(invoice_id)["version"]
+                if manager.update_invoice_status(invoice_id, statuses[(worker + index) % 4], expected_version=version)["success"]:
+                    break
+
+    run_threads(update, 4)
+
+    status = manager.query_invoice_status(invoice_id)
+    assert status["version"] == 1 + 4 * 50
+    # 状态索引中只保留最新状态
+    assert [manager.list_invoices(status=value)["total_count"] for value in statuses].count(1) == 1
+    assert manager.invoice_summary(status=status["status"])["count"] == 1
+    assert sum(totals["count"] for totals in manager.invoice_summary()["by_status"].values()) == 1
@@ -0,0 +1,253 @@
+"""
+测试订单读穿缓存
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.order_cache import OrderCache
+from src.services.order_repository import SAMPLE_ORDERS, MemoryOrderRepository
+from src.tools.order_query import OrderQueryTool
+
+IN_TRANSIT = SAMPLE_ORDERS[0]
+DELIVERED = SAMPLE_ORDERS[1]
+
+
+class CountingLoader:
+    """记录后端查询次数的加载函数"""
+
+    def __init__(self, delay: float = 0.0):
+        self.repository = MemoryOrderRepository(SAMPLE_ORDERS)
+        self.delay = delay
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, order_id: str):
+        with self._lock:
+            self.calls.append(order_id)
+        time.sleep(self.delay)
+        return self.repository.get(order_id)
+
+    def load_many(self, order_ids):
+        with self._lock:
+            self.calls.append(list(order_ids))
+        time.sleep(self.delay)
+        return self.repository.get_many(order_ids)
+
+    async def aload(self, order_id: str):
+        self.calls.append(order_id)
+        await asyncio.sleep(self.delay)
+        return self.repository.get(order_id)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.order_cache.time.monotonic", lambda: now[0])
+    return now
+
+
+@pytest.mark.parametrize("order, expected_ttl", [
+    (IN_TRANSIT, 60),
+    (DELIVERED, 24 * 3600),
+    ({"order_id": "ORD202399999", "status": "已取消"}, 300),
+    (None, 30),
+])
+def test_ttl_depends_on_status(order, expected_ttl):
+    assert OrderCache().ttl_for(order) == expected_ttl
+
+
+def test_in_transit_orders_expire_before_delivered_orders(clock):
+    cache = OrderCache()
+    loader = CountingLoader()
+    for order in (IN_TRANSIT, DELIVERED):
+        cache.get_or_load(order["order_id"], loader)
+
+    clock[0] += 61
+    for order in (IN_TRANSIT, DELIVERED):
+        cache.get_or_load(order["order_id"], loader)
+
+    assert loader.calls == ["ORD202311001", "ORD202311002", "ORD202311001"]
+
+
+def test_unknown_order_ids_are_negatively_cached(clock):
+    cache = OrderCache(negative_ttl=30)
+    loader = CountingLoader()
+
+    assert cache.get_or_load("ORD000000000", loader) is None
+    assert cache.get_or_load("ORD000000000", loader) is None
+    clock[0] += 31
+    assert cache.get_or_load("ORD000000000", loader) is None
+
+    assert loader.calls == ["ORD000000000", "ORD000000000"]
+    assert cache.get_stats()["negative_hits"] == 1
+
+
+def test_lru_capacity(clock):
+    cache = OrderCache(capacity=2)
+    loader = CountingLoader()
+    for order_id in ("ORD202311001", "ORD202311002", "ORD202311003", "ORD202311001"):
+        cache.get_or_load(order_id, loader)
+
+    assert loader.calls == ["ORD202311001", "ORD202311002", "ORD202311003", "ORD202311001"]
+
+
+def test_concurrent_threads_share_one_backend_query():
+    cache = OrderCache()
+    loader = CountingLoader(delay=0.2)
+    results = []
+
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("ORD202311001", loader)))
+        for _ in range(10)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert loader.calls == ["ORD202311001"]
+    assert [result["product_name"] for result in results] == ["智能手表"] * 10
+    assert cache.get_stats()["coalesced"] == 9
+
+
+async def test_concurrent_coroutines_share_one_backend_query():
+    cache = OrderCache()
+    loader = CountingLoader(delay=0.1)
+
+    results = await asyncio.gather(*[cache.aget_or_load("ORD202311002", loader.aload) for _ in range(10)])
+
+    assert loader.calls == ["ORD202311002"]
+    assert all(result is results[0] for result in results)
+
+
+async def test_cancelled_leader_does_not_cancel_waiters():
+    cache = OrderCache()
+    loader = CountingLoader(delay=0.1)
+
+    leader = asyncio.create_task(cache.aget_or_load("ORD202311002", loader.aload))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(cache.aget_or_load("ORD202311002", loader.aload))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    assert (await waiter)["order_id"] == "ORD202311002"
+    assert leader.cancelled()
+    assert loader.calls == ["ORD202311002"]
+    assert await cache.aget_or_load("ORD202311002", loader.aload) is not None
+    assert loader.calls == ["ORD202311002"]
+
+
+async def test_async_backend_errors_reach_waiters_and_are_not_cached():
+    cache = OrderCache()
+    calls = []
+
+    async def failing_loader(order_id):
+        calls.append(order_id)
+        await asyncio.sleep(0.05)
+        raise ConnectionError("订单库不可用")
+
+    results = await asyncio.gather(
+        *[cache.aget_or_load("ORD202311001", failing_loader) for _ in range(3)],
+        return_exceptions=True
+    )
+
+    assert calls == ["ORD202311001"]
+    assert all(isinstance(result, ConnectionError) for result in results)
+    with pytest.raises(ConnectionError):
+        await cache.aget_or_load("ORD202311001", failing_loader)
+    assert len(calls) == 2
+
+
+def test_backend_errors_reach_all_waiters_and_are_not_cached():
+    cache = OrderCache()
+    calls = []
+
+    def failing_loader(order_id):
+        calls.append(order_id)
+        time.sleep(0.1)
+        raise ConnectionError("订单库不可用")
+
+    errors = []
+
+    def query():
+        try:
+            cache.get_or_load("ORD202311001", failing_loader)
+        except ConnectionError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=query) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 5
+    with pytest.raises(ConnectionError):
+        cache.get_or_load("ORD202311001", failing_loader)
+    assert len(calls) == 2
+
+
+def test_order_query_tool_skips_backend_latency_on_cache_hit():
+    tool = OrderQueryTool(repository=MemoryOrderRepository(SAMPLE_ORDERS), simulated_latency=0.2, cache=OrderCache())
+
+    tool.query_order("ORD202311002")
+    started = time.perf_counter()
+    result = tool.query_order("ORD202311002")
+    missing = [tool.query_order("ORD000000000") for _ in range(2)]
+
+    assert result["order_info"]["product_name"] == "无线耳机"
+    assert missing[1]["error"] == "订单号 ORD000000000 不存在，请检查订单号是否正确"
+    assert time.perf_counter() - started < 0.35
+
+
+def test_batch_lookup_loads_only_uncached_ids_in_one_call():
+    cache = OrderCache()
+    loader = CountingLoader()
+    cache.get_or_load("ORD202311001", loader)
+
+    orders = cache.get_many_or_load(["ORD202311001", "ORD202311002", "ORD000000000", "ORD202311002"], loader.load_many)
+
+    assert loader.calls == ["ORD202311001", ["ORD202311002", "ORD000000000"]]
+    assert list(orders) == ["ORD202311001", "ORD202311002", "ORD000000000"]
+    assert orders["ORD000000000"] is None
+    # 不存在的订单号同样被缓存
+    cache.get_many_or_load(["ORD202311002", "ORD000000000"], loader.load_many)
+    assert len(loader.calls) == 2
+
+
+def test_batch_lookup_waits_for_single_lookup_in_flight():
+    cache = OrderCache()
+    loader = CountingLoader(delay=0.2)
+    single = threading.Thread(target=cache.get_or_load, args=("ORD202311001", loader))
+    single.start()
+    time.sleep(0.05)
+
+    orders = cache.get_many_or_load(["ORD202311001", "ORD202311003"], loader.load_many)
+    single.join()
+
+    assert loader.calls == ["ORD202311001", ["ORD202311003"]]
+    assert orders["ORD202311001"]["product_name"] == "智能手表"
+
+
+async def test_query_orders_costs_one_backend_round_trip():
+    tool = OrderQueryTool(repository=MemoryOrderRepository(SAMPLE_ORDERS), simulated_latency=0.2, cache=OrderCache())
+
+    started = time.perf_counter()
+    result = await tool.aquery_orders(["ORD202311003", "ORD202311001", "ORD000000000", "ORD202311003"])
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.35
+    assert [item["order_id"] for item in result["results"]] == ["ORD202311003", "ORD202311001", "ORD000000000"]
+    assert [item["success"] for item in result["results"]] == [True, True, False]
+    assert tool.query_orders(["ORD202311001", "ORD000000000"])["results"][0]["order_info"]["status"] == "已发货"
+    assert tool.query_orders([])["success"] is False
+    assert "最多查询" in tool.query_orders([f"ORD2023{index:05d}" for index in range(51)])["error"]
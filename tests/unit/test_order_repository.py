@@ -0,0 +1,143 @@
+"""
+测试订单仓储
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.order_repository import (
+    SAMPLE_ORDERS,
+    MemoryOrderRepository,
+    SqliteConnectionPool,
+    SqliteOrderRepository,
+    create_order_repository,
+)
+from src.tools.order_query import OrderQueryTool
+
+
+def make_order(index: int, **overrides) -> dict:
+    order = {
+        "order_id": f"ORD2023{index:05d}",
+        "status": "已发货",
+        "product_name": f"商品{index}",
+        "order_date": f"2023-11-{index % 28 + 1:02d}",
+        "tracking_number": f"SF{index:010d}",
+    }
+    order.update(overrides)
+    return order
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryOrderRepository()
+        return
+    pool = SqliteConnectionPool(str(tmp_path / "orders.db"), size=4)
+    yield SqliteOrderRepository(pool)
+    pool.close()
+
+
+def test_get_and_find_by_tracking_number(repository):
+    repository.save_many(SAMPLE_ORDERS)
+
+    assert repository.get("ORD202311002")["product_name"] == "无线耳机"
+    assert repository.get("ORD999999999") is None
+    assert repository.find_by_tracking_number("SF1234567890")["order_id"] == "ORD202311001"
+    assert repository.find_by_tracking_number("SF0000000000") is None
+    assert len(repository) == 3
+
+
+def test_save_replaces_existing_order_and_its_indexes(repository):
+    repository.save(make_order(1))
+    repository.save(make_order(1, status="已签收", tracking_number="YT0000000001", order_date="2023-12-01"))
+
+    assert repository.get("ORD202300001")["status"] == "已签收"
+    assert repository.find_by_tracking_number("SF0000000001") is None
+    assert repository.find_by_tracking_number("YT0000000001")["order_id"] == "ORD202300001"
+    assert repository.list_by_date("2023-11-01", "2023-11-30") == []
+    assert len(repository) == 1
+
+
+def test_get_many_returns_only_existing_orders(repository):
+    repository.save_many(make_order(index) for index in range(20))
+
+    orders = repository.get_many(["ORD202300003", "ORD999999999", "ORD202300017", "ORD202300003"])
+
+    assert sorted(orders) == ["ORD202300003", "ORD202300017"]
+    assert orders["ORD202300017"]["product_name"] == "商品17"
+    assert repository.get_many([]) == {}
+
+
+def test_list_by_date_is_ordered_and_limited(repository):
+    repository.save_many(make_order(index) for index in range(100))
+
+    orders = repository.list_by_date("2023-11-03", "2023-11-04", limit=5)
+
+    assert [order["order_date"] for order in orders] == ["2023-11-03"] * 4 + ["2023-11-04"]
+    assert [order["order_id"] for order in orders[:4]] == sorted(order["order_id"] for order in orders[:4])
+    assert len(repository.list_by_date("2023-11-03", "2023-11-04")) == 8
+
+
+def test_sqlite_queries_use_indexes(tmp_path):
+    pool = SqliteConnectionPool(str(tmp_path / "orders.db"))
+    SqliteOrderRepository(pool)
+
+    with pool.connection() as conn:
+        plans = {
+            sql: " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+            for sql, params in [
+                (SqliteOrderRepository._GET_SQL, ("ORD202311001",)),
+                (SqliteOrderRepository._GET_MANY_SQL, ('["ORD202311001", "ORD202311002"]',)),
+                (SqliteOrderRepository._TRACKING_SQL, ("SF1234567890",)),
+                (SqliteOrderRepository._DATE_RANGE_SQL, ("2023-11-01", "2023-11-30", 10)),
+            ]
+        }
+
+    assert "USING PRIMARY KEY" in plans[SqliteOrderRepository._GET_SQL]
+    assert "USING PRIMARY KEY" in plans[SqliteOrderRepository._GET_MANY_SQL]
+    assert "idx_orders_tracking_number" in plans[SqliteOrderRepository._TRACKING_SQL]
+    assert "idx_orders_order_date" in plans[SqliteOrderRepository._DATE_RANGE_SQL]
+    pool.close()
+
+
+def test_sqlite_pool_serves_concurrent_readers(tmp_path):
+    pool = SqliteConnectionPool(str(tmp_path / "orders.db"), size=3)
+    repository = SqliteOrderRepository(pool)
+    repository.save_many(make_order(index) for index in range(500))
+    errors = []
+
+    def read(offset: int):
+        try:
+            for index in range(offset, 500, 8):
+                assert repository.get(f"ORD2023{index:05d}")["product_name"] == f"商品{index}"
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    pool.close()
+
+
+def test_order_query_tool_reads_from_repository(tmp_path):
+    repository = create_order_repository("sqlite", str(tmp_path / "orders.db"), pool_size=2)
+    repository.save_many(SAMPLE_ORDERS)
+    tool = OrderQueryTool(repository=repository)
+
+    assert tool.simulated_latency == 0
+    assert tool.query_order("ORD202311003")["order_info"]["current_location"] == "北京仓库"
+    assert tool.query_order("ORD000000000")["success"] is False
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_order_repository("redis")
@@ -0,0 +1,135 @@
+"""
+测试退款仓储
+"""
+import os
+import sys
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.order_repository import SqliteConnectionPool
+from src.services.refund_repository import (
+    MemoryRefundRepository,
+    SqliteRefundRepository,
+    create_refund_repository,
+)
+from src.core.config import config
+from src.tools.refund_request import RefundRequestTool
+
+
+def make_refund(index: int, **overrides) -> dict:
+    refund = {
+        "refund_id": f"REF20231101{index:08X}",
+        "order_id": f"ORD2023110{index % 3 + 1:02d}",
+        "reason": "商品质量问题",
+        "description": "",
+        "status": ["处理中", "已批准", "已拒绝"][index % 3],
+        "apply_time": f"2023-11-{index % 28 + 1:02d} 10:{index % 60:02d}:00",
+        "estimated_process_time": None,
+        "refund_amount": None,
+        "process_result": None,
+    }
+    refund.update(overrides)
+    return refund
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def repository(request, tmp_path):
+    if request.param == "memory":
+        yield MemoryRefundRepository()
+        return
+    pool = SqliteConnectionPool(str(tmp_path / "refunds.db"), size=2)
+    yield SqliteRefundRepository(pool)
+    pool.close()
+
+
+def test_list_by_order_is_newest_first(repository):
+    repository.save_many(make_refund(index) for index in range(30))
+
+    refunds = repository.list_by_order("ORD202311002")
+
+    assert len(refunds) == 10
+    assert all(refund["order_id"] == "ORD202311002" for refund in refunds)
+    assert [refund["apply_time"] for refund in refunds] == sorted((refund["apply_time"] for refund in refunds), reverse=True)
+    assert len(repository.list_by_order("ORD202311002", limit=3)) == 3
+    assert repository.list_by_order("ORD999999999") == []
+
+
+def test_list_refunds_filters_by_status_and_time_range(repository):
+    repository.save_many(make_refund(index) for index in range(30))
+
+    approved = repository.list_refunds(status="已批准", start_time="2023-11-05", end_time="2023-11-20")
+    latest = repository.list_refunds(limit=2)
+
+    assert [refund["apply_time"][:10] for refund in approved] == [
+        "2023-11-20", "2023-11-17", "2023-11-14", "2023-11-11", "2023-11-08", "2023-11-05"
+    ]
+    assert all(refund["status"] == "已批准" for refund in approved)
+    assert [refund["apply_time"][:10] for refund in latest] == ["2023-11-28", "2023-11-27"]
+    assert repository.list_refunds(status="已撤销") == []
+
+
+def test_status_change_moves_refund_between_indexes(repository):
+    repository.save(make_refund(1, status="处理中"))
+    repository.save(make_refund(1, status="已批准", refund_amount=99.0))
+
+    assert repository.list_refunds(status="处理中") == []
+    assert repository.list_refunds(status="已批准")[0]["refund_amount"] == 99.0
+    assert len(repository.list_by_order("ORD202311002")) == 1
+    assert len(repository) == 1
+
+
+def test_sqlite_queries_use_indexes(tmp_path):
+    pool = SqliteConnectionPool(str(tmp_path / "refunds.db"))
+    SqliteRefundRepository(pool)
+
+    with pool.connection() as conn:
+        plans = {
+            sql: " ".join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+            for sql, params in [
+                (SqliteRefundRepository._BY_ORDER_SQL, ("ORD202311001", 10)),
+                (SqliteRefundRepository._LIST_SQL, ("", "\uffff", 10)),
+                (SqliteRefundRepository._LIST_BY_STATUS_SQL, ("处理中", "", "\uffff", 10)),
+            ]
+        }
+
+    assert "idx_refunds_order_id" in plans[SqliteRefundRepository._BY_ORDER_SQL]
+    assert "idx_refunds_apply_time" in plans[SqliteRefundRepository._LIST_SQL]
+    assert "idx_refunds_status" in plans[SqliteRefundRepository._LIST_BY_STATUS_SQL]
+    # 索引已按申请时间排序，不需要额外排序
+    assert not any("TEMP B-TREE" in plan for plan in plans.values())
+    pool.close()
+
+
+async def test_refunds_survive_restart_and_can_be_found_by_order(tmp_path):
+    db_path = str(tmp_path / "refunds.db")
+    tool = RefundRequestTool(repository=create_refund_repository("sqlite", db_path, pool_size=1))
+    submitted = await tool.asubmit_refund_request("ORD202311001", "商品损坏")
+
+    restarted = RefundRequestTool(repository=create_refund_repository("sqlite", db_path, pool_size=1))
+    by_order = await restarted.aquery_refunds_by_order("ORD202311001")
+
+    assert (await restarted.aquery_refund_status(submitted["refund_id"]))["refund_info"]["reason"] == "商品损坏"
+    assert [refund["refund_id"] for refund in by_order["refunds"]] == [submitted["refund_id"]]
+    assert (await restarted.aquery_refunds_by_order("ORD202311002"))["success"] is False
+    assert (await restarted.alist_refunds(status="处理中"))["refunds"][0]["order_id"] == "ORD202311001"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        create_refund_repository("redis")
+
+
+def test_tool_creates_sqlite_repository_on_first_use(monkeypatch, tmp_path):
+    db_path = tmp_path / "refunds.db"
+    monkeypatch.setattr(config, "REFUND_BACKEND", "sqlite")
+    monkeypatch.setattr(config, "REFUND_DB_PATH", str(db_path))
+
+    tool = RefundRequestTool()
+    assert not db_path.exists()
+
+    assert tool.list_refunds()["refunds"] == []
+    assert isinstance(tool.repository, SqliteRefundRepository)
+    assert db_path.exists()
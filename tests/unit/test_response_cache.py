@@ -0,0 +1,80 @@
+"""
+测试模型响应缓存
+"""
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.services.response_cache import ResponseCache, make_cache_key, normalize_text
+
+
+def test_normalize_text_ignores_width_case_spacing_and_trailing_punctuation():
+    assert normalize_text("  怎么退款？ ") == "怎么退款"
+    assert normalize_text("怎么  退款!!") == "怎么 退款"
+    assert normalize_text("ＯＲＤ202311003 的状态") == normalize_text("ord202311003 的状态。")
+
+
+def test_cache_key_depends_on_model_tools_and_messages():
+    question = [HumanMessage(content="发票怎么开？")]
+    key = make_cache_key("gpt-3.5-turbo", "tools-v1", question)
+
+    assert make_cache_key("gpt-3.5-turbo", "tools-v1", [HumanMessage(content="发票怎么开")]) == key
+    assert make_cache_key("gpt-4o", "tools-v1", question) != key
+    assert make_cache_key("gpt-3.5-turbo", "tools-v2", question) != key
+    assert make_cache_key("gpt-3.5-turbo", "tools-v1", [AIMessage(content="发票怎么开")]) != key
+
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = ResponseCache(capacity=2)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    assert cache.get("a") == "A"
+
+    cache.put("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A"
+    assert cache.get("c") == "C"
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.response_cache.time.time", lambda: now[0])
+    cache = ResponseCache(ttl=60)
+    cache.put("a", "A")
+
+    now[0] += 59
+    assert cache.get("a") == "A"
+    now[0] += 2
+    assert cache.get("a") is None
+
+
+def test_disk_tier_survives_restart_and_clear_removes_it(tmp_path):
+    db_path = str(tmp_path / "response_cache.db")
+    ResponseCache(db_path=db_path).put("a", "A")
+
+    restarted = ResponseCache(db_path=db_path)
+    assert restarted.get("a") == "A"
+    assert restarted.get("a") == "A"
+    stats = restarted.get_stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+    restarted.clear()
+    assert ResponseCache(db_path=db_path).get("a") is None
+
+
+def test_stats_report_hit_rate():
+    cache = ResponseCache()
+    cache.put("a", "A")
+    cache.get("a")
+    cache.get("missing")
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["disk_enabled"] is False
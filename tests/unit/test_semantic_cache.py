@@ -0,0 +1,69 @@
+"""
+测试基于MinHash/LSH的近似问题缓存
+"""
+import os
+import sys
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.semantic_cache import SemanticCache
+
+
+def test_near_duplicate_questions_hit():
+    cache = SemanticCache(threshold=0.6)
+    cache.put("怎么申请退款？", "请在订单详情页点击申请退款")
+
+    answer, similarity = cache.get("请问怎么申请退款呢")
+    assert answer == "请在订单详情页点击申请退款"
+    assert similarity >= 0.6
+    assert cache.get("发票怎么开") is None
+
+
+def test_threshold_is_tunable():
+    strict = SemanticCache(threshold=0.95)
+    loose = SemanticCache(threshold=0.5)
+    for cache in (strict, loose):
+        cache.put("发票怎么开", "在订单页申请开票")
+
+    assert strict.get("发票应该怎么开") is None
+    assert loose.get("发票应该怎么开")[0] == "在订单页申请开票"
+
+
+def test_different_order_numbers_never_match():
+    cache = SemanticCache(threshold=0.5)
+    cache.put("订单ORD202311001能退款吗", "可以退款")
+
+    assert cache.get("订单ORD202311003能退款吗") is None
+    assert cache.get("订单ord202311001能退款吗？")[0] == "可以退款"
+
+
+def test_scopes_are_isolated():
+    cache = SemanticCache()
+    cache.put("怎么退款", "旧模型的回答", scope="gpt-3.5")
+
+    assert cache.get("怎么退款", scope="gpt-4o") is None
+    assert cache.get("怎么退款", scope="gpt-3.5")[0] == "旧模型的回答"
+
+
+def test_capacity_evicts_oldest_entries_and_buckets():
+    cache = SemanticCache(capacity=2)
+    cache.put("怎么退款", "A")
+    cache.put("发票怎么开", "B")
+    cache.put("快递多久到", "C")
+
+    assert len(cache) == 2
+    assert cache.get("怎么退款") is None
+    assert cache.get("快递多久到")[0] == "C"
+    assert sum(len(bucket) for bucket in cache._buckets) <= 2 * cache.bands
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.services.semantic_cache.time.time", lambda: now[0])
+    cache = SemanticCache(ttl=60)
+    cache.put("怎么退款", "A")
+
+    now[0] += 61
+    assert cache.get("怎么退款") is None
+    assert cache.get_stats()["misses"] == 1
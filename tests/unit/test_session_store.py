@@ -0,0 +1,116 @@
+"""
+测试会话存储的用户索引和增量统计
+"""
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# 添加项目根目录到路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from src.services.session_store import (
+    LRUSessionStore,
+    MemorySessionStore,
+    SqliteSessionStore,
+    create_session_backend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite", "lru"])
+def store(request, tmp_path):
+    """分别测试内存、SQLite和带LRU缓存的存储"""
+    if request.param == "memory":
+        return MemorySessionStore()
+    if request.param == "sqlite":
+        return SqliteSessionStore(sqlite3.connect(str(tmp_path / "sessions.db"), check_same_thread=False))
+    session_store, _ = create_session_backend("sqlite", db_path=str(tmp_path / "sessions.db"), cache_size=2)
+    assert isinstance(session_store, LRUSessionStore)
+    return session_store
+
+
+def _session(user_id: str) -> dict:
+    return {"user_id": user_id, "created_at": "2023-11-10T10:00:00", "message_count": 0}
+
+
+def test_list_by_user_returns_only_that_users_sessions(store):
+    store.save("s1", _session("alice"))
+    store.save("s2", _session("bob"))
+    store.save("s3", _session("alice"))
+
+    assert [session_id for session_id, _ in store.list_by_user("alice")] == ["s1", "s3"]
+    assert [session_id for session_id, _ in store.list_by_user("bob")] == ["s2"]
+    assert store.list_by_user("carol") == []
+
+
+def test_stats_are_maintained_on_create_update_and_delete(store):
+    store.save("s1", _session("alice"))
+    store.save("s2", _session("alice"))
+    store.save("s3", _session("bob"))
+    assert store.get_stats() == {"total_sessions": 3, "unique_users": 2}
+
+    # 更新已有会话不改变计数
+    session = store["s1"]
+    session["message_count"] = 2
+    store.save("s1", session)
+    assert store.get_stats() == {"total_sessions": 3, "unique_users": 2}
+    assert store["s1"]["message_count"] == 2
+
+    assert store.delete("s3") is True
+    assert store.delete("s3") is False
+    assert store.get_stats() == {"total_sessions": 2, "unique_users": 1}
+
+    store.delete("s1")
+    store.delete("s2")
+    assert store.get_stats() == {"total_sessions": 0, "unique_users": 0}
+    assert len(store) == 0
+
+
+def test_record_turn_increments_atomically(store):
+    store.save("s1", _session("alice"))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda i: store.record_turn("s1", 2, f"2023-11-10T10:00:{i:02d}"), range(50)
+        ))
+
+    assert all(results)
+    assert store["s1"]["message_count"] == 100
+    assert store["s1"]["last_activity"].startswith("2023-11-10T10:00:")
+    assert store.record_turn("missing", 2, "2023-11-10T10:00:00") is False
+
+
+def test_sqlite_counters_are_backfilled_for_existing_databases(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "sessions.db"))
+    conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL, data TEXT NOT NULL)")
+    conn.executemany(
+        "INSERT INTO sessions VALUES (?, ?, '{}')",
+        [("s1", "alice"), ("s2", "alice"), ("s3", "bob")]
+    )
+    conn.commit()
+
+    store = SqliteSessionStore(conn)
+
+    assert store.get_stats() == {"total_sessions": 3, "unique_users": 2}
+
+
+def test_session_deleted_by_another_process_is_reported_missing(tmp_path):
+    from src.services.chat_service import ChatService
+
+    db_path = str(tmp_path / "sessions.db")
+    session_store, checkpointer = create_session_backend("sqlite", db_path=db_path)
+    other_process, _ = create_session_backend("sqlite", db_path=db_path)
+    service = ChatService(session_store=session_store, checkpointer=checkpointer)
+    session_store.save("s1", _session("alice"))
+    assert "s1" in session_store
+
+    assert other_process.delete("s1") is True
+
+    assert service.get_session_history("alice", "s1")["error"] == "会话不存在"
+    session_store.save("s1", _session("alice"))
+    other_process.delete("s1")
+    assert service.delete_session("alice", "s1")["error"] == "会话不存在"
+    assert session_store.get("s1") is None
+